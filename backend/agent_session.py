@@ -1,7 +1,6 @@
 import logging
 from dotenv import load_dotenv
 from livekit import rtc
-from livekit.plugins import silero
 from livekit.agents import (
     AgentServer,
     AgentSession,
@@ -10,25 +9,25 @@ from livekit.agents import (
     room_io,
     BackgroundAudioPlayer,
     AudioConfig,
+    JobProcess,
 )
 from livekit.plugins import noise_cancellation
-from agents.web.web_agent2 import Webagent
-from agents.invoice.invoice_agent import InvoiceAgent
-from agents.restaurant.restaurant_agent import RestaurantAgent
-from agents.banking.banking_agent import BankingAgent
-from agents.tour.tour_agent import TourAgent
-from agents.realestate.realestate_agent import RealestateAgent
-from agents.distributor.distributor_agent import DistributorAgent
-from agents.bandhan_banking.bandhan_banking import BandhanBankingAgent
+from agents.registry import AGENT_TYPES
 from openai.types.beta.realtime.session import TurnDetection
 from livekit.plugins.openai import realtime
 from openai.types.realtime import AudioTranscription
 import os
 import json
 import asyncio
+import time
 from typing import cast
-from inbound.config_manager import get_agent_for_number
+from inbound.config_manager import get_agent_for_number, route_store
 from utils.elevenlabs_nonstream_tts import ElevenLabsNonStreamingTTS
+from utils.audio_clips import load_wav
+from utils.greeting_cache import GreetingCache
+from utils.ui_context_coalescer import UIContextCoalescer
+from utils.turn_metrics import TurnMetricsCollector
+from utils.worker_load import LoopLagMonitor, WorkerLoad
 
 # Recording input
 # from recording.recording import start_audio_recording, record_participant_audio, start_audio_recording2
@@ -36,18 +35,52 @@ from utils.elevenlabs_nonstream_tts import ElevenLabsNonStreamingTTS
 logger = logging.getLogger("agent")
 load_dotenv(override=True)
 
+BG_AUDIO_DIR = os.path.join(os.path.dirname(__file__), "bg_audio")
+AMBIENT_SOUND_PATH = os.path.join(BG_AUDIO_DIR, "office-ambience_48k.wav")
+THINKING_SOUND_PATH = os.path.join(BG_AUDIO_DIR, "typing-sound_48k.wav")
 
-# Register multiple agent
-AGENT_TYPES = {
-    "web": Webagent,
-    "invoice": InvoiceAgent,
-    "restaurant": RestaurantAgent,
-    "bank": BankingAgent,
-    "tour": TourAgent,
-    "realestate": RealestateAgent,
-    "distributor": DistributorAgent,
-    "bandhan_banking": BandhanBankingAgent,
-}
+TTS_VOICE_ID = "kL8yauEAuyf6botQt9wa"  # Monika - Indian Female
+
+# Welcome messages are static, so their audio is synthesized once
+greeting_cache = GreetingCache()
+
+# Agent types whose modules (and, for "web", the vector store) are loaded in
+# prewarm, e.g. "web" on workers that serve website visitors. Empty by
+# default: other agents are imported by their first session, so a worker
+# only pays for (and holds in memory) the agents it actually runs.
+PREWARM_AGENT_TYPES = [
+    name.strip()
+    for name in os.getenv("PREWARM_AGENT_TYPES", "").split(",")
+    if name.strip()
+]
+
+
+def prewarm(proc: JobProcess):
+    """
+    Load per-process resources once, before the process accepts jobs: the
+    inbound routing table, the decoded background audio and, for the agent
+    types in PREWARM_AGENT_TYPES, their modules and prompts (and for "web"
+    the website collection with its embedding model).
+    """
+    started = time.perf_counter()
+    for agent_type in PREWARM_AGENT_TYPES:
+        if agent_type in AGENT_TYPES:
+            AGENT_TYPES[agent_type]
+        else:
+            logger.warning(f"Unknown agent type in PREWARM_AGENT_TYPES: {agent_type}")
+
+    if "web" in PREWARM_AGENT_TYPES:
+        from agents.web.retrieval import get_retriever
+
+        # Opened now so a web call does not wait for it
+        get_retriever().warmup()
+
+    # Compiled here so the first inbound call does not wait for it
+    route_store.load()
+
+    proc.userdata["ambient_sound"] = load_wav(AMBIENT_SOUND_PATH, loop=True)
+    proc.userdata["thinking_sound"] = load_wav(THINKING_SOUND_PATH)
+    logger.info(f"Prewarmed worker process in {(time.perf_counter() - started) * 1000:.0f} ms")
 
 
 # initialize the agent
@@ -55,9 +88,18 @@ server = AgentServer(
     api_key=os.getenv("LIVEKIT_API_KEY"),
     api_secret=os.getenv("LIVEKIT_API_SECRET"),
     ws_url=os.getenv("LIVEKIT_URL"),
+    setup_fnc=prewarm,
+    # Loading the embedding model can outlast the 10 s default
+    initialize_process_timeout=float(os.getenv("AGENT_PREWARM_TIMEOUT_SECONDS", "60")),
 )
 
 
+def create_agent(agent_type: str, ctx: JobContext):
+    if agent_type not in AGENT_TYPES:
+        agent_type = "web"
+    return AGENT_TYPES[agent_type](room=ctx.room)
+
+
 # # Helper function to handle the Egress call in background
 # async def trigger_recording(room_name, agent_type):
 #     try:
@@ -67,8 +109,114 @@ server = AgentServer(
 #         logger.error(f"Failed to start Egress: {e}")
 
 
+def _agent_from_metadata(raw: str | None) -> str | None:
+    """The "agent" field of a JSON metadata string, if it names a known agent."""
+    if not raw or not raw.strip():
+        return None
+    try:
+        agent_type = json.loads(raw).get("agent")
+    except Exception:
+        return None
+    return agent_type if agent_type in AGENT_TYPES else None
+
+
+def agent_type_from_participant(participant: rtc.RemoteParticipant) -> str | None:
+    """Agent type a participant asks for, or None if it carries no hint."""
+    agent_type = None
+
+    # Check if SIP call
+    if participant.kind == rtc.ParticipantKind.PARTICIPANT_KIND_SIP:
+        # Check sip status for incomming and outgoing
+        if participant.metadata and participant.metadata.strip():
+            try:
+                metadata = json.loads(participant.metadata)
+                if metadata.get("call_type") == "outbound":
+                    logger.info("Outbound call detected")
+                    agent_type = metadata.get("agent", "web")
+                    logger.info(f"Agent type from metadata: {agent_type}")
+            except Exception:
+                logger.error(
+                    "Error parsing agent type from metadata. Getting default agent."
+                )
+        else:
+            logger.info("Inbound call detected")
+            called_number = participant.attributes.get("sip.trunkPhoneNumber")
+            logger.info(f"Called number: {called_number}")
+            if isinstance(called_number, str) and called_number:
+                mapped_agent = get_agent_for_number(called_number)
+                logger.info(f"Mapped agent: {mapped_agent}")
+                if mapped_agent:
+                    agent_type = mapped_agent
+                    logger.info(f"Using mapped agent {agent_type} for {called_number}")
+            else:
+                logger.info("No SIP trunk phone number available")
+
+    else:
+        # Web call
+        try:
+            agent_type = json.loads(participant.metadata).get("agent", "web")
+        except Exception:
+            logger.error(
+                "Error parsing agent type from metadata. Getting default agent."
+            )
+
+    return agent_type
+
+
+def _agent_from_room_name(room_name: str) -> str | None:
+    # Token server rooms are named "<agent>-<id>"
+    prefix = room_name.rpartition("-")[0]
+    return prefix if prefix in AGENT_TYPES else None
+
+
+def agent_type_from_job(job) -> str | None:
+    """Agent type a job will run, from what the worker sees before accepting it."""
+    return (
+        _agent_from_metadata(job.metadata)
+        or _agent_from_metadata(job.room.metadata)
+        or _agent_from_room_name(job.room.name)
+    )
+
+
+# Report load from weighted sessions, CPU and job loop lag, so a busy worker
+# stops taking calls before they degrade
+server.load_fnc = WorkerLoad(agent_type_from_job)
+
+
+def resolve_agent_type(ctx: JobContext) -> tuple[str | None, str]:
+    """
+    Agent type for a job before the session starts, and where it came from.
+    Call after ctx.connect() so participants already in the room are visible.
+    """
+    agent_type = _agent_from_metadata(ctx.job.metadata)
+    if agent_type:
+        return agent_type, "job metadata"
+    agent_type = _agent_from_metadata(ctx.job.room.metadata)
+    if agent_type:
+        return agent_type, "room metadata"
+    # SIP callers usually create the room, so they are here before the agent
+    for participant in ctx.room.remote_participants.values():
+        if participant.kind in (
+            rtc.ParticipantKind.PARTICIPANT_KIND_SIP,
+            rtc.ParticipantKind.PARTICIPANT_KIND_STANDARD,
+        ):
+            agent_type = agent_type_from_participant(participant)
+            if agent_type in AGENT_TYPES:
+                return agent_type, "participant"
+    agent_type = _agent_from_room_name(ctx.job.room.name)
+    if agent_type:
+        return agent_type, "room name"
+    return None, "none"
+
+
 @server.rtc_session()
 async def my_agent(ctx: JobContext):
+    job_started = time.perf_counter()
+    # Loop lag of this job process, read by the worker's load_fnc
+    loop_lag = LoopLagMonitor()
+    loop_lag.start()
+    ctx.add_shutdown_callback(loop_lag.stop)
+
     session = AgentSession(
         llm=realtime.RealtimeModel(
             model="gpt-realtime",
@@ -90,7 +238,7 @@ async def my_agent(ctx: JobContext):
             api_key=cast(str, os.getenv("OPENAI_API_KEY")),
         ),
         tts=ElevenLabsNonStreamingTTS(
-            voice_id="kL8yauEAuyf6botQt9wa",  # Monika - Indian Female
+            voice_id=TTS_VOICE_ID,
             model="eleven_v3",
             api_key=cast(str, os.getenv("ELEVENLABS_API_KEY")),
         ),
@@ -99,22 +247,55 @@ async def my_agent(ctx: JobContext):
     )
 
     # --- Custom Background Audio Setup ---
+    # Decoded once per process in prewarm; fall back to the files
+    ambient_sound = ctx.proc.userdata.get("ambient_sound", AMBIENT_SOUND_PATH)
+    thinking_sound = ctx.proc.userdata.get("thinking_sound", THINKING_SOUND_PATH)
     background_audio = BackgroundAudioPlayer(
-        ambient_sound=AudioConfig(
-            os.path.join(
-                os.path.dirname(__file__), "bg_audio", "office-ambience_48k.wav"
-            ),
-            volume=0.4,
-        ),
-        thinking_sound=AudioConfig(
-            os.path.join(os.path.dirname(__file__), "bg_audio", "typing-sound_48k.wav"),
-            volume=0.5,
-        ),
+        ambient_sound=AudioConfig(ambient_sound, volume=0.4) if ambient_sound else None,
+        thinking_sound=AudioConfig(thinking_sound, volume=0.5) if thinking_sound else None,
+    )
+
+    # Resolve the agent before the session starts, so the realtime model gets
+    # one set of instructions. Warm pool rooms carry the agent type (and the
+    # join timeout) in the room metadata.
+    warm_agent_type = None
+    join_timeout = None
+    if ctx.job.room.metadata:
+        try:
+            room_metadata = json.loads(ctx.job.room.metadata)
+            if room_metadata.get("warm") and room_metadata.get("agent") in AGENT_TYPES:
+                warm_agent_type = room_metadata["agent"]
+                join_timeout = room_metadata.get("join_timeout")
+                logger.info(f"Warm room for agent {warm_agent_type}")
+        except Exception:
+            logger.error("Error parsing room metadata. Starting default agent.")
+
+    await ctx.connect()
+    initial_agent_type, source = resolve_agent_type(ctx)
+    if initial_agent_type is None:
+        # Nothing to go on yet: start a placeholder and swap once the
+        # participant joins
+        initial_agent_type, source = "invoice", "placeholder"
+    initial_agent = create_agent(initial_agent_type, ctx)
+
+    # Per-turn latency, written to turn_metrics/<room>.jsonl
+    turn_metrics = TurnMetricsCollector(ctx.job.room.name, initial_agent_type)
+    turn_metrics.attach(session)
+
+    async def _write_turn_metrics_summary():
+        summary = turn_metrics.close()
+        if summary:
+            logger.info(f"Turn latency summary ({turn_metrics.agent_type}): {json.dumps(summary)}")
+
+    ctx.add_shutdown_callback(_write_turn_metrics_summary)
+    logger.info(
+        f"Starting agent {initial_agent_type} (from {source}) "
+        f"{(time.perf_counter() - job_started) * 1000:.0f} ms after job start"
     )
 
     # ---- START SESSION ----
     await session.start(
-        agent=InvoiceAgent(room=ctx.room),  # Default agent
+        agent=initial_agent,
         room=ctx.room,
         room_options=room_io.RoomOptions(
             audio_input=room_io.AudioInputOptions(
@@ -124,61 +305,45 @@ async def my_agent(ctx: JobContext):
             ),
         ),
     )
+    logger.info(f"Session started {(time.perf_counter() - job_started) * 1000:.0f} ms after job start")
 
     # WAIT for participant
-    participant = await ctx.wait_for_participant()
+    try:
+        participant = await asyncio.wait_for(ctx.wait_for_participant(), timeout=join_timeout)
+    except asyncio.TimeoutError:
+        logger.info("No participant joined the warm room in time, releasing it")
+        ctx.shutdown(reason="warm room not claimed")
+        return
     logger.info(
         f"Participant joined: {participant.identity}, metadata={participant.metadata}"
     )
 
-    # Determine agent type based on room metadata or fallback to "web"
-    agent_type = "web"
-
-    # Check if SIP call
-    if participant.kind == rtc.ParticipantKind.PARTICIPANT_KIND_SIP:
-        # Check sip status for incomming and outgoing
-        if participant.metadata and participant.metadata.strip():
-            try:
-                metadata = json.loads(participant.metadata)
-                if metadata.get("call_type") == "outbound":
-                    logger.info("Outbound call detected")
-                    agent_type = metadata.get("agent", "web")
-                    logger.info(f"Agent type from metadata: {agent_type}")
-            except Exception:
-                logger.error(
-                    "Error parsing agent type from metadata. Getting default agent."
-                )
-        else:
-            logger.info("Inbound call detected")
-            called_number = participant.attributes.get("sip.trunkPhoneNumber")
-            logger.info(f"Called number: {called_number}")
-            if isinstance(called_number, str) and called_number:
-                mapped_agent = get_agent_for_number(called_number)
-                logger.info(f"Mapped agent: {mapped_agent}")
-                if mapped_agent:
-                    agent_type = mapped_agent
-                    logger.info(f"Using mapped agent {agent_type} for {called_number}")
-            else:
-                logger.info("No SIP trunk phone number available")
+    # The participant has the final say; without explicit info keep what we
+    # started with, or fall back to "web"
+    agent_type = agent_type_from_participant(participant)
+    if agent_type is None:
+        agent_type = initial_agent_type if source != "placeholder" else "web"
 
+    if agent_type == initial_agent_type:
+        # Already running the right agent, no swap needed
+        agent_instance = initial_agent
+        logger.info(f"Agent {agent_type} resolved before start, no swap needed")
     else:
-        # Web call
-        try:
-            agent_type = json.loads(participant.metadata).get("agent", "web")
-        except Exception:
-            logger.error(
-                "Error parsing agent type from metadata. Getting default agent."
-            )
+        # Agent instance with agent type
+        agent_instance = create_agent(agent_type, ctx)
 
-    AgentClass = AGENT_TYPES.get(agent_type, Webagent)
-
-    # Agent instance with agent type
-    agent_instance = AgentClass(room=ctx.room)
+        # Attach the agent to the session
+        session.update_agent(agent=agent_instance)
+        turn_metrics.agent_type = agent_type
+        logger.info(
+            f"Swapped agent {initial_agent_type} (from {source}) -> {agent_type} "
+            f"{(time.perf_counter() - job_started) * 1000:.0f} ms after job start"
+        )
 
-    # Attach the agent to the session
-    session.update_agent(agent=agent_instance)
+    # Frontend details for the WEB agent - UI Context Sync. Packets are
+    # debounced and only the latest snapshot is applied.
+    ui_context = UIContextCoalescer(apply=lambda payload: agent_instance.update_ui_context(payload))
 
-    # Frontend details for the WEB agent - UI Context Sync
     @ctx.room.on("data_received")
     def _handle_data_received(data: rtc.DataPacket):
         topic = getattr(data, "topic", None)
@@ -194,24 +359,30 @@ async def my_agent(ctx: JobContext):
             logger.debug("Agent does not support UI context sync")
             return
         
-        try:
-            context_payload = json.loads(payload_text)
-        except json.JSONDecodeError:
-            logger.warning("Invalid ui.context payload - JSON parse failed")
-            return
-        
-        # Enhanced logging for debugging
-        msg_type = context_payload.get("type", "unknown")
-        viewport = context_payload.get("viewport", {})
-        active_elements = context_payload.get("active_elements", [])
-        logger.info(
-            "📱 UI Context Sync: type=%s, screen=%s, active_elements=%d",
-            msg_type,
-            viewport.get("screen", "unknown"),
-            len(active_elements),
-        )
-        
-        agent_instance.update_ui_context(context_payload)
+        ui_context.submit(payload_text)
+
+    async def _log_ui_context_stats():
+        ui_context.close()
+        if ui_context.received:
+            logger.info(f"UI context updates: {ui_context.stats()}")
+
+    ctx.add_shutdown_callback(_log_ui_context_stats)
+
+    async def _log_retrieval_stats():
+        # Process-wide counters, only present once a web agent has run here
+        if "web" in AGENT_TYPES.loaded():
+            from agents.web.retrieval import get_retriever
+
+            logger.info(f"Website retrieval: {get_retriever().stats()}")
+
+    ctx.add_shutdown_callback(_log_retrieval_stats)
+
+    async def _log_prefetch_stats():
+        prefetcher = getattr(agent_instance, "prefetcher", None)
+        if prefetcher is not None and prefetcher.lookups:
+            logger.info(f"Speculative retrieval: {prefetcher.stats()}")
+
+    ctx.add_shutdown_callback(_log_prefetch_stats)
 
     # Start recording in a separate task
     # asyncio.create_task(trigger_recording(ctx.room.name, agent_type))
@@ -228,7 +399,11 @@ async def my_agent(ctx: JobContext):
 
     # --- INITIATING SPEECH (Dynamically changed based on agent) ---
     welcome_message = agent_instance.welcome_message
-    await session.say(text=welcome_message, allow_interruptions=True)
+    greeting_audio = await greeting_cache.get(welcome_message, session.tts, TTS_VOICE_ID)
+    if greeting_audio is not None:
+        await session.say(text=welcome_message, audio=greeting_audio, allow_interruptions=True)
+    else:
+        await session.say(text=welcome_message, allow_interruptions=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,70 @@
+"""
+Lazy registry of agent classes by agent type.
+
+Agent modules carry large prompt strings and, for the web agent, chromadb and
+the OpenAI client. The worker only imports an agent's module the first time
+a session asks for that agent type; the class is cached afterwards.
+"""
+
+import importlib
+import logging
+import threading
+import time
+from collections.abc import Mapping
+
+logger = logging.getLogger(__name__)
+
+# agent_type -> "module:Class"
+AGENT_CLASS_PATHS = {
+    "web": "agents.web.web_agent2:Webagent",
+    "invoice": "agents.invoice.invoice_agent:InvoiceAgent",
+    "restaurant": "agents.restaurant.restaurant_agent:RestaurantAgent",
+    "bank": "agents.banking.banking_agent:BankingAgent",
+    "tour": "agents.tour.tour_agent:TourAgent",
+    "realestate": "agents.realestate.realestate_agent:RealestateAgent",
+    "distributor": "agents.distributor.distributor_agent:DistributorAgent",
+    "bandhan_banking": "agents.bandhan_banking.bandhan_banking:BandhanBankingAgent",
+}
+
+
+class AgentRegistry(Mapping):
+    """Read-only mapping of agent_type -> Agent class, importing on first access."""
+
+    def __init__(self, class_paths: dict[str, str]):
+        self._class_paths = dict(class_paths)
+        self._classes: dict[str, type] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, agent_type: str) -> type:
+        cls = self._classes.get(agent_type)
+        if cls is not None:
+            return cls
+        path = self._class_paths[agent_type]
+        with self._lock:
+            cls = self._classes.get(agent_type)
+            if cls is None:
+                module_name, _, class_name = path.partition(":")
+                started = time.perf_counter()
+                cls = getattr(importlib.import_module(module_name), class_name)
+                self._classes[agent_type] = cls
+                logger.info(
+                    f"Loaded agent {agent_type} from {module_name} in "
+                    f"{(time.perf_counter() - started) * 1000:.0f} ms"
+                )
+        return cls
+
+    # Membership and iteration use the paths only, so they never import
+    def __contains__(self, agent_type: object) -> bool:
+        return agent_type in self._class_paths
+
+    def __iter__(self):
+        return iter(self._class_paths)
+
+    def __len__(self) -> int:
+        return len(self._class_paths)
+
+    def loaded(self) -> list[str]:
+        return list(self._classes)
+
+
+AGENT_TYPES = AgentRegistry(AGENT_CLASS_PATHS)
@@ -0,0 +1,148 @@
+"""
+Keyword (BM25) index over the scraped website chunks.
+
+Embeddings are good at paraphrases and poor at exact terms: product names,
+people, office cities. An inverted index over the same chunks catches those,
+and reciprocal-rank fusion merges its ranking with the vector one without
+having to calibrate BM25 scores against distances.
+
+scrape.py builds the index after every ingest and saves it next to the
+collection as INDEX_FILENAME, tagged with the collection's write-log
+position (see retrieval.collection_version). Postings are kept as arrays of
+chunk positions and term counts, a few hundred KB for the whole site.
+"""
+
+import heapq
+import json
+import math
+import re
+from array import array
+from collections import Counter
+
+INDEX_FILENAME = "bm25_index.json"
+
+_TOKEN = re.compile(r"\w+")
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be by can do does for from have how i in is it me my of on or
+    our the their them they this to us we what when where which who why will with you your
+    """.split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        # Fold plain plurals so "offices" finds "office"
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[str]:
+    """Ids from several best-first rankings, ordered by summed 1 / (k + rank)."""
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.__getitem__, reverse=True)
+
+
+class BM25Index:
+    def __init__(
+        self,
+        ids: list[str],
+        documents: list[str],
+        postings: dict[str, tuple[array, array]],
+        lengths: array,
+        version: int | None = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.ids = ids
+        self.documents = documents
+        self.version = version
+        self.k1 = k1
+        self.b = b
+        self._postings = postings
+        self._lengths = lengths
+        self._avg_length = sum(lengths) / len(lengths) if lengths else 0.0
+
+    @classmethod
+    def build(cls, ids: list[str], documents: list[str], version: int | None = None) -> "BM25Index":
+        postings: dict[str, tuple[array, array]] = {}
+        lengths = array("I")
+        for position, document in enumerate(documents):
+            counts = Counter(tokenize(document))
+            lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                if term not in postings:
+                    postings[term] = (array("I"), array("I"))
+                positions, term_counts = postings[term]
+                positions.append(position)
+                term_counts.append(count)
+        return cls(list(ids), list(documents), postings, lengths, version=version)
+
+    @classmethod
+    def from_collection(cls, collection, version: int | None = None) -> "BM25Index":
+        results = collection.get(include=["documents"])
+        return cls.build(results["ids"], results["documents"], version=version)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def terms(self) -> int:
+        return len(self._postings)
+
+    def search(self, query: str, k: int) -> list[tuple[int, float]]:
+        """(chunk position, score) of the `k` best chunks for `query`, best first."""
+        scores: dict[int, float] = {}
+        total = len(self.ids)
+        for term in set(tokenize(query)):
+            if term not in self._postings:
+                continue
+            positions, term_counts = self._postings[term]
+            idf = math.log(1 + (total - len(positions) + 0.5) / (len(positions) + 0.5))
+            for position, count in zip(positions, term_counts):
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[position] / self._avg_length)
+                scores[position] = scores.get(position, 0.0) + idf * count * (self.k1 + 1) / (count + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def save(self, path: str) -> None:
+        data = {
+            "version": self.version,
+            "k1": self.k1,
+            "b": self.b,
+            "ids": self.ids,
+            "documents": self.documents,
+            "lengths": self._lengths.tolist(),
+            "postings": {
+                term: [positions.tolist(), term_counts.tolist()]
+                for term, (positions, term_counts) in self._postings.items()
+            },
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        postings = {
+            term: (array("I", positions), array("I", term_counts))
+            for term, (positions, term_counts) in data["postings"].items()
+        }
+        return cls(
+            data["ids"],
+            data["documents"],
+            postings,
+            array("I", data["lengths"]),
+            version=data["version"],
+            k1=data["k1"],
+            b=data["b"],
+        )
@@ -0,0 +1,166 @@
+"""
+Turns retrieved website chunks into the text returned to the realtime model.
+
+scrape.py cuts pages into chunks that overlap by CHUNK_OVERLAP characters,
+and every page repeats the same navigation menus, so the raw top results
+say much the same thing several times. `assemble_context`:
+
+1. stitches chunks that continue one another back into a single passage,
+   dropping the overlapping text
+2. orders passages by maximal marginal relevance: retrieval rank, less
+   `1 - mmr_lambda` times the word overlap with passages already taken
+3. packs their lines, skipping lines already packed, until `token_budget`
+   (estimated at CHARS_PER_TOKEN) is spent. A stitched passage is packed
+   from the line where its best-ranked chunk starts, then back towards its
+   beginning, so a passage cut short keeps the text that ranked it
+
+Apart from MMR comparing each passage it takes with those still left,
+every step is a single pass over the text, and passages are only compared
+until the budget is full.
+"""
+
+import math
+import os
+from collections import Counter
+from typing import Iterator
+
+from agents.web.bm25 import tokenize
+
+# Matches create_overlapping_chunks in scrape.py
+CHUNK_OVERLAP = 200
+CHARS_PER_TOKEN = 4
+WEB_CONTEXT_TOKEN_BUDGET = int(os.getenv("WEB_CONTEXT_TOKEN_BUDGET", "1000"))
+WEB_CONTEXT_MMR_LAMBDA = float(os.getenv("WEB_CONTEXT_MMR_LAMBDA", "0.7"))
+
+SEPARATOR = "\n\n---\n\n"
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def stitch_chunks(documents: list[str], overlap: int = CHUNK_OVERLAP) -> list[tuple[int, str, int]]:
+    """
+    (best rank, text, offset of the best-ranked chunk in text) per passage,
+    joining each chunk to the one whose first `overlap` characters repeat
+    its last ones.
+    """
+    by_prefix = {doc[:overlap]: rank for rank, doc in enumerate(documents) if len(doc) > overlap}
+    following: dict[int, int] = {}
+    for rank, doc in enumerate(documents):
+        if len(doc) > overlap:
+            next_rank = by_prefix.get(doc[-overlap:])
+            if next_rank is not None and next_rank != rank:
+                following[rank] = next_rank
+    continued = set(following.values())
+
+    passages = []
+    used: set[int] = set()
+    for rank in range(len(documents)):
+        if rank in continued or rank in used:
+            continue
+        parts, best, best_start, current = [documents[rank]], rank, 0, rank
+        length = len(documents[rank])
+        used.add(rank)
+        while current in following and following[current] not in used:
+            current = following[current]
+            used.add(current)
+            parts.append(documents[current][overlap:])
+            if current < best:
+                # The chunk's own text begins in the overlap before its part
+                best, best_start = current, length - overlap
+            length += len(parts[-1])
+        passages.append((best, "".join(parts), best_start))
+    # A chain that loops back on itself has no head; keep its chunks as they are
+    passages.extend((rank, documents[rank], 0) for rank in range(len(documents)) if rank not in used)
+    return passages
+
+
+def _unit_terms(text: str) -> dict[str, float]:
+    counts = Counter(tokenize(text))
+    norm = math.sqrt(sum(v * v for v in counts.values()))
+    return {term: count / norm for term, count in counts.items()}
+
+
+def _cosine(a: dict[str, float], b: dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b[term] for term, weight in a.items() if term in b)
+
+
+def mmr_order(passages: list[tuple[int, str, int]], mmr_lambda: float) -> Iterator[tuple[int, str, int]]:
+    """
+    Passages in maximal-marginal-relevance order, chosen one at a time so
+    that a caller who stops early does not pay for the rest.
+    """
+    if not passages:
+        return
+    total = max(rank for rank, _, _ in passages) + 1
+    relevance = [1 - rank / total for rank, _, _ in passages]
+    terms = [_unit_terms(text) for _, text, _ in passages]
+    # Highest similarity of each remaining passage to those already chosen
+    redundancy = [0.0] * len(passages)
+    remaining = set(range(len(passages)))
+    while remaining:
+        best = max(remaining, key=lambda i: (mmr_lambda * relevance[i] - (1 - mmr_lambda) * redundancy[i], -i))
+        remaining.discard(best)
+        yield passages[best]
+        for i in remaining:
+            redundancy[i] = max(redundancy[i], _cosine(terms[i], terms[best]))
+
+
+def _pack_lines(passage: str, start: int, room: int, seen: set[str]) -> tuple[list[str], int]:
+    """
+    Unseen lines of `passage` that fit in `room` characters, in passage order,
+    and the room left. Lines are taken from the one holding offset `start`
+    to the end, then back from it to the beginning.
+    """
+    lines = passage.splitlines()
+    first, offset = 0, 0
+    for i, line in enumerate(passage.splitlines(keepends=True)):
+        if offset > start:
+            break
+        first, offset = i, offset + len(line)
+    kept: dict[int, str] = {}
+    for i in [*range(first, len(lines)), *range(first - 1, -1, -1)]:
+        line = lines[i]
+        key = " ".join(line.split())
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        if len(line) + 1 > room:
+            # Cut the last line at a word boundary rather than drop it,
+            # keeping the end of a line that comes before `start`
+            width = max(0, room - 1)
+            if i >= first:
+                cut = line[:width].rsplit(" ", 1)[0]
+            else:
+                cut = line[len(line) - width:].split(" ", 1)[-1] if width else ""
+            if cut.strip():
+                kept[i] = cut
+            room = 0
+            break
+        kept[i] = line
+        room -= len(line) + 1
+    return [kept[i] for i in sorted(kept)], room
+
+
+def assemble_context(
+    documents: list[str],
+    token_budget: int = WEB_CONTEXT_TOKEN_BUDGET,
+    mmr_lambda: float = WEB_CONTEXT_MMR_LAMBDA,
+) -> str:
+    """Retrieved chunks (best first) as deduplicated markdown within `token_budget`."""
+    budget = token_budget * CHARS_PER_TOKEN
+    seen: set[str] = set()
+    blocks = []
+    for _, passage, start in mmr_order(stitch_chunks(documents), mmr_lambda):
+        room = budget - (len(SEPARATOR) if blocks else 0)
+        lines, room = _pack_lines(passage, start, room, seen)
+        if lines:
+            blocks.append("\n".join(lines))
+            budget = room
+        if room <= 0:
+            break
+    return SEPARATOR.join(blocks)
+
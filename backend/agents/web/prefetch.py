@@ -0,0 +1,206 @@
+"""
+Speculative website lookups from the user's transcript.
+
+The realtime model only calls lookup_website_information once it has heard
+the question and decided to, and the lookup then starts from nothing.
+RetrievalPrefetcher follows the session's user transcripts instead (partial
+ones stream in from gpt-4o-mini-transcribe while the user is still talking)
+and starts the lookup for what is being said straight away:
+
+- a partial transcript starts a speculation once it has PREFETCH_MIN_WORDS
+  content words, and again each time it grows by as many more
+- the final transcript starts one unless the last partial already said it
+- a speculation still running when a longer transcript of the same
+  utterance arrives is cancelled
+
+When the tool is called, the newest speculation whose words cover at least
+PREFETCH_MATCH_THRESHOLD of the question's is served, finished or still in
+flight; otherwise the lookup runs as usual. Speculations share the bounded
+retrieval pool with real lookups, so none are started while it has a queue.
+They read the query cache but do not write it, so the partial transcripts
+and small talk they mostly look up do not crowd out real questions; a
+speculation's result is cached once it has answered one. `stats()` reports how often a lookup was served this way and the time saved.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from agents.web.bm25 import tokenize
+from agents.web.retrieval import WebsiteRetriever
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_MIN_WORDS = int(os.getenv("PREFETCH_MIN_WORDS", "3"))
+PREFETCH_MATCH_THRESHOLD = float(os.getenv("PREFETCH_MATCH_THRESHOLD", "0.6"))
+PREFETCH_MAX_AGE_SECONDS = float(os.getenv("PREFETCH_MAX_AGE_SECONDS", "30"))
+# Speculations kept per session; older ones are dropped
+PREFETCH_MAX_SPECULATIONS = 4
+
+
+@dataclass
+class _Speculation:
+    text: str
+    words: frozenset[str]
+    word_count: int
+    started_at: float
+    item_id: str | None = None
+    task: asyncio.Task | None = None
+    finished_at: float | None = None
+    used: bool = False
+    # Cache entry for the result, written once the speculation is served
+    entry: tuple | None = None
+
+
+class RetrievalPrefetcher:
+    def __init__(
+        self,
+        retriever: WebsiteRetriever,
+        n_results: int,
+        min_words: int = PREFETCH_MIN_WORDS,
+        match_threshold: float = PREFETCH_MATCH_THRESHOLD,
+        max_age_seconds: float = PREFETCH_MAX_AGE_SECONDS,
+    ):
+        self.retriever = retriever
+        self.n_results = n_results
+        self.min_words = min_words
+        self.match_threshold = match_threshold
+        self.max_age_seconds = max_age_seconds
+        self.speculations = 0
+        self.skipped_busy = 0
+        self.lookups = 0
+        self.hits = 0
+        self.saved_ms: list[float] = []
+        self._recent: deque[_Speculation] = deque()
+        self._remembering: set[asyncio.Task] = set()
+        self._session = None
+
+    def attach(self, session) -> None:
+        self.detach()
+        self._session = session
+        session.on("user_input_transcribed", self._on_user_input_transcribed)
+
+    def detach(self) -> None:
+        if self._session is not None:
+            self._session.off("user_input_transcribed", self._on_user_input_transcribed)
+            self._session = None
+
+    def _on_user_input_transcribed(self, ev) -> None:
+        words = tokenize(ev.transcript)
+        if len(words) < self.min_words:
+            return
+        last = self._recent[-1] if self._recent else None
+        if last is not None and last.item_id == ev.item_id:
+            if last.words == frozenset(words):
+                return
+            if not ev.is_final and len(words) < last.word_count + self.min_words:
+                return
+        self.speculate(ev.transcript, item_id=ev.item_id)
+
+    def speculate(self, text: str, item_id: str | None = None) -> None:
+        """Start looking up `text` in the background."""
+        if self.retriever.executor.queue_depth > 0:
+            self.skipped_busy += 1
+            return
+        last = self._recent[-1] if self._recent else None
+        if item_id is not None and last is not None and last.item_id == item_id and not last.task.done():
+            # Superseded by a longer transcript of the same utterance
+            self._drop(self._recent.pop())
+        words = tokenize(text)
+        speculation = _Speculation(
+            text=text,
+            words=frozenset(words),
+            word_count=len(words),
+            started_at=time.perf_counter(),
+            item_id=item_id,
+        )
+        speculation.task = asyncio.create_task(self._run(speculation))
+        self.speculations += 1
+        self._recent.append(speculation)
+        while len(self._recent) > PREFETCH_MAX_SPECULATIONS:
+            self._drop(self._recent.popleft())
+
+    async def _run(self, speculation: _Speculation) -> list[str]:
+        try:
+            documents, speculation.entry = await self.retriever.aspeculate(
+                speculation.text, n_results=self.n_results
+            )
+        except Exception as e:
+            logger.warning(f"Speculative lookup failed: {e}")
+            documents = []
+        speculation.finished_at = time.perf_counter()
+        return documents
+
+    async def lookup(self, question: str) -> list[str]:
+        """Documents for `question`, from a matching speculation when there is one."""
+        called_at = time.perf_counter()
+        self.lookups += 1
+        speculation = self._match(question, called_at)
+        if speculation is not None:
+            # Marked used, so it is no longer cancelled when dropped
+            speculation.used = True
+            documents = await speculation.task
+            if documents:
+                self.hits += 1
+                # A fresh lookup would have taken about as long as the
+                # speculation did; the tool only waited for what was left
+                duration = speculation.finished_at - speculation.started_at
+                waited = max(0.0, speculation.finished_at - called_at)
+                saved_ms = (duration - waited) * 1000
+                self.saved_ms.append(saved_ms)
+                logger.debug(f"Served {question!r} from speculation {speculation.text!r}, {saved_ms:.0f} ms saved")
+                self._remember(speculation)
+                return documents
+        return await self.retriever.aquery(question, n_results=self.n_results)
+
+    def _match(self, question: str, now: float) -> _Speculation | None:
+        while self._recent and now - self._recent[0].started_at > self.max_age_seconds:
+            self._drop(self._recent.popleft())
+        words = frozenset(tokenize(question))
+        if not words:
+            return None
+        best, best_coverage = None, self.match_threshold
+        for speculation in reversed(self._recent):
+            coverage = len(words & speculation.words) / len(words)
+            if coverage > best_coverage or (coverage == best_coverage and best is None):
+                best, best_coverage = speculation, coverage
+        return best
+
+    def _remember(self, speculation: _Speculation) -> None:
+        """Cache a served speculation's result in the background."""
+        entry, speculation.entry = speculation.entry, None
+        if entry is None:
+            return
+        task = asyncio.create_task(asyncio.to_thread(self.retriever.remember, entry))
+        self._remembering.add(task)
+        task.add_done_callback(self._remembered)
+
+    def _remembered(self, task: asyncio.Task) -> None:
+        self._remembering.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Caching a speculative lookup failed: {task.exception()}")
+
+    @staticmethod
+    def _drop(speculation: _Speculation) -> None:
+        if speculation.task is not None and not speculation.used:
+            speculation.task.cancel()
+
+    def close(self) -> None:
+        self.detach()
+        while self._recent:
+            self._drop(self._recent.popleft())
+
+    def stats(self) -> dict:
+        saved = sorted(self.saved_ms)
+        return {
+            "speculations": self.speculations,
+            "skipped_busy": self.skipped_busy,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+            "saved_ms_total": round(sum(saved)),
+            "saved_ms_p50": round(saved[len(saved) // 2], 1) if saved else None,
+        }
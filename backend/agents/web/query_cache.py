@@ -0,0 +1,299 @@
+"""
+Two-tier cache for website lookups.
+
+Callers ask the same few questions, so lookups are cached in front of the
+collection:
+
+- exact:   the normalized question text ("What services do you offer?" and
+           "what services do you offer" share an entry), checked before
+           embedding anything
+- similar: the question's embedding against those of cached questions; a
+           cosine similarity of at least `similarity_threshold` is a hit
+
+Entries expire after `ttl_seconds`, the least recently used are evicted
+beyond `max_entries`, and everything is dropped when the index changes.
+Hits, lookups and latency are kept per tier for `stats()`.
+
+Each agent worker process runs one call at a time, so an in-memory cache
+alone only helps with repeats inside one session. With a `path`, entries
+are also written to a SQLite database (WAL mode) shared by every process on
+the host, tagged with the collection version they were retrieved from
+(see retrieval.collection_version):
+
+- an exact-tier miss in memory falls back to a primary-key read from it
+- `load(version)` pulls in the entries other processes cached for that
+  version since the last load, so they serve similar-tier hits too, and
+  prunes entries of other versions, expired ones and the oldest beyond
+  `max_entries`
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+# Latency samples kept per tier for percentiles
+SAMPLE_WINDOW = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_cache (
+    key TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    n_results INTEGER NOT NULL,
+    embedding BLOB,
+    documents TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    created_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_query_cache_created ON query_cache (created_at);
+"""
+
+
+def normalize_query(text: str) -> str:
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+
+
+@dataclass
+class _Entry:
+    embedding: np.ndarray | None  # unit length
+    n_results: int
+    documents: list[str]
+    expires_at: float
+
+
+class QueryCache:
+    TIERS = ("exact", "similar", "miss")
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600,
+        similarity_threshold: float = 0.92,
+        path: str | None = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.path = path
+        # Collection version the entries belong to; set by load()
+        self.version: int | None = None
+        self.invalidations = 0
+        # Lookups answered by, and entries pulled from, the shared database
+        self.shared_hits = 0
+        self.shared_loaded = 0
+        self._conn: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        # created_at of the newest entry pulled from the shared database
+        self._loaded_until = 0.0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        # Stacked embeddings of the entries, rebuilt after changes
+        self._matrix: np.ndarray | None = None
+        self._matrix_keys: list[str] = []
+        self._hits = {tier: 0 for tier in self.TIERS}
+        self._latency_ms = {tier: deque(maxlen=SAMPLE_WINDOW) for tier in self.TIERS}
+
+    def get_exact(self, key: str, n_results: int) -> list[str] | None:
+        with self._lock:
+            documents = self._hit(key, n_results)
+        if documents is None and self._shared:
+            entry = self._read(key, n_results)
+            if entry is not None:
+                with self._lock:
+                    self._store(key, entry)
+                    self.shared_hits += 1
+                documents = entry.documents[:n_results]
+        return documents
+
+    def get_similar(self, embedding, n_results: int) -> list[str] | None:
+        vector = self._unit(embedding)
+        with self._lock:
+            if self._matrix is None:
+                keys = [k for k, e in self._entries.items() if e.embedding is not None]
+                if not keys:
+                    return None
+                self._matrix = np.stack([self._entries[k].embedding for k in keys])
+                self._matrix_keys = keys
+            scores = self._matrix @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                return None
+            return self._hit(self._matrix_keys[best], n_results)
+
+    def put(self, key: str, embedding, n_results: int, documents: list[str]) -> None:
+        entry = _Entry(
+            embedding=None if embedding is None else self._unit(embedding),
+            n_results=n_results,
+            documents=list(documents),
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            self._store(key, entry)
+        if self._shared:
+            self._write(key, entry)
+
+    def load(self, version: int | None) -> None:
+        """
+        Serve `version` of the collection, dropping entries of any other, and
+        pull in what other processes have cached for it since the last call.
+        """
+        if version != self.version:
+            if self.version is not None:
+                self.invalidate()
+            self.version = version
+            self._loaded_until = 0.0
+        if not self._shared:
+            return
+        now = time.time()
+        try:
+            with self._db_lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        "DELETE FROM query_cache WHERE version != ? OR expires_at <= ?",
+                        (version, now),
+                    )
+                    conn.execute(
+                        "DELETE FROM query_cache WHERE key IN (SELECT key FROM query_cache"
+                        " ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,),
+                    )
+                rows = conn.execute(
+                    "SELECT key, n_results, embedding, documents, expires_at, created_at"
+                    " FROM query_cache WHERE version = ? AND created_at > ?"
+                    " ORDER BY created_at DESC LIMIT ?",
+                    (version, self._loaded_until, self.max_entries),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not load the shared query cache: {e}")
+            return
+        if not rows:
+            return
+        with self._lock:
+            # Oldest first, so the newest end up most recently used
+            for key, n_results, embedding, documents, expires_at, _ in reversed(rows):
+                if key not in self._entries:
+                    self._store(key, self._decode(n_results, embedding, documents, expires_at, now))
+                    self.shared_loaded += 1
+        self._loaded_until = rows[0][5]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self.invalidations += 1
+
+    def record(self, tier: str, started: float) -> None:
+        """Count a lookup served by `tier` that began at perf_counter() `started`."""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._hits[tier] += 1
+            self._latency_ms[tier].append(elapsed_ms)
+
+    def stats(self) -> dict:
+        lookups = sum(self._hits.values())
+        stats = {
+            "entries": len(self._entries),
+            "lookups": lookups,
+            "invalidations": self.invalidations,
+            "shared_hits": self.shared_hits,
+            "shared_loaded": self.shared_loaded,
+        }
+        for tier in self.TIERS:
+            samples = sorted(self._latency_ms[tier])
+            stats[tier] = {
+                "count": self._hits[tier],
+                "rate": round(self._hits[tier] / lookups, 3) if lookups else 0.0,
+                "p50_ms": round(samples[len(samples) // 2], 2) if samples else None,
+                "p95_ms": round(samples[int(0.95 * (len(samples) - 1))], 2) if samples else None,
+            }
+        return stats
+
+    @property
+    def _shared(self) -> bool:
+        return self.path is not None and self.version is not None and self.max_entries > 0
+
+    def _store(self, key: str, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._matrix = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _read(self, key: str, n_results: int) -> _Entry | None:
+        now = time.time()
+        try:
+            with self._db_lock:
+                row = self._connect().execute(
+                    "SELECT n_results, embedding, documents, expires_at FROM query_cache"
+                    " WHERE key = ? AND version = ? AND n_results >= ? AND expires_at > ?",
+                    (key, self.version, n_results, now),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read the shared query cache: {e}")
+            return None
+        return self._decode(*row, now) if row else None
+
+    def _write(self, key: str, entry: _Entry) -> None:
+        now = time.time()
+        embedding = None if entry.embedding is None else entry.embedding.tobytes()
+        expires_at = now + (entry.expires_at - time.monotonic())
+        try:
+            with self._db_lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO query_cache (key, version, n_results, embedding,"
+                        " documents, expires_at, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (key, self.version, entry.n_results, embedding,
+                         json.dumps(entry.documents), expires_at, now),
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write to the shared query cache: {e}")
+
+    @staticmethod
+    def _decode(n_results: int, embedding, documents: str, expires_at: float, now: float) -> _Entry:
+        # Expiry is stored in wall-clock time, which every process shares
+        return _Entry(
+            embedding=None if embedding is None else np.frombuffer(embedding, dtype=np.float32),
+            n_results=n_results,
+            documents=json.loads(documents),
+            expires_at=time.monotonic() + (expires_at - now),
+        )
+
+    def _hit(self, key: str, n_results: int) -> list[str] | None:
+        entry = self._entries.get(key)
+        if entry is None or entry.n_results < n_results:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            self._matrix = None
+            return None
+        self._entries.move_to_end(key)
+        return entry.documents[:n_results]
+
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
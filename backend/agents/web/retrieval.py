@@ -0,0 +1,278 @@
+"""
+Process-wide retrieval over the scraped website collection (see scrape.py).
+
+An agent worker process runs one call at a time. Its WebsiteRetriever (one
+Chroma client, loaded HNSW index and embedding model) is opened in prewarm
+on workers with "web" in PREWARM_AGENT_TYPES, before the process takes a
+call, rather than when the call first needs it, and every Webagent the
+call creates (each agent switch back to the web agent makes a new one) uses
+it instead of opening its own. The collection is opened on first use under
+a lock; Chroma's client and collection are safe to query from several
+threads once open.
+
+Queries from agent sessions go through `aquery`, which runs them on a small
+bounded thread pool: embedding the question and the HNSW search are
+blocking, and on the event loop they would stall the call's audio. A query
+that cannot be served within RETRIEVAL_TIMEOUT_SECONDS (or finds the queue
+full) returns no documents.
+
+Repeated questions are answered from a QueryCache (see query_cache.py),
+backed by RETRIEVAL_CACHE_DB_PATH so that every worker process, and so
+every call, shares it. scrape.py writes to the collection from another
+process, so the cache moves to the new collection version whenever the
+collection's write log has moved on, checked at most every
+RETRIEVAL_CACHE_CHECK_SECONDS; each check also pulls in what other
+processes have cached since the last one. Speculative lookups from partial
+transcripts (see prefetch.py) go through `aspeculate`, which reads the
+cache but does not write it; what they retrieved is only cached, with
+`remember`, once a real question has been answered with it.
+
+With RETRIEVAL_HYBRID (the default), a cache miss also searches a BM25
+keyword index over the same chunks (see bm25.py) and merges the two rankings
+by reciprocal-rank fusion, so exact names and places the embedding misses
+still make the top results.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import chromadb
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+from agents.web.bm25 import INDEX_FILENAME, BM25Index, reciprocal_rank_fusion
+from agents.web.query_cache import QueryCache, normalize_query
+from utils.bounded_executor import BoundedExecutor, ExecutorFull
+
+logger = logging.getLogger(__name__)
+
+VECTOR_DB_PATH = "./vector_db"
+COLLECTION_NAME = "indusnet_website"
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "2"))
+RETRIEVAL_MAX_QUEUED = int(os.getenv("RETRIEVAL_MAX_QUEUED", "8"))
+RETRIEVAL_TIMEOUT_SECONDS = float(os.getenv("RETRIEVAL_TIMEOUT_SECONDS", "3"))
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "256"))
+RETRIEVAL_CACHE_TTL_SECONDS = float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "3600"))
+RETRIEVAL_CACHE_SIMILARITY = float(os.getenv("RETRIEVAL_CACHE_SIMILARITY", "0.92"))
+RETRIEVAL_CACHE_CHECK_SECONDS = float(os.getenv("RETRIEVAL_CACHE_CHECK_SECONDS", "30"))
+# Next to VECTOR_DB_PATH; empty keeps the cache in process memory only
+RETRIEVAL_CACHE_DB_PATH = os.getenv("RETRIEVAL_CACHE_DB_PATH", "./query_cache.db")
+RETRIEVAL_HYBRID = os.getenv("RETRIEVAL_HYBRID", "1") != "0"
+# Chunks taken from each ranking before fusion
+RETRIEVAL_FUSION_CANDIDATES = int(os.getenv("RETRIEVAL_FUSION_CANDIDATES", "20"))
+RETRIEVAL_RRF_K = int(os.getenv("RETRIEVAL_RRF_K", "60"))
+
+
+def collection_version(path: str = VECTOR_DB_PATH) -> int | None:
+    """Position of the collection's write log; it moves on with every write."""
+    try:
+        db = sqlite3.connect(f"file:{os.path.join(path, 'chroma.sqlite3')}?mode=ro", uri=True)
+        try:
+            (version,) = db.execute("SELECT MAX(seq_id) FROM embeddings_queue").fetchone()
+        finally:
+            db.close()
+    except sqlite3.Error as e:
+        logger.debug(f"Could not read the collection version: {e}")
+        return None
+    return version
+
+
+class WebsiteRetriever:
+    def __init__(
+        self,
+        path: str = VECTOR_DB_PATH,
+        collection_name: str = COLLECTION_NAME,
+        timeout_seconds: float = RETRIEVAL_TIMEOUT_SECONDS,
+        hybrid: bool = RETRIEVAL_HYBRID,
+    ):
+        self.path = path
+        self.collection_name = collection_name
+        self.timeout_seconds = timeout_seconds
+        self.hybrid = hybrid
+        self.executor = BoundedExecutor(
+            "retrieval", max_workers=RETRIEVAL_WORKERS, max_queued=RETRIEVAL_MAX_QUEUED
+        )
+        self.cache = QueryCache(
+            max_entries=RETRIEVAL_CACHE_SIZE,
+            ttl_seconds=RETRIEVAL_CACHE_TTL_SECONDS,
+            similarity_threshold=RETRIEVAL_CACHE_SIMILARITY,
+            path=RETRIEVAL_CACHE_DB_PATH or None,
+        )
+        self.embedding_function = DefaultEmbeddingFunction()
+        self._collection = None
+        self._lock = threading.Lock()
+        self._keyword_index: BM25Index | None = None
+        self._keyword_lock = threading.Lock()
+        self._index_version: int | None = None
+        self._index_checked_at = 0.0
+
+    @property
+    def collection(self):
+        collection = self._collection
+        if collection is None:
+            with self._lock:
+                if self._collection is None:
+                    started = time.perf_counter()
+                    client = chromadb.PersistentClient(path=self.path)
+                    self._collection = client.get_or_create_collection(
+                        name=self.collection_name, embedding_function=self.embedding_function
+                    )
+                    logger.info(
+                        f"Opened {self.collection_name} ({self._collection.count()} chunks) "
+                        f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+                    )
+                collection = self._collection
+        return collection
+
+    @property
+    def keyword_index(self) -> BM25Index:
+        index = self._keyword_index
+        if index is None:
+            with self._keyword_lock:
+                if self._keyword_index is None:
+                    self._keyword_index = self._load_keyword_index()
+                index = self._keyword_index
+        return index
+
+    def _load_keyword_index(self) -> BM25Index:
+        started = time.perf_counter()
+        version = collection_version(self.path)
+        try:
+            index = BM25Index.load(os.path.join(self.path, INDEX_FILENAME))
+        except (OSError, ValueError, KeyError) as e:
+            logger.info(f"No usable {INDEX_FILENAME} ({e}), building it from the collection")
+        else:
+            if index.version == version:
+                return index
+            logger.info(f"{INDEX_FILENAME} is behind the collection, rebuilding it")
+        index = BM25Index.from_collection(self.collection, version=version)
+        logger.info(
+            f"Built the keyword index ({len(index)} chunks, {index.terms} terms) "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return index
+
+    def embed(self, question: str) -> list[float]:
+        return list(self.embedding_function([question])[0])
+
+    def query(self, question: str, n_results: int) -> list[str]:
+        """Documents for the `n_results` chunks closest to `question`, best first."""
+        documents, entry = self.speculate(question, n_results)
+        if entry is not None:
+            self.remember(entry)
+        return documents
+
+    def speculate(self, question: str, n_results: int) -> tuple[list[str], tuple | None]:
+        """`query` without writing the cache.
+
+        Also returns the cache entry a miss would have written, for
+        `remember`, or None when the documents came from the cache.
+        """
+        started = time.perf_counter()
+        self._check_index_version()
+        key = normalize_query(question)
+        documents = self.cache.get_exact(key, n_results)
+        if documents is not None:
+            self.cache.record("exact", started)
+            return documents, None
+
+        embedding = self.embed(question)
+        documents = self.cache.get_similar(embedding, n_results)
+        if documents is not None:
+            self.cache.record("similar", started)
+            return documents, None
+
+        documents = self._search(question, embedding, n_results)
+        self.cache.record("miss", started)
+        return documents, (key, embedding, n_results, documents)
+
+    def remember(self, entry: tuple) -> None:
+        """Cache an entry returned by `speculate`."""
+        self.cache.put(*entry)
+
+    def _search(self, question: str, embedding: list[float], n_results: int) -> list[str]:
+        if not self.hybrid:
+            results = self.collection.query(query_embeddings=[embedding], n_results=n_results)
+            return [doc for sublist in results.get("documents") or [] for doc in sublist]
+
+        candidates = max(n_results, RETRIEVAL_FUSION_CANDIDATES)
+        results = self.collection.query(query_embeddings=[embedding], n_results=candidates)
+        vector_ranking = results["ids"][0]
+        documents = dict(zip(vector_ranking, results["documents"][0]))
+        keyword_index = self.keyword_index
+        keyword_ranking = []
+        for position, _score in keyword_index.search(question, candidates):
+            chunk_id = keyword_index.ids[position]
+            documents.setdefault(chunk_id, keyword_index.documents[position])
+            keyword_ranking.append(chunk_id)
+        fused = reciprocal_rank_fusion([vector_ranking, keyword_ranking], k=RETRIEVAL_RRF_K)
+        return [documents[chunk_id] for chunk_id in fused[:n_results]]
+
+    def _check_index_version(self) -> None:
+        now = time.monotonic()
+        if now - self._index_checked_at < RETRIEVAL_CACHE_CHECK_SECONDS:
+            return
+        self._index_checked_at = now
+        version = collection_version(self.path)
+        if version is None:
+            return
+        if self._index_version is not None and version != self._index_version:
+            logger.info("Website collection changed, clearing the query cache and keyword index")
+            self._keyword_index = None
+        self._index_version = version
+        self.cache.load(version)
+
+    async def aquery(self, question: str, n_results: int) -> list[str]:
+        """`query` off the event loop; no documents on timeout or overload."""
+        try:
+            return await self.executor.run(
+                self.query, question, n_results, timeout=self.timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Retrieval timed out after {self.timeout_seconds} s: {question!r}")
+        except ExecutorFull as e:
+            logger.warning(f"Retrieval skipped, {e}")
+        return []
+
+    async def aspeculate(self, question: str, n_results: int) -> tuple[list[str], tuple | None]:
+        """`speculate` off the event loop; no documents on timeout or overload."""
+        try:
+            return await self.executor.run(
+                self.speculate, question, n_results, timeout=self.timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            logger.debug(f"Speculative retrieval timed out after {self.timeout_seconds} s: {question!r}")
+        except ExecutorFull as e:
+            logger.debug(f"Speculative retrieval skipped, {e}")
+        return [], None
+
+    def stats(self) -> dict:
+        return {"executor": self.executor.stats(), "cache": self.cache.stats()}
+
+    def warmup(self) -> None:
+        """Open the collection, load the embedding model and index, and fill the cache."""
+        self._check_index_version()
+        try:
+            # The default embedding function loads its model on first use
+            self.collection.query(query_embeddings=[self.embed("warmup")], n_results=1)
+            if self.hybrid:
+                self.keyword_index
+        except Exception as e:
+            logger.warning(f"Could not warm up the website collection: {e}")
+
+
+_retriever: WebsiteRetriever | None = None
+_retriever_lock = threading.Lock()
+
+
+def get_retriever() -> WebsiteRetriever:
+    """The WebsiteRetriever of this process."""
+    global _retriever
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                _retriever = WebsiteRetriever()
+    return _retriever
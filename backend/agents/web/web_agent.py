@@ -1,9 +1,11 @@
 # from agents.base_agent import BaseAgentWithCustomSTT
 from livekit.agents import function_tool, RunContext, Agent
-import chromadb
 import logging
 import json
 import asyncio
+from agents.web.context_assembly import assemble_context
+from agents.web.prefetch import RetrievalPrefetcher
+from agents.web.retrieval import get_retriever
 from agents.web.web_agent_prompt import WEB_AGENT_PROMPT
 from shared_humanization_prompt.tts_humanificaiton_elevnlabs import (
     TTS_HUMANIFICATION_ELEVNLABS,
@@ -20,13 +22,19 @@ class Webagent(Agent):
             instructions=self._base_instructions,
         )
         self.room = room
-        self.chroma_client = chromadb.PersistentClient(path="./vector_db")
-        self.collection = self.chroma_client.get_or_create_collection(
-            name="indusnet_website"
-        )
-        self.db_fetch_size = 5
+        self.retriever = get_retriever()
+        # Candidates for context assembly, which keeps what fits its token budget
+        self.db_fetch_size = 8
+        # Starts lookups from the user's transcript before the model asks
+        self.prefetcher = RetrievalPrefetcher(self.retriever, n_results=self.db_fetch_size)
         self.ui_context: dict[str, object] = {}
 
+    async def on_enter(self) -> None:
+        self.prefetcher.attach(self.session)
+
+    async def on_exit(self) -> None:
+        self.prefetcher.close()
+
     def _build_ui_context_prompt(self) -> str:
         if not self.ui_context:
             return ""
@@ -142,24 +150,10 @@ class Webagent(Agent):
     async def lookup_website_information(self, context: RunContext, question: str):
         """Use this tool to answer any questions about Indus net Technologies."""
         logger.info(f"looking for {question}")
-        results = self.collection.query(
-            query_texts=[question], n_results=self.db_fetch_size
-        )
-        documents = results.get("documents") or []
+        flat_documents = await self.prefetcher.lookup(question)
 
-        # Flatten and join all text into a single clean markdown string
-        flat_documents = [item for sublist in documents for item in sublist]
-        joined = "\n\n---\n\n".join(
-            doc.strip() for doc in flat_documents if doc.strip()
-        )
-
-        # Optionally strip excessive whitespace, remove duplicate consecutive lines
-        cleaned = "\n".join(
-            line
-            for i, line in enumerate(joined.splitlines())
-            if line.strip()
-            and (i == 0 or line.strip() != joined.splitlines()[i - 1].strip())
-        )
+        # Overlap and repeated lines removed, packed into the context budget
+        cleaned = assemble_context(flat_documents)
 
         return cleaned
 
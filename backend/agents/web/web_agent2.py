@@ -1,10 +1,12 @@
 # from agents.base_agent import BaseAgentWithCustomSTT
 from livekit.agents import function_tool, RunContext, Agent
-import chromadb
 import logging
 import json
 import asyncio
 from agents.web.ai_integration.functions import UIAgentFunctions
+from agents.web.context_assembly import assemble_context
+from agents.web.prefetch import RetrievalPrefetcher
+from agents.web.retrieval import get_retriever
 from agents.web.web_agent_prompt import WEB_AGENT_PROMPT2
 from agents.web.ui_context_manager import UIContextManager
 from shared_humanization_prompt.tts_humanificaiton_elevnlabs import (
@@ -13,30 +15,45 @@ from shared_humanization_prompt.tts_humanificaiton_elevnlabs import (
 
 logger = logging.getLogger(__name__)
 
+BASE_INSTRUCTION = WEB_AGENT_PROMPT2 + TTS_HUMANIFICATION_ELEVNLABS
+
 
 class Webagent(Agent):
     def __init__(self, room) -> None:
-        self._base_instruction = WEB_AGENT_PROMPT2 + TTS_HUMANIFICATION_ELEVNLABS
+        self._base_instruction = BASE_INSTRUCTION
         super().__init__(
             # Instructions for the agent (will be updated dynamically with UI context)
             instructions=self._base_instruction,
         )
         self.room = room
-        self.chroma_client = chromadb.PersistentClient(path="./vector_db")
-        self.collection = self.chroma_client.get_or_create_collection(
-            name="indusnet_website"
-        )
-        self.db_fetch_size = 5
+        # Opened in prewarm when enabled; see agents/web/retrieval.py
+        self.retriever = get_retriever()
+        # Candidates for context assembly, which keeps what fits its token budget
+        self.db_fetch_size = 8
+        # Starts lookups from the user's transcript before the model asks
+        self.prefetcher = RetrievalPrefetcher(self.retriever, n_results=self.db_fetch_size)
         # UI Context Manager for state tracking and redundancy prevention
         self.ui_context_manager = UIContextManager()
+        self._ui_context_hash = None
         self.ui_agent_functions = UIAgentFunctions()
+        # Background work; referenced until done so it is not garbage collected
+        self._tasks: set[asyncio.Task] = set()
+
+    async def on_enter(self) -> None:
+        self.prefetcher.attach(self.session)
+
+    async def on_exit(self) -> None:
+        self.prefetcher.close()
 
     # Get UI context from frontend and update agent instructions
-    def update_ui_context(self, context_payload: dict) -> None:
-        """Process UI context sync from frontend and update agent state."""
+    def update_ui_context(self, context_payload: dict) -> bool:
+        """
+        Process UI context sync from frontend and update agent state.
+        Returns False if the instructions did not need to change.
+        """
         if not isinstance(context_payload, dict):
             logger.info("UI context ignored (non-dict payload)")
-            return
+            return False
         
         logger.info("UI context received: %s", context_payload)
         
@@ -44,14 +61,22 @@ class Webagent(Agent):
         self.ui_context_manager.update_from_sync(context_payload)
         
         # Update agent instructions with current UI state
-        self._update_instructions_with_context()
+        return self._update_instructions_with_context()
     
-    def _update_instructions_with_context(self) -> None:
-        """Inject current UI state into agent instructions."""
+    def _update_instructions_with_context(self) -> bool:
+        """Inject current UI state into agent instructions, if it changed."""
         ui_context_prompt = self.ui_context_manager.generate_context_prompt()
+        # Every update resends the full prompt to the realtime model
+        context_hash = hash(ui_context_prompt)
+        if context_hash == self._ui_context_hash:
+            logger.debug("UI context unchanged, instructions not updated")
+            return False
+        self._ui_context_hash = context_hash
         new_instructions = self._base_instruction + ui_context_prompt
-        self.update_instructions(new_instructions)
+        # update_instructions is a coroutine; it was previously never awaited
+        self._spawn(self.update_instructions(new_instructions))
         logger.debug("Agent instructions updated with UI context")
+        return True
 
     def is_content_visible(self, element_id: str = "", title: str = "") -> bool:
         """Check if content is already visible on screen."""
@@ -74,33 +99,36 @@ class Webagent(Agent):
     async def lookup_website_information(self, context: RunContext, question: str):
         """Use this tool to answer any questions about Indus net Technologies."""
         logger.info(f"looking for {question}")
-        results = self.collection.query(
-            query_texts=[question], n_results=self.db_fetch_size
-        )
-        documents = results.get("documents") or []
+        flat_documents = await self.prefetcher.lookup(question)
 
-        # Flatten and join all text into a single clean markdown string
-        flat_documents = [item for sublist in documents for item in sublist]
-        joined = "\n\n---\n\n".join(
-            doc.strip() for doc in flat_documents if doc.strip()
-        )
-
-        # Optionally strip excessive whitespace, remove duplicate consecutive lines
-        cleaned = "\n".join(
-            line
-            for i, line in enumerate(joined.splitlines())
-            if line.strip()
-            and (i == 0 or line.strip() != joined.splitlines()[i - 1].strip())
-        )
+        # Overlap and repeated lines removed, packed into the context budget
+        cleaned = assemble_context(flat_documents)
 
         # Stream UI updates as a background task with redundancy filtering
-        asyncio.create_task(
+        self._spawn(
             self._publish_ui_stream(
                 user_input=question, db_results=cleaned
             )
         )
         return cleaned
 
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return task
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.error(
+                f"Web agent background task failed: {error}",
+                exc_info=(type(error), error, error.__traceback__),
+            )
+
     async def _publish_ui_stream(
         self, user_input: str, db_results: str
     ) -> None:
@@ -0,0 +1 @@
+"""Micro-benchmarks for the token server and agent runtime."""
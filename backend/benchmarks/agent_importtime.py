@@ -0,0 +1,80 @@
+"""
+Benchmark: agent worker cold import time, lazy vs. eager agent loading.
+
+Runs `python -X importtime` in fresh interpreters and summarizes the output:
+
+- lazy:  `import agent_session` (agent modules load on first session)
+- eager: the same, then every AGENT_TYPES entry resolved, which is what the
+         worker used to pay at startup
+- per agent: the extra cost of the first session for each agent type
+
+Usage (from backend/):
+    python -m benchmarks.agent_importtime --runs 3 --top 15
+"""
+
+import argparse
+import subprocess
+import sys
+
+LAZY = "import agent_session"
+EAGER = LAZY + "\nfor name in agent_session.AGENT_TYPES: agent_session.AGENT_TYPES[name]"
+
+
+def _importtime(code: str) -> dict[str, tuple[int, int]]:
+    """module -> (self us, cumulative us) for one fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def _total_ms(modules: dict[str, tuple[int, int]]) -> float:
+    return sum(self_us for self_us, _ in modules.values()) / 1000
+
+
+def _best(code: str, runs: int) -> dict[str, tuple[int, int]]:
+    return min((_importtime(code) for _ in range(runs)), key=_total_ms)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    lazy = _best(LAZY, args.runs)
+    eager = _best(EAGER, args.runs)
+
+    print(f"import time, best of {args.runs} fresh interpreters")
+    print(f"  lazy   {_total_ms(lazy):8.0f} ms  {len(lazy)} modules")
+    print(f"  eager  {_total_ms(eager):8.0f} ms  {len(eager)} modules")
+
+    from agents.registry import AGENT_CLASS_PATHS
+
+    print("\nfirst-session cost per agent type (on top of lazy)")
+    for agent_type in AGENT_CLASS_PATHS:
+        loaded = _best(f"{LAZY}\nagent_session.AGENT_TYPES[{agent_type!r}]", args.runs)
+        extra = {name: times for name, times in loaded.items() if name not in lazy}
+        print(f"  {agent_type:<16} {_total_ms(extra):8.0f} ms  {len(extra)} modules")
+
+    print(f"\ntop {args.top} packages only imported eagerly (cumulative ms)")
+    eager_only = {
+        name: cumulative
+        for name, (_, cumulative) in eager.items()
+        if name not in lazy and "." not in name.strip()
+    }
+    for name, cumulative in sorted(eager_only.items(), key=lambda kv: -kv[1])[: args.top]:
+        print(f"  {cumulative / 1000:8.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: size and cost of the text lookup_website_information returns.
+
+For every question in retrieval_eval.jsonl, compares:
+
+- legacy:    the top 5 chunks joined, with consecutive duplicate lines
+             dropped (the tool's previous output)
+- assembled: assemble_context over the top 8 chunks (stitched, MMR-ordered,
+             deduplicated and packed into --budget tokens)
+
+and reports estimated tokens, whether the expected text survived, and
+assembly time. A second table times both on growing numbers of chunks;
+the legacy dedup re-splits the joined text for every line, so it is
+quadratic.
+
+Retrieval uses the bag-of-words stand-in from retrieval_eval unless
+--embed is given.
+
+Usage (from backend/):
+    python -m benchmarks.context_assembly_bench --budget 1000
+"""
+
+import argparse
+import time
+
+from agents.web.context_assembly import assemble_context, estimate_tokens
+from agents.web.query_cache import QueryCache
+from agents.web.retrieval import WebsiteRetriever
+from benchmarks.retrieval_eval import load_eval_set, stand_in_retriever
+from utils.turn_metrics import percentile
+
+
+def legacy_context(documents: list[str]) -> str:
+    joined = "\n\n---\n\n".join(doc.strip() for doc in documents if doc.strip())
+    return "\n".join(
+        line
+        for i, line in enumerate(joined.splitlines())
+        if line.strip() and (i == 0 or line.strip() != joined.splitlines()[i - 1].strip())
+    )
+
+
+def timed(fn, *args) -> tuple[str, float]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def compare_outputs(retriever: WebsiteRetriever, budget: int) -> None:
+    rows = {"legacy": [], "assembled": []}
+    for item in load_eval_set():
+        documents = retriever.query(item["question"], n_results=8)
+        outputs = {
+            "legacy": timed(legacy_context, documents[:5]),
+            "assembled": timed(assemble_context, documents, budget),
+        }
+        expected = [text.lower() for text in item["expected"]]
+        for label, (text, elapsed_ms) in outputs.items():
+            kept = any(e in text.lower() for e in expected)
+            rows[label].append((estimate_tokens(text), kept, elapsed_ms))
+
+    print(f"{'output':<11}{'tokens mean':>12}{'p95':>7}{'answer kept':>13}{'assembly ms':>13}")
+    for label, samples in rows.items():
+        tokens = [t for t, _, _ in samples]
+        print(
+            f"{label:<11}{sum(tokens) / len(tokens):>12.0f}{percentile(tokens, 95):>7}"
+            f"{sum(k for _, k, _ in samples) / len(samples):>13.0%}"
+            f"{percentile([ms for _, _, ms in samples], 50):>13.2f}"
+        )
+
+
+def compare_scaling(retriever: WebsiteRetriever, budget: int) -> None:
+    chunks = retriever.collection.get(include=["documents"])["documents"]
+    print(f"\n{'chunks':<8}{'legacy ms':>11}{'assembled ms':>14}")
+    for count in (5, 20, 80, 320):
+        documents = (chunks * (count // len(chunks) + 1))[:count]
+        _, legacy_ms = timed(legacy_context, documents)
+        _, assembled_ms = timed(assemble_context, documents, budget)
+        print(f"{count:<8}{legacy_ms:>11.1f}{assembled_ms:>14.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=int, default=1000, help="token budget")
+    parser.add_argument("--embed", action="store_true", help="use the real embedding model")
+    args = parser.parse_args()
+
+    retriever = WebsiteRetriever() if args.embed else stand_in_retriever()
+    retriever.cache = QueryCache(max_entries=0)
+    compare_outputs(retriever, args.budget)
+    compare_scaling(retriever, args.budget)
+
+
+if __name__ == "__main__":
+    main()
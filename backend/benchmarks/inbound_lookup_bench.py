@@ -0,0 +1,109 @@
+"""
+Benchmark: inbound number -> agent lookup as the routing table grows.
+
+Writes N mapped numbers to a temporary JSON config and a temporary route
+database, then times lookups of random mapped numbers:
+
+- before:  open and parse the JSON file on every lookup
+- indexed: primary-key SELECT against the SQLite store
+- after:   inbound.config_manager.get_agent_for_number (in-memory table)
+
+It also times a bulk upsert of all N numbers into the store.
+
+Usage (from backend/):
+    python -m benchmarks.inbound_lookup_bench --sizes 1000,10000,100000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from inbound import config_manager
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _legacy_get_agent_for_number(phone_number: str) -> str:
+    with open(config_manager.CONFIG_FILE, "r") as f:
+        return json.load(f).get(phone_number)
+
+
+def _indexed_lookup(phone_number: str) -> str:
+    row = config_manager.route_store._conn.execute(
+        "SELECT agent_type FROM inbound_routes WHERE phone_number = ?", (phone_number,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _time_lookups(lookup, numbers: list[str], count: int) -> list[float]:
+    samples = []
+    for _ in range(count):
+        number = random.choice(numbers)
+        started = time.perf_counter()
+        lookup(number)
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--legacy-lookups", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_manager.CONFIG_FILE = os.path.join(tmp, "inbound_config.json")
+        print(f"inbound lookup latency (us), {args.lookups} lookups per size")
+        for size in (int(s) for s in args.sizes.split(",")):
+            numbers = [f"+9180{i:08d}" for i in range(size)]
+            mappings = {n: "invoice" for n in numbers}
+            with open(config_manager.CONFIG_FILE, "w") as f:
+                json.dump(mappings, f)
+            # An empty store imports CONFIG_FILE on first open; keep that out
+            # of the upsert timing by opening against a missing file
+            os.rename(config_manager.CONFIG_FILE, config_manager.CONFIG_FILE + ".bak")
+            config_manager.route_store = config_manager.InboundRouteStore(
+                os.path.join(tmp, f"routes-{size}.db")
+            )
+
+            started = time.perf_counter()
+            config_manager.set_agents_for_numbers(mappings)
+            upsert_ms = (time.perf_counter() - started) * 1000
+            os.rename(config_manager.CONFIG_FILE + ".bak", config_manager.CONFIG_FILE)
+            # A fresh store, as in a prewarmed agent worker process
+            config_manager.route_store = config_manager.InboundRouteStore(
+                os.path.join(tmp, f"routes-{size}.db")
+            )
+            started = time.perf_counter()
+            config_manager.route_store.load()
+            load_ms = (time.perf_counter() - started) * 1000
+            print(f"  {size:>7} numbers  bulk upsert {upsert_ms:.1f} ms  load {load_ms:.1f} ms")
+
+            results = {
+                "before (json per call)": _time_lookups(
+                    _legacy_get_agent_for_number, numbers, args.legacy_lookups
+                ),
+                "indexed (sqlite)": _time_lookups(_indexed_lookup, numbers, args.lookups),
+                "after (in-memory)": _time_lookups(
+                    config_manager.get_agent_for_number, numbers, args.lookups
+                ),
+            }
+            for label, samples in results.items():
+                print(
+                    f"  {size:>7} numbers  {label:<24} p50={_percentile(samples, 50):10.2f}"
+                    f"  p99={_percentile(samples, 99):10.2f}"
+                    f"  mean={statistics.fmean(samples):10.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
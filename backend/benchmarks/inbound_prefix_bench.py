@@ -0,0 +1,88 @@
+"""
+Benchmark: longest-prefix inbound routing with a large prefix table.
+
+Compiles N random E.164 prefixes (plus a default route) into a RoutingTable
+and times lookups of random full numbers, in batches so timer overhead does
+not dominate:
+
+- e164:     InboundRouteStore's path for "+91..." input (fast-path normalize)
+- national: the same for "080 ..." input (full normalization)
+- floor:    one dict.get per number on a plain dict of the same size, for
+            calibrating the machine
+
+Lookup cost grows with the number of distinct prefix lengths, one probe
+each, rather than with the number of prefixes. The defaults spread prefixes
+over 8 lengths (worst case); DID blocks usually need one or two, e.g.
+--min-digits 8 --max-digits 10.
+
+Usage (from backend/):
+    python -m benchmarks.inbound_prefix_bench --prefixes 1000000
+"""
+
+import argparse
+import random
+import time
+
+from inbound.number_routing import compile_routes, normalize_number
+
+
+def _random_number(rng: random.Random) -> str:
+    return "+91" + "".join(rng.choice("0123456789") for _ in range(10))
+
+
+def _ns_per_call(fn, numbers: list[str], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter_ns()
+        for number in numbers:
+            fn(number)
+        best = min(best, (time.perf_counter_ns() - started) / len(numbers))
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prefixes", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-digits", type=int, default=4, help="after the country code")
+    parser.add_argument("--max-digits", type=int, default=11)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    routes = {"*": "web"}
+    while len(routes) < args.prefixes + 1:
+        length = 3 + rng.randint(args.min_digits, args.max_digits)
+        routes[_random_number(rng)[:length] + "*"] = rng.choice(
+            ["invoice", "bank", "tour", "restaurant"]
+        )
+
+    started = time.perf_counter()
+    table = compile_routes(routes)
+    compile_s = time.perf_counter() - started
+
+    numbers = [_random_number(rng) for _ in range(args.lookups)]
+    raw_numbers = [f"0{n[3:6]} {n[6:9]} {n[9:]}" for n in numbers]
+
+    def lookup(raw: str) -> str | None:
+        return table.lookup(normalize_number(raw))
+
+    flat = dict.fromkeys(routes)
+    baseline_ns = _ns_per_call(lambda raw: None, numbers, args.rounds)
+    floor_ns = _ns_per_call(flat.get, numbers, args.rounds) - baseline_ns
+    e164_ns = _ns_per_call(lookup, numbers, args.rounds) - baseline_ns
+    national_ns = _ns_per_call(lookup, raw_numbers, args.rounds) - baseline_ns
+    matched = sum(1 for n in numbers if table.lookup(n) != "web")
+
+    print(f"{args.prefixes} prefixes, {args.lookups} lookups, best of {args.rounds}")
+    print(f"  compile      {compile_s:8.2f} s")
+    print(f"  e164         {e164_ns:8.0f} ns/lookup")
+    print(f"  national     {national_ns:8.0f} ns/lookup")
+    print(f"  floor        {floor_ns:8.0f} ns/lookup")
+    print(f"  matched a prefix: {matched / len(numbers):.1%} (rest fell to default)")
+    print(f"  prefix lengths: {table.stats()['prefix_lengths']}")
+
+
+if __name__ == "__main__":
+    main()
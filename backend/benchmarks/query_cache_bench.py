@@ -0,0 +1,141 @@
+"""
+Benchmark: website lookup latency and hit rates with the two-tier query cache.
+
+Replays a Zipf-distributed stream of caller questions (several phrasings
+per intent, with case and punctuation noise) through WebsiteRetriever.query
+against the real collection, and prints per-tier hit rates and latency.
+
+The stream is split into --sessions calls of equal length. An agent worker
+process runs one call, so every call starts with a fresh cache:
+
+- no cache:    every lookup searches the collection
+- per-process: an in-memory cache, which only sees the call's own repeats
+- shared:      caches backed by one SQLite database, as in production
+
+The embedding model cannot be assumed to be downloaded, so a stand-in
+embeds hashed word counts after sleeping --embed-ms; phrasings that share
+most words land close together, as paraphrases do with the real model.
+
+Usage (from backend/):
+    python -m benchmarks.query_cache_bench --lookups 500 --sessions 100 --embed-ms 20
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import re
+import tempfile
+import time
+from typing import Callable
+
+import numpy as np
+
+from agents.web.query_cache import QueryCache
+from agents.web.retrieval import WebsiteRetriever, collection_version
+from utils.turn_metrics import percentile
+
+INTENTS = [
+    ["what services do you offer", "which services do you offer", "what services does your company offer"],
+    ["where is your office", "where is your office located", "where are your offices"],
+    ["how can I contact sales", "how do I contact your sales team", "contact sales"],
+    ["do you build mobile apps", "do you build mobile applications", "can you build a mobile app"],
+    ["are you hiring developers", "are you hiring", "do you have openings for developers"],
+    ["what industries do you work with", "which industries do you serve", "what industries do you work in"],
+    ["do you do cloud migration", "can you help with cloud migration", "cloud migration services"],
+    ["what is your pricing", "how much do you charge", "what are your prices"],
+    ["who are your clients", "which clients have you worked with", "who are your customers"],
+    ["do you offer AI solutions", "do you do artificial intelligence projects", "AI solutions"],
+]
+
+
+class BagOfWordsRetriever(WebsiteRetriever):
+    def __init__(self, embed_ms: float, cache: QueryCache):
+        super().__init__()
+        self.embed_ms = embed_ms
+        self.cache = cache
+        self.dimension = self.collection.get(limit=1, include=["embeddings"])["embeddings"].shape[1]
+
+    def embed(self, question: str) -> list[float]:
+        time.sleep(self.embed_ms / 1000)
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"\w+", question.lower()):
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimension] += 1
+        return vector.tolist()
+
+
+def workload(lookups: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(INTENTS))]
+    questions = []
+    for intent in rng.choices(INTENTS, weights=weights, k=lookups):
+        question = rng.choice(intent)
+        if rng.random() < 0.3:
+            question = question.capitalize() + "?"
+        questions.append(question)
+    return questions
+
+
+def run(
+    questions: list[str], sessions: int, embed_ms: float, new_cache: Callable[[], QueryCache]
+) -> tuple[list[float], dict[str, list[float]]]:
+    retriever = BagOfWordsRetriever(embed_ms, new_cache())
+    retriever.warmup()
+    version = collection_version(retriever.path)
+    per_session = -(-len(questions) // sessions)
+    latencies = []
+    tiers = {tier: [] for tier in QueryCache.TIERS}
+    for start in range(0, len(questions), per_session):
+        # Each call lands in a fresh worker process
+        retriever.cache = new_cache()
+        retriever.cache.load(version)
+        for question in questions[start:start + per_session]:
+            before = retriever.cache.stats()
+            started = time.perf_counter()
+            retriever.query(question, n_results=5)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            latencies.append(elapsed_ms)
+            after = retriever.cache.stats()
+            tier = next(t for t in QueryCache.TIERS if after[t]["count"] > before[t]["count"])
+            tiers[tier].append(elapsed_ms)
+    return latencies, tiers
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--embed-ms", type=float, default=20)
+    parser.add_argument("--similarity", type=float, default=0.8)
+    args = parser.parse_args()
+
+    questions = workload(args.lookups)
+    print(
+        f"{args.lookups} lookups over {len(INTENTS)} intents in {args.sessions} calls,"
+        f" stand-in embedding {args.embed_ms} ms"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        shared_path = os.path.join(tmp, "query_cache.db")
+        modes = {
+            "no cache": lambda: QueryCache(max_entries=0),
+            "per-process": lambda: QueryCache(similarity_threshold=args.similarity),
+            "shared": lambda: QueryCache(similarity_threshold=args.similarity, path=shared_path),
+        }
+        for label, new_cache in modes.items():
+            latencies, tiers = run(questions, args.sessions, args.embed_ms, new_cache)
+            print(
+                f"{label:<12} mean {sum(latencies) / len(latencies):6.1f} ms"
+                f"  p50 {percentile(latencies, 50):6.1f}  p95 {percentile(latencies, 95):6.1f}"
+            )
+            if label == "no cache":
+                continue
+            for tier, samples in tiers.items():
+                print(
+                    f"  {tier:<8} {len(samples) / len(latencies):6.1%} of lookups"
+                    f"  p50 {percentile(samples, 50) if samples else 0:.2f} ms"
+                    f"  p95 {percentile(samples, 95) if samples else 0:.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
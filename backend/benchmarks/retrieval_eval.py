@@ -0,0 +1,124 @@
+"""
+Offline evaluation: recall@k and latency of website retrieval.
+
+Runs every question in retrieval_eval.jsonl (questions about names, places
+and offerings on the scraped site, each with text that a relevant chunk
+contains) through three retrievers over the same chunks:
+
+- vector:  the Chroma collection alone
+- keyword: the BM25 index alone
+- hybrid:  both, merged by reciprocal-rank fusion (what agents use)
+
+recall@k is the share of questions with a relevant chunk among the top k;
+MRR averages 1 / rank of the first relevant chunk. The query cache is off.
+
+Embedding uses Chroma's default model with --embed (it must already be
+downloaded, and the stored chunk embeddings are used as they are).
+Otherwise the chunks are re-embedded into an in-memory collection with the
+hashed bag-of-words stand-in from query_cache_bench, so vector numbers are
+a weak lower bound rather than the real model's.
+
+Usage (from backend/):
+    python -m benchmarks.retrieval_eval --k 1 3 5
+"""
+
+import argparse
+import json
+import os
+import time
+
+import chromadb
+
+from agents.web.query_cache import QueryCache
+from agents.web.retrieval import WebsiteRetriever
+from benchmarks.query_cache_bench import BagOfWordsRetriever
+from utils.turn_metrics import percentile
+
+EVAL_SET = os.path.join(os.path.dirname(__file__), "retrieval_eval.jsonl")
+MODES = ("vector", "keyword", "hybrid")
+
+
+def load_eval_set(path: str = EVAL_SET) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def stand_in_retriever() -> WebsiteRetriever:
+    retriever = BagOfWordsRetriever(embed_ms=0, cache=QueryCache(max_entries=0))
+    chunks = retriever.collection.get(include=["documents"])
+    collection = chromadb.EphemeralClient().create_collection(
+        "retrieval_eval", metadata={"hnsw:space": "cosine"}
+    )
+    collection.add(
+        ids=chunks["ids"],
+        documents=chunks["documents"],
+        embeddings=[retriever.embed(document) for document in chunks["documents"]],
+    )
+    retriever._collection = collection
+    return retriever
+
+
+def ranked_documents(retriever: WebsiteRetriever, mode: str, question: str, k: int) -> list[str]:
+    if mode == "keyword":
+        index = retriever.keyword_index
+        return [index.documents[position] for position, _score in index.search(question, k)]
+    retriever.hybrid = mode == "hybrid"
+    return retriever.query(question, n_results=k)
+
+
+def first_relevant_rank(documents: list[str], expected: list[str]) -> int | None:
+    expected = [text.lower() for text in expected]
+    for rank, document in enumerate(documents, start=1):
+        if any(text in document.lower() for text in expected):
+            return rank
+    return None
+
+
+def evaluate(retriever: WebsiteRetriever, mode: str, eval_set: list[dict], ks: list[int]) -> dict:
+    depth = max(ks)
+    ranks, latencies, misses = [], [], []
+    for item in eval_set:
+        started = time.perf_counter()
+        documents = ranked_documents(retriever, mode, item["question"], depth)
+        latencies.append((time.perf_counter() - started) * 1000)
+        rank = first_relevant_rank(documents, item["expected"])
+        ranks.append(rank)
+        if rank is None:
+            misses.append(item["question"])
+    return {
+        "recall": {k: sum(1 for r in ranks if r is not None and r <= k) / len(ranks) for k in ks},
+        "mrr": sum(1 / r for r in ranks if r is not None) / len(ranks),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "misses": misses,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--embed", action="store_true", help="use the real embedding model")
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args()
+
+    eval_set = load_eval_set()
+    retriever = WebsiteRetriever() if args.embed else stand_in_retriever()
+    retriever.cache = QueryCache(max_entries=0)
+    retriever.warmup()
+    retriever.keyword_index
+
+    embedding = "default model" if args.embed else "bag-of-words stand-in"
+    print(f"{len(eval_set)} questions, {len(retriever.keyword_index)} chunks, {embedding}")
+    header = "".join(f"{f'recall@{k}':>11}" for k in args.k)
+    print(f"{'mode':<9}{header}{'MRR':>7}{'p50 ms':>9}{'p95 ms':>9}")
+    for mode in MODES:
+        r = evaluate(retriever, mode, eval_set, args.k)
+        recalls = "".join(f"{r['recall'][k]:>11.0%}" for k in args.k)
+        print(f"{mode:<9}{recalls}{r['mrr']:>7.2f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}")
+        if args.show_misses:
+            for question in r["misses"]:
+                print(f"  missed: {question}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: event-loop lag while web sessions run website lookups.
+
+`--sessions` simulated sessions each ask `--queries` questions against the
+real collection while a probe measures how late the event loop wakes up:
+
+- inline:   retriever.query on the event loop (what the tool used to do)
+- executor: retriever.aquery on the bounded retrieval pool
+
+Embedding uses Chroma's default model with --embed (it must already be
+downloaded). Otherwise a numpy stand-in of about --embed-ms replaces it;
+like ONNX Runtime it releases the GIL, and the HNSW search is real.
+
+Usage (from backend/):
+    python -m benchmarks.retrieval_loop_lag --sessions 8 --queries 10 --embed-ms 25
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+import numpy as np
+
+from agents.web.query_cache import QueryCache
+from agents.web.retrieval import WebsiteRetriever
+from utils.turn_metrics import percentile
+
+QUESTIONS = [
+    "what services do you offer",
+    "where is your office",
+    "do you build mobile apps",
+    "how can I contact sales",
+    "what industries do you work with",
+    "are you hiring developers",
+]
+
+
+class StandInEmbeddingRetriever(WebsiteRetriever):
+    """Real HNSW search over a stand-in embedding of roughly `embed_ms`."""
+
+    def __init__(self, embed_ms: float):
+        super().__init__()
+        self.dimension = self.collection.get(limit=1, include=["embeddings"])["embeddings"].shape[1]
+        self._matrix = np.random.default_rng(0).standard_normal((512, 512)).astype(np.float32)
+        self._rounds = self._calibrate(embed_ms)
+
+    def _embed_rounds(self, rounds: int) -> list[float]:
+        acc = self._matrix
+        for _ in range(rounds):
+            acc = np.tanh(acc @ self._matrix)
+        return acc[0, : self.dimension].tolist()
+
+    def _calibrate(self, embed_ms: float) -> int:
+        started = time.perf_counter()
+        self._embed_rounds(10)
+        per_round_ms = (time.perf_counter() - started) * 100
+        return max(1, round(embed_ms / per_round_ms))
+
+    def embed(self, question: str) -> list[float]:
+        return self._embed_rounds(self._rounds)
+
+
+async def _probe(lags: list[float], stop: asyncio.Event, interval: float = 0.005) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, (loop.time() - started - interval) * 1000))
+
+
+async def run_mode(retriever: WebsiteRetriever, mode: str, sessions: int, queries: int) -> dict:
+    lags: list[float] = []
+    latencies: list[float] = []
+    stop = asyncio.Event()
+
+    async def session(seed: int) -> None:
+        rng = random.Random(seed)
+        for _ in range(queries):
+            await asyncio.sleep(rng.uniform(0.01, 0.1))
+            question = rng.choice(QUESTIONS)
+            started = time.perf_counter()
+            if mode == "inline":
+                retriever.query(question, n_results=5)
+            else:
+                await retriever.aquery(question, n_results=5)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    probe = asyncio.create_task(_probe(lags, stop))
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    stop.set()
+    await probe
+    return {
+        "lag_p50": percentile(lags, 50),
+        "lag_p95": percentile(lags, 95),
+        "lag_max": max(lags),
+        "query_p50": percentile(latencies, 50),
+        "query_p95": percentile(latencies, 95),
+    }
+
+
+async def main_async(args) -> None:
+    if args.embed:
+        retriever = WebsiteRetriever()
+    else:
+        retriever = StandInEmbeddingRetriever(args.embed_ms)
+    # Every lookup goes to the index
+    retriever.cache = QueryCache(max_entries=0)
+    retriever.warmup()
+
+    print(
+        f"{args.sessions} sessions x {args.queries} lookups, "
+        f"{os.getenv('RETRIEVAL_WORKERS', '2')} retrieval threads"
+    )
+    print(f"{'mode':<10}{'loop lag p50/p95/max ms':>28}{'lookup p50/p95 ms':>22}")
+    for mode in ("inline", "executor"):
+        r = await run_mode(retriever, mode, args.sessions, args.queries)
+        print(
+            f"{mode:<10}{r['lag_p50']:>12.1f} /{r['lag_p95']:>6.1f} /{r['lag_max']:>7.1f}"
+            f"{r['query_p50']:>13.1f} /{r['query_p95']:>6.1f}"
+        )
+    print(f"executor stats: {retriever.stats()['executor']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--embed", action="store_true", help="use the real embedding model")
+    parser.add_argument("--embed-ms", type=float, default=25, help="stand-in embedding cost")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
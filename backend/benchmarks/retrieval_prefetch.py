@@ -0,0 +1,107 @@
+"""
+Benchmark: website lookup latency with speculative prefetch from transcripts.
+
+Simulated sessions ask questions from retrieval_eval.jsonl. Each question
+streams in as partial transcripts, one word every --word-ms, then a final
+transcript after --eos-ms, and the tool call follows --think-ms later (the
+realtime model deciding to call it). The tool's wait for documents is
+timed with and without a RetrievalPrefetcher listening to the transcripts.
+
+Retrieval uses the bag-of-words stand-in from retrieval_eval, with each
+embedding taking --embed-ms; the query cache is off so every lookup pays.
+
+Usage (from backend/):
+    python -m benchmarks.retrieval_prefetch --sessions 4 --questions 6 --embed-ms 40
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from livekit import rtc
+from livekit.agents import UserInputTranscribedEvent
+
+from agents.web.prefetch import RetrievalPrefetcher
+from agents.web.query_cache import QueryCache
+from benchmarks.retrieval_eval import load_eval_set, stand_in_retriever
+from utils.turn_metrics import percentile
+
+# What callers say around the question the model passes to the tool
+LEAD_INS = ["", "okay so", "hi, quick question,", "um, I wanted to ask,"]
+
+
+async def session(retriever, questions: list[str], args, prefetch: bool, seed: int) -> tuple[list[float], dict]:
+    rng = random.Random(seed)
+    emitter = rtc.EventEmitter()
+    prefetcher = RetrievalPrefetcher(retriever, n_results=8)
+    if prefetch:
+        prefetcher.attach(emitter)
+    waits = []
+    for turn, question in enumerate(questions):
+        item_id = f"item_{seed}_{turn}"
+        words = f"{rng.choice(LEAD_INS)} {question}".split()
+        for count in range(1, len(words) + 1):
+            await asyncio.sleep(args.word_ms / 1000)
+            emitter.emit(
+                "user_input_transcribed",
+                UserInputTranscribedEvent(transcript=" ".join(words[:count]), is_final=False, item_id=item_id),
+            )
+        await asyncio.sleep(args.eos_ms / 1000)
+        emitter.emit(
+            "user_input_transcribed",
+            UserInputTranscribedEvent(transcript=" ".join(words), is_final=True, item_id=item_id),
+        )
+        await asyncio.sleep(args.think_ms / 1000)
+        started = time.perf_counter()
+        await prefetcher.lookup(question)
+        waits.append((time.perf_counter() - started) * 1000)
+    prefetcher.close()
+    return waits, prefetcher.stats()
+
+
+async def main_async(args) -> None:
+    retriever = stand_in_retriever()
+    retriever.embed_ms = args.embed_ms
+    retriever.cache = QueryCache(max_entries=0)
+    retriever.warmup()
+    eval_questions = [item["question"] for item in load_eval_set()]
+    plans = [random.Random(i).sample(eval_questions, args.questions) for i in range(args.sessions)]
+
+    print(
+        f"{args.sessions} sessions x {args.questions} questions, word {args.word_ms} ms, "
+        f"end of speech {args.eos_ms} ms, model {args.think_ms} ms, embedding {args.embed_ms} ms"
+    )
+    print(f"{'mode':<10}{'tool wait p50/p95 ms':>22}{'hit rate':>10}{'saved p50 ms':>14}{'speculations':>14}")
+    for prefetch in (False, True):
+        results = await asyncio.gather(
+            *(session(retriever, plan, args, prefetch, seed) for seed, plan in enumerate(plans))
+        )
+        waits = [ms for session_waits, _ in results for ms in session_waits]
+        stats = [s for _, s in results]
+        lookups = sum(s["lookups"] for s in stats)
+        hits = sum(s["hits"] for s in stats)
+        saved = [s["saved_ms_p50"] for s in stats if s["saved_ms_p50"] is not None]
+        print(
+            f"{'prefetch' if prefetch else 'baseline':<10}"
+            f"{percentile(waits, 50):>13.1f} /{percentile(waits, 95):>6.1f}"
+            f"{hits / lookups:>10.0%}"
+            f"{(percentile(saved, 50) if saved else 0):>14.1f}"
+            f"{sum(s['speculations'] for s in stats):>14}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--questions", type=int, default=6)
+    parser.add_argument("--word-ms", type=float, default=250)
+    parser.add_argument("--eos-ms", type=float, default=300)
+    parser.add_argument("--think-ms", type=float, default=600)
+    parser.add_argument("--embed-ms", type=float, default=40)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: /api/getToken latency with list_rooms-based vs. constructed room names.
+
+Starts a local stand-in for the LiveKit RoomService (Twirp ListRooms) that
+reports N existing rooms, then times the token handler both ways:
+
+- before: generate 8 hex chars, list every room on the server, retry on clash
+- after:  server.generate_room_name (no outbound calls)
+
+Usage (from backend/):
+    python -m benchmarks.room_name_bench --rooms 10000 --requests 500
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+from aiohttp import web
+from livekit.api import ListRoomsRequest, ListRoomsResponse, Room
+
+from utils.livekit_client import get_livekit_api
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def get_rooms() -> list[str]:
+    """Every room name on the server, as token issuance used to fetch them."""
+    rooms = await get_livekit_api().room.list_rooms(ListRoomsRequest())
+    return [room.name for room in rooms.rooms]
+
+
+async def _start_stand_in(room_count: int) -> web.AppRunner:
+    payload = ListRoomsResponse(
+        rooms=[Room(sid=f"RM_{i}", name=f"web-{i:08x}") for i in range(room_count)]
+    ).SerializeToString()
+
+    async def list_rooms(_request: web.Request) -> web.Response:
+        return web.Response(body=payload, content_type="application/protobuf")
+
+    app = web.Application()
+    app.router.add_post("/twirp/livekit.RoomService/ListRooms", list_rooms)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 7999).start()
+    return runner
+
+
+async def _time_requests(handler, count: int) -> list[float]:
+    samples = []
+    for i in range(count):
+        started = time.perf_counter()
+        await handler(name=f"bench-{i}", agent="web", room=None)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rooms", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    import server
+
+    # server.py loads .env on import, so point it at the stand-in afterwards
+    os.environ["LIVEKIT_URL"] = "http://127.0.0.1:7999"
+    os.environ.setdefault("LIVEKIT_API_KEY", "devkey")
+    os.environ.setdefault("LIVEKIT_API_SECRET", "secret-secret-secret-secret-secret")
+
+    async def legacy_generate_room_name(agent: str) -> str:
+        while True:
+            room_name = f"{agent}-{uuid.uuid4().hex[:8]}"
+            if room_name not in await get_rooms():
+                return room_name
+
+    async def legacy_get_token(name: str, agent: str, room: str | None):
+        room = room or await legacy_generate_room_name(agent)
+        return await server.get_token(name=name, agent=agent, room=room)
+
+    runner = await _start_stand_in(args.rooms)
+    try:
+        results = {
+            "before (list_rooms)": await _time_requests(legacy_get_token, args.requests),
+            "after (constructed)": await _time_requests(server.get_token, args.requests),
+        }
+    finally:
+        await runner.cleanup()
+
+    print(f"getToken latency, {args.rooms} rooms on stand-in, {args.requests} requests")
+    for label, samples in results.items():
+        print(
+            f"  {label:<22} p50={_percentile(samples, 50):8.3f} ms"
+            f"  p99={_percentile(samples, 99):8.3f} ms"
+            f"  mean={statistics.fmean(samples):8.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
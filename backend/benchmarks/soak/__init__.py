@@ -0,0 +1 @@
+"""Soak test for concurrent agent sessions on one worker; see benchmarks.soak.run."""
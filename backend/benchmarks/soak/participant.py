@@ -0,0 +1,172 @@
+"""
+Synthetic caller for soak runs.
+
+Joins a room, publishes a microphone track and speaks pre-recorded
+utterances in real time (silence in between, like an open mic). After each
+utterance it waits for the agent's voice track to become active and records
+the response time: end of the caller's speech -> first agent audio, as the
+caller hears it.
+"""
+
+import asyncio
+import logging
+import math
+import time
+import wave
+
+import numpy as np
+from livekit import rtc
+
+logger = logging.getLogger("soak.participant")
+
+SAMPLE_RATE = 48000
+FRAME_MS = 10
+SAMPLES_PER_FRAME = SAMPLE_RATE * FRAME_MS // 1000
+VOICE_RMS_THRESHOLD = 300
+# Agent tracks that are not the agent's voice
+IGNORED_TRACKS = {"background_audio"}
+
+
+def load_speech(path: str) -> np.ndarray:
+    """A 16-bit WAV as mono int16 at SAMPLE_RATE."""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM")
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    if rate != SAMPLE_RATE:
+        positions = np.arange(0, len(samples), rate / SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+    return samples
+
+
+def _rms(data) -> float:
+    samples = np.frombuffer(data, dtype=np.int16)
+    if not len(samples):
+        return 0.0
+    return math.sqrt(float(np.mean(samples.astype(np.float32) ** 2)))
+
+
+class SyntheticParticipant:
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        utterances: list[np.ndarray],
+        turns: int = 5,
+        turn_timeout: float = 20.0,
+        quiet_seconds: float = 0.8,
+    ):
+        self.url = url
+        self.token = token
+        self.utterances = utterances
+        self.turns = turns
+        self.turn_timeout = turn_timeout
+        self.quiet_seconds = quiet_seconds
+        self.results: list[dict] = []
+        self._room = rtc.Room()
+        self._source = rtc.AudioSource(SAMPLE_RATE, 1)
+        self._speech: asyncio.Queue[np.ndarray] = asyncio.Queue()
+        self._spoken = asyncio.Event()
+        self._agent_voice = asyncio.Event()
+        self._agent_voice_at = 0.0
+        self._agent_last_voice = 0.0
+        self._tasks: list[asyncio.Task] = []
+
+    async def run(self) -> list[dict]:
+        self._room.on("track_subscribed", self._on_track_subscribed)
+        await self._room.connect(self.url, self.token)
+        try:
+            track = rtc.LocalAudioTrack.create_audio_track("microphone", self._source)
+            await self._room.local_participant.publish_track(
+                track, rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE)
+            )
+            self._tasks.append(asyncio.create_task(self._microphone()))
+
+            # Let the agent finish its welcome message first
+            await self._wait_for_agent_voice(self.turn_timeout)
+            await self._wait_for_agent_quiet()
+
+            for turn in range(1, self.turns + 1):
+                self._agent_voice.clear()
+                self._spoken.clear()
+                await self._speech.put(self.utterances[turn % len(self.utterances)])
+                await self._spoken.wait()
+                speech_ended_at = time.monotonic()
+                responded = await self._wait_for_agent_voice(self.turn_timeout)
+                self.results.append(
+                    {
+                        "turn": turn,
+                        "response_ms": round((self._agent_voice_at - speech_ended_at) * 1000, 1)
+                        if responded
+                        else None,
+                    }
+                )
+                if responded:
+                    await self._wait_for_agent_quiet()
+                await asyncio.sleep(0.3)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            await self._room.disconnect()
+        return self.results
+
+    async def _microphone(self) -> None:
+        """Stream speech when queued, silence otherwise, paced in real time."""
+        silence = np.zeros(SAMPLES_PER_FRAME, dtype=np.int16)
+        started = time.monotonic()
+        sent = 0
+        current: np.ndarray | None = None
+        offset = 0
+        while True:
+            if current is None and not self._speech.empty():
+                current, offset = self._speech.get_nowait(), 0
+            if current is not None:
+                chunk = current[offset : offset + SAMPLES_PER_FRAME]
+                offset += SAMPLES_PER_FRAME
+                if len(chunk) < SAMPLES_PER_FRAME:
+                    chunk = np.concatenate([chunk, silence[len(chunk) :]])
+                if offset >= len(current):
+                    current = None
+                    self._spoken.set()
+            else:
+                chunk = silence
+            await self._source.capture_frame(
+                rtc.AudioFrame(chunk.tobytes(), SAMPLE_RATE, 1, SAMPLES_PER_FRAME)
+            )
+            sent += 1
+            delay = started + sent * FRAME_MS / 1000 - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    def _on_track_subscribed(self, track, publication, participant) -> None:
+        if track.kind == rtc.TrackKind.KIND_AUDIO and publication.name not in IGNORED_TRACKS:
+            self._tasks.append(asyncio.create_task(self._listen(track)))
+
+    async def _listen(self, track: rtc.Track) -> None:
+        async for event in rtc.AudioStream(track, sample_rate=SAMPLE_RATE, num_channels=1):
+            if _rms(event.frame.data) < VOICE_RMS_THRESHOLD:
+                continue
+            now = time.monotonic()
+            self._agent_last_voice = now
+            if not self._agent_voice.is_set():
+                self._agent_voice_at = now
+                self._agent_voice.set()
+
+    async def _wait_for_agent_voice(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._agent_voice.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _wait_for_agent_quiet(self) -> None:
+        deadline = time.monotonic() + self.turn_timeout
+        while time.monotonic() < deadline:
+            if time.monotonic() - self._agent_last_voice >= self.quiet_seconds:
+                return
+            await asyncio.sleep(0.1)
@@ -0,0 +1,372 @@
+"""
+Soak test: how many concurrent sessions one agent worker sustains.
+
+Starts the provider stand-ins (benchmarks.soak.stand_ins) and an
+`agent_session.py start` worker pointed at them, then for each agent type
+runs steps of 1..N concurrent synthetic callers against a LiveKit server.
+During each step it samples the worker's process tree (CPU cores, RSS) and
+the job loop lag the worker reports for load_fnc, and collects per-turn
+response times from the callers and from the worker's turn metrics.
+
+The report lists every step and marks the knee per agent type: the last
+concurrency whose p95 response time stays within `--tolerance` of the
+single-session p95, with no failed turns and loop lag under budget.
+
+Needs a LiveKit server, e.g. `livekit-server --dev` (devkey / secret).
+Run the worker on the machine being sized; the stand-ins and callers also
+use CPU, so give them their own machine for final numbers (--no-worker
+attaches to a worker started separately with the printed environment).
+
+Usage (from backend/):
+    python -m benchmarks.soak.run --agents web,invoice --steps 1,2,4,8,16 --turns 5
+    python -m benchmarks.soak.run --agents web --tool lookup_website_information --tool-every 2
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import psutil
+from aiohttp import web
+from livekit import api as lk_api
+
+from benchmarks.soak.participant import SAMPLE_RATE, SyntheticParticipant, load_speech
+from benchmarks.soak.stand_ins import StandIns, speech_like
+from utils.turn_metrics import percentile, summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class ProcessTreeSampler:
+    """CPU (in cores) and RSS of a process and its children, sampled periodically."""
+
+    def __init__(self, pid: int | None, load_dir: str, interval_seconds: float = 0.5):
+        self.root = psutil.Process(pid) if pid else None
+        self.load_dir = load_dir
+        self.interval_seconds = interval_seconds
+        self.samples: list[dict] = []
+        self._cpu_times: dict[int, float] = {}
+
+    def _tree(self) -> list[psutil.Process]:
+        if self.root is None:
+            return []
+        try:
+            return [self.root, *self.root.children(recursive=True)]
+        except psutil.Error:
+            return []
+
+    def _loop_lag_ms(self) -> float:
+        worst = 0.0
+        for path in glob.glob(os.path.join(self.load_dir, "*")):
+            try:
+                if time.time() - os.path.getmtime(path) > 5:
+                    continue
+                with open(path) as f:
+                    worst = max(worst, float(f.read() or 0))
+            except (OSError, ValueError):
+                continue
+        return worst
+
+    async def run(self) -> None:
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            now = time.monotonic()
+            cpu_seconds = 0.0
+            rss = 0
+            seen: dict[int, float] = {}
+            for proc in self._tree():
+                try:
+                    times = proc.cpu_times()
+                    rss += proc.memory_info().rss
+                except psutil.Error:
+                    continue
+                total = times.user + times.system
+                seen[proc.pid] = total
+                cpu_seconds += total - self._cpu_times.get(proc.pid, total)
+            self._cpu_times = seen
+            self.samples.append(
+                {
+                    "at": now,
+                    "cpu_cores": cpu_seconds / (now - last),
+                    "rss_mb": rss / 1e6,
+                    "loop_lag_ms": self._loop_lag_ms(),
+                }
+            )
+            last = now
+
+    def window(self, since: float) -> list[dict]:
+        return [s for s in self.samples if s["at"] >= since]
+
+
+def make_token(api_key: str, api_secret: str, identity: str, agent: str, room: str) -> str:
+    # Same grants and metadata as server.mint_token
+    return (
+        lk_api.AccessToken(api_key, api_secret)
+        .with_identity(identity)
+        .with_name(identity)
+        .with_metadata(json.dumps({"agent": agent}))
+        .with_grants(lk_api.VideoGrants(room_join=True, room=room))
+        .to_jwt()
+    )
+
+
+def worker_turns(turn_metrics_dir: str, rooms: list[str]) -> list[dict]:
+    turns = []
+    for room in rooms:
+        path = os.path.join(turn_metrics_dir, f"{room}.jsonl")
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("type") == "turn":
+                    turns.append(record)
+    return turns
+
+
+async def run_step(args, agent: str, sessions: int, utterances, sampler, turn_metrics_dir) -> dict:
+    run_id = uuid.uuid4().hex[:6]
+    rooms = [f"{agent}-soak{run_id}x{i}" for i in range(sessions)]
+    callers = [
+        SyntheticParticipant(
+            args.livekit_url,
+            make_token(args.api_key, args.api_secret, f"caller-{i}", agent, room),
+            utterances,
+            turns=args.turns,
+            turn_timeout=args.turn_timeout,
+        )
+        for i, room in enumerate(rooms)
+    ]
+
+    async def _staggered(i: int, caller: SyntheticParticipant):
+        await asyncio.sleep(i * args.stagger_seconds)
+        return await caller.run()
+
+    started = time.monotonic()
+    outcomes = await asyncio.gather(
+        *(_staggered(i, c) for i, c in enumerate(callers)), return_exceptions=True
+    )
+    window = sampler.window(started)
+
+    response_ms = []
+    failed = 0
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            print(f"  caller failed: {outcome!r}")
+            failed += args.turns
+            continue
+        for turn in outcome:
+            if turn["response_ms"] is None:
+                failed += 1
+            else:
+                response_ms.append(turn["response_ms"])
+
+    # Give the worker time to close the sessions and write their summaries
+    await asyncio.sleep(args.cooldown_seconds)
+    worker_latency = summarize(worker_turns(turn_metrics_dir, rooms)).get("eos_to_first_audio_ms", {})
+
+    def _stat(field: str, fn) -> float | None:
+        values = [s[field] for s in window]
+        return round(fn(values), 1) if values else None
+
+    return {
+        "agent": agent,
+        "sessions": sessions,
+        "turns": len(response_ms) + failed,
+        "failed": failed,
+        "response_p50_ms": round(percentile(response_ms, 50), 1) if response_ms else None,
+        "response_p95_ms": round(percentile(response_ms, 95), 1) if response_ms else None,
+        "worker_eos_to_audio_p95_ms": worker_latency.get("p95"),
+        "cpu_cores_avg": _stat("cpu_cores", lambda v: sum(v) / len(v)),
+        "cpu_cores_max": _stat("cpu_cores", max),
+        "rss_mb_max": _stat("rss_mb", max),
+        "loop_lag_p95_ms": _stat("loop_lag_ms", lambda v: percentile(v, 95)),
+    }
+
+
+def find_knee(steps: list[dict], tolerance: float, lag_budget_ms: float) -> int | None:
+    """Highest concurrency that still behaves like a single session."""
+    if not steps or steps[0]["response_p95_ms"] is None:
+        return None
+    ceiling = steps[0]["response_p95_ms"] * (1 + tolerance)
+    knee = None
+    for step in steps:
+        healthy = (
+            step["failed"] == 0
+            and step["response_p95_ms"] is not None
+            and step["response_p95_ms"] <= ceiling
+            and (step["loop_lag_p95_ms"] or 0) <= lag_budget_ms
+        )
+        if not healthy:
+            break
+        knee = step["sessions"]
+    return knee
+
+
+def print_report(results: dict[str, list[dict]], knees: dict[str, int | None]) -> None:
+    header = (
+        f"{'agent':<12}{'sessions':>9}{'turns':>7}{'failed':>7}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'worker p95':>11}{'cpu avg':>9}{'cpu max':>9}{'rss MB':>9}{'lag p95':>9}"
+    )
+    print(header)
+
+    def _fmt(value, width):
+        return f"{'-' if value is None else value:>{width}}"
+
+    for agent, steps in results.items():
+        for step in steps:
+            marker = "  <- knee" if step["sessions"] == knees[agent] else ""
+            print(
+                f"{agent:<12}{step['sessions']:>9}{step['turns']:>7}{step['failed']:>7}"
+                f"{_fmt(step['response_p50_ms'], 9)}{_fmt(step['response_p95_ms'], 9)}"
+                f"{_fmt(step['worker_eos_to_audio_p95_ms'], 11)}{_fmt(step['cpu_cores_avg'], 9)}"
+                f"{_fmt(step['cpu_cores_max'], 9)}{_fmt(step['rss_mb_max'], 9)}"
+                f"{_fmt(step['loop_lag_p95_ms'], 9)}{marker}"
+            )
+    print()
+    for agent, knee in knees.items():
+        print(f"{agent}: knee at {knee if knee is not None else '< first step'} concurrent sessions")
+
+
+async def main_async(args) -> None:
+    run_dir = tempfile.mkdtemp(prefix="soak-")
+    turn_metrics_dir = os.path.join(run_dir, "turn_metrics")
+    load_dir = os.path.join(run_dir, "load")
+
+    stand_ins = StandIns(
+        llm_ttft_ms=args.llm_ttft_ms,
+        eos_silence_ms=args.eos_silence_ms,
+        tts_ttfb_ms=args.tts_ttfb_ms,
+        tool=args.tool,
+        tool_every=args.tool_every,
+    )
+    runner = web.AppRunner(stand_ins.app())
+    await runner.setup()
+    await web.TCPSite(runner, args.stand_in_host, args.stand_in_port).start()
+    stand_in_url = f"http://{args.stand_in_host}:{args.stand_in_port}/v1"
+
+    worker_env = {
+        "LIVEKIT_URL": args.livekit_url,
+        "LIVEKIT_API_KEY": args.api_key,
+        "LIVEKIT_API_SECRET": args.api_secret,
+        "OPENAI_BASE_URL": stand_in_url,
+        "OPENAI_API_KEY": "soak",
+        "ELEVENLABS_BASE_URL": stand_in_url,
+        "ELEVENLABS_API_KEY": "soak",
+        "TURN_METRICS_DIR": turn_metrics_dir,
+        "GREETING_CACHE_DIR": os.path.join(run_dir, "greeting_cache"),
+        "AGENT_LOAD_DIR": load_dir,
+        # The soak finds the limit; don't let the session cap stop dispatch first
+        "AGENT_MAX_SESSIONS": str(max(args.steps) * 4),
+    }
+    worker = None
+    if args.no_worker:
+        print("Start the worker with:")
+        env = " ".join(f"{k}={v}" for k, v in worker_env.items())
+        print(f"  {env} python agent_session.py start")
+        input("Press Enter once it has registered...")
+    else:
+        worker = subprocess.Popen(
+            [sys.executable, "agent_session.py", "start"],
+            cwd=BACKEND_DIR,
+            env={**os.environ, **worker_env},
+            stdout=open(os.path.join(run_dir, "worker.log"), "w"),
+            stderr=subprocess.STDOUT,
+        )
+        print(f"Worker pid {worker.pid}, log in {run_dir}/worker.log")
+        print(f"Waiting {args.warmup_seconds:.0f} s for it to register and prewarm")
+        await asyncio.sleep(args.warmup_seconds)
+
+    if args.speech:
+        utterances = [load_speech(path) for path in args.speech]
+    else:
+        utterances = [speech_like(1.8, SAMPLE_RATE, seed=i) for i in range(4)]
+
+    sampler = ProcessTreeSampler(args.worker_pid or (worker.pid if worker else None), load_dir)
+    sampler_task = asyncio.create_task(sampler.run())
+    results: dict[str, list[dict]] = {}
+    try:
+        for agent in args.agents:
+            results[agent] = []
+            for sessions in args.steps:
+                print(f"{agent}: {sessions} concurrent sessions...")
+                step = await run_step(args, agent, sessions, utterances, sampler, turn_metrics_dir)
+                results[agent].append(step)
+                print(f"  {json.dumps(step)}")
+                if step["turns"] and step["failed"] / step["turns"] > args.stop_failure_ratio:
+                    print("  too many failed turns, stopping this agent")
+                    break
+    finally:
+        sampler_task.cancel()
+        if worker is not None:
+            worker.terminate()
+            try:
+                worker.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+        await runner.cleanup()
+
+    knees = {
+        agent: find_knee(steps, args.tolerance, args.lag_budget_ms)
+        for agent, steps in results.items()
+    }
+    print()
+    print_report(results, knees)
+    report = {
+        "steps": results,
+        "knees": knees,
+        "stand_ins": {
+            "realtime_sessions": stand_ins.realtime_sessions,
+            "tts_requests": stand_ins.tts_requests,
+        },
+        "config": {k: v for k, v in vars(args).items() if k != "api_secret"},
+    }
+    out = args.out or os.path.join(run_dir, "report.json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {out}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Soak an agent worker with synthetic callers")
+    parser.add_argument("--livekit-url", default=os.getenv("LIVEKIT_URL", "ws://localhost:7880"))
+    parser.add_argument("--api-key", default=os.getenv("LIVEKIT_API_KEY", "devkey"))
+    parser.add_argument("--api-secret", default=os.getenv("LIVEKIT_API_SECRET", "secret"))
+    parser.add_argument("--agents", type=lambda s: s.split(","), default=["web", "invoice"])
+    parser.add_argument(
+        "--steps", type=lambda s: [int(n) for n in s.split(",")], default=[1, 2, 4, 8, 16]
+    )
+    parser.add_argument("--turns", type=int, default=5, help="turns per caller")
+    parser.add_argument("--speech", nargs="*", help="16-bit WAV utterances (default: synthetic speech)")
+    parser.add_argument("--turn-timeout", type=float, default=20.0)
+    parser.add_argument("--stagger-seconds", type=float, default=0.25)
+    parser.add_argument("--cooldown-seconds", type=float, default=5.0)
+    parser.add_argument("--warmup-seconds", type=float, default=30.0)
+    parser.add_argument("--stand-in-host", default="127.0.0.1")
+    parser.add_argument("--stand-in-port", type=int, default=8089)
+    parser.add_argument("--llm-ttft-ms", type=float, default=350)
+    parser.add_argument("--eos-silence-ms", type=float, default=500)
+    parser.add_argument("--tts-ttfb-ms", type=float, default=250)
+    parser.add_argument("--tool", help="tool the stand-in calls, e.g. lookup_website_information")
+    parser.add_argument("--tool-every", type=int, default=0, help="call --tool every N turns")
+    parser.add_argument("--no-worker", action="store_true", help="use a worker started separately")
+    parser.add_argument("--worker-pid", type=int, help="pid to sample with --no-worker")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed p95 growth over 1 session")
+    parser.add_argument("--lag-budget-ms", type=float, default=100)
+    parser.add_argument("--stop-failure-ratio", type=float, default=0.2)
+    parser.add_argument("--out", help="report path (default: in the run directory)")
+    args = parser.parse_args()
+    args.steps = sorted(set(args.steps))
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Local stand-ins for the OpenAI realtime API and ElevenLabs text-to-speech.
+
+The worker is pointed at them with OPENAI_BASE_URL and ELEVENLABS_BASE_URL,
+so a soak run exercises the real agent code without paying for (or waiting
+on) the providers:
+
+- realtime: a websocket speaking enough of the realtime protocol for
+  AgentSession. An energy VAD over the appended input audio ends the user
+  turn after `eos_silence_ms` of silence, then a canned text reply is
+  streamed word by word after `llm_ttft_ms`. With `tool` set, every
+  `tool_every`-th turn first calls that tool (when the agent has it) with
+  the transcript as its argument, so RAG-backed agents do their lookups.
+- elevenlabs: POST /v1/text-to-speech/<voice> returns a canned MP3, about
+  as long as the text would take to speak, after `tts_ttfb_ms`.
+"""
+
+import asyncio
+import base64
+import io
+import itertools
+import json
+import logging
+import math
+
+import av
+import numpy as np
+from aiohttp import WSMsgType, web
+
+logger = logging.getLogger("soak.stand_ins")
+
+REALTIME_SAMPLE_RATE = 24000
+VAD_RMS_THRESHOLD = 300
+
+REPLIES = [
+    "Sure, I can help with that. Let me walk you through the options we have.",
+    "Thanks for waiting. Here is what I found for you just now.",
+    "Got it. Is there anything else you would like to know about this?",
+    "That makes sense. I have noted it down and will take care of it.",
+]
+
+
+def speech_like(seconds: float, sample_rate: int, seed: int = 0) -> np.ndarray:
+    """Voiced harmonics with a syllable-rate envelope, as int16 PCM."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t + rng.uniform(0, np.pi)), 0, None) ** 0.5
+    signal = 0.3 * voiced * envelope + 0.01 * rng.standard_normal(len(t))
+    return (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+
+
+def encode_mp3(pcm: np.ndarray, sample_rate: int) -> bytes:
+    buf = io.BytesIO()
+    with av.open(buf, "w", format="mp3") as container:
+        stream = container.add_stream("mp3", rate=sample_rate)
+        stream.layout = "mono"
+        frame = av.AudioFrame.from_ndarray(pcm.reshape(1, -1), format="s16", layout="mono")
+        frame.sample_rate = sample_rate
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buf.getvalue()
+
+
+class _RealtimeConnection:
+    def __init__(self, ws: web.WebSocketResponse, stand_in: "StandIns"):
+        self.ws = ws
+        self.stand_in = stand_in
+        self.tools: dict[str, str] = {}  # tool name -> its string argument
+        self.turns = 0
+        self._ids = itertools.count(1)
+        self._speaking = False
+        self._silence_ms = 0.0
+        self._audio_ms = 0.0
+        self._speech_item: str | None = None
+        self._last_item: str | None = None
+        self._response: asyncio.Task | None = None
+
+    def new_id(self, prefix: str) -> str:
+        return f"{prefix}_{next(self._ids)}"
+
+    async def send(self, event: dict) -> None:
+        event.setdefault("event_id", self.new_id("event"))
+        if not self.ws.closed:
+            await self.ws.send_str(json.dumps(event))
+
+    async def handle(self, event: dict) -> None:
+        kind = event.get("type")
+        if kind == "session.update":
+            for tool in event.get("session", {}).get("tools") or []:
+                properties = tool.get("parameters", {}).get("properties", {})
+                strings = [name for name, spec in properties.items() if spec.get("type") == "string"]
+                if tool.get("name") and strings:
+                    self.tools[tool["name"]] = strings[0]
+            await self.send({"type": "session.updated", "session": event.get("session", {})})
+        elif kind == "input_audio_buffer.append":
+            await self._on_audio(base64.b64decode(event["audio"]))
+        elif kind == "input_audio_buffer.clear":
+            self._speaking, self._silence_ms = False, 0.0
+        elif kind == "conversation.item.create":
+            item = event["item"]
+            item.setdefault("id", self.new_id("item"))
+            await self._add_item(item, event.get("previous_item_id"))
+        elif kind == "conversation.item.delete":
+            await self.send({"type": "conversation.item.deleted", "item_id": event["item_id"]})
+        elif kind == "response.create":
+            self._start_response(event.get("response") or {})
+        elif kind == "response.cancel":
+            if self._response is not None:
+                self._response.cancel()
+
+    async def _add_item(self, item: dict, previous_item_id: str | None = None) -> None:
+        await self.send(
+            {
+                "type": "conversation.item.added",
+                "previous_item_id": previous_item_id or self._last_item,
+                "item": item,
+            }
+        )
+        self._last_item = item["id"]
+
+    async def _on_audio(self, pcm: bytes) -> None:
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        if not len(samples):
+            return
+        chunk_ms = len(samples) * 1000 / REALTIME_SAMPLE_RATE
+        self._audio_ms += chunk_ms
+        rms = math.sqrt(float(np.mean(samples.astype(np.float32) ** 2)))
+        if rms >= VAD_RMS_THRESHOLD:
+            self._silence_ms = 0.0
+            if not self._speaking:
+                self._speaking = True
+                self._speech_item = self.new_id("item")
+                await self.send(
+                    {
+                        "type": "input_audio_buffer.speech_started",
+                        "item_id": self._speech_item,
+                        "audio_start_ms": int(self._audio_ms),
+                    }
+                )
+            return
+        if not self._speaking:
+            return
+        self._silence_ms += chunk_ms
+        if self._silence_ms < self.stand_in.eos_silence_ms:
+            return
+
+        self._speaking = False
+        self.turns += 1
+        item_id = self._speech_item
+        await self.send(
+            {
+                "type": "input_audio_buffer.speech_stopped",
+                "item_id": item_id,
+                "audio_end_ms": int(self._audio_ms),
+            }
+        )
+        await self._add_item(
+            {
+                "id": item_id,
+                "type": "message",
+                "role": "user",
+                "status": "completed",
+                "content": [{"type": "input_audio", "transcript": None}],
+            }
+        )
+        await self.send(
+            {
+                "type": "conversation.item.input_audio_transcription.completed",
+                "item_id": item_id,
+                "content_index": 0,
+                "transcript": f"synthetic question number {self.turns}",
+            }
+        )
+        self._start_response({}, transcript=f"synthetic question number {self.turns}")
+
+    def _start_response(self, params: dict, transcript: str | None = None) -> None:
+        if self._response is not None and not self._response.done():
+            self._response.cancel()
+        tool = self.stand_in.tool
+        call_tool = (
+            transcript is not None
+            and tool in self.tools
+            and self.stand_in.tool_every > 0
+            and self.turns % self.stand_in.tool_every == 0
+        )
+        self._response = asyncio.create_task(
+            self._respond(params, tool_query=transcript if call_tool else None)
+        )
+
+    async def _respond(self, params: dict, tool_query: str | None) -> None:
+        response = {
+            "id": self.new_id("resp"),
+            "object": "realtime.response",
+            "status": "in_progress",
+            "metadata": params.get("metadata"),
+            "output": [],
+        }
+        try:
+            await self.send({"type": "response.created", "response": response})
+            await asyncio.sleep(self.stand_in.llm_ttft_ms / 1000)
+            if tool_query is not None:
+                await self._call_tool(response, tool_query)
+            else:
+                await self._stream_text(response)
+            response["status"] = "completed"
+        except asyncio.CancelledError:
+            response["status"] = "cancelled"
+        response["usage"] = {"input_tokens": 200, "output_tokens": 30, "total_tokens": 230}
+        await self.send({"type": "response.done", "response": response})
+
+    async def _call_tool(self, response: dict, query: str) -> None:
+        name = self.stand_in.tool
+        item = {
+            "id": self.new_id("item"),
+            "type": "function_call",
+            "status": "in_progress",
+            "call_id": self.new_id("call"),
+            "name": name,
+            "arguments": "",
+        }
+        common = {"response_id": response["id"], "output_index": 0}
+        await self.send({"type": "response.output_item.added", **common, "item": item})
+        await self._add_item(dict(item))
+        item = {**item, "status": "completed", "arguments": json.dumps({self.tools[name]: query})}
+        await self.send({"type": "response.output_item.done", **common, "item": item})
+        response["output"].append(item)
+
+    async def _stream_text(self, response: dict) -> None:
+        text = REPLIES[self.turns % len(REPLIES)]
+        item = {
+            "id": self.new_id("item"),
+            "type": "message",
+            "role": "assistant",
+            "status": "in_progress",
+            "content": [],
+        }
+        common = {"response_id": response["id"], "output_index": 0}
+        await self.send({"type": "response.output_item.added", **common, "item": item})
+        await self._add_item(dict(item))
+        await self.send(
+            {
+                "type": "response.content_part.added",
+                **common,
+                "item_id": item["id"],
+                "content_index": 0,
+                "part": {"type": "text", "text": ""},
+            }
+        )
+        for word in text.split(" "):
+            await self.send(
+                {
+                    "type": "response.output_text.delta",
+                    **common,
+                    "item_id": item["id"],
+                    "content_index": 0,
+                    "delta": word + " ",
+                }
+            )
+            await asyncio.sleep(self.stand_in.token_interval_ms / 1000)
+        await self.send(
+            {
+                "type": "response.output_text.done",
+                **common,
+                "item_id": item["id"],
+                "content_index": 0,
+                "text": text,
+            }
+        )
+        item = {**item, "status": "completed", "content": [{"type": "output_text", "text": text}]}
+        await self.send({"type": "response.output_item.done", **common, "item": item})
+        response["output"].append(item)
+
+
+class StandIns:
+    def __init__(
+        self,
+        llm_ttft_ms: float = 350,
+        token_interval_ms: float = 15,
+        eos_silence_ms: float = 500,
+        tts_ttfb_ms: float = 250,
+        tts_ms_per_char: float = 60,
+        tool: str | None = None,
+        tool_every: int = 0,
+    ):
+        self.llm_ttft_ms = llm_ttft_ms
+        self.token_interval_ms = token_interval_ms
+        self.eos_silence_ms = eos_silence_ms
+        self.tts_ttfb_ms = tts_ttfb_ms
+        self.tts_ms_per_char = tts_ms_per_char
+        self.tool = tool
+        self.tool_every = tool_every
+        self.realtime_sessions = 0
+        self.tts_requests = 0
+        self._mp3_clips: dict[tuple[int, int], bytes] = {}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/v1/realtime", self._realtime)
+        app.router.add_post("/v1/text-to-speech/{voice_id}", self._text_to_speech)
+        return app
+
+    async def _realtime(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        self.realtime_sessions += 1
+        conn = _RealtimeConnection(ws, self)
+        session = {"id": conn.new_id("sess"), "model": request.query.get("model")}
+        await conn.send({"type": "session.created", "session": session})
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            try:
+                await conn.handle(json.loads(msg.data))
+            except Exception:
+                logger.exception("realtime stand-in failed to handle event")
+        if conn._response is not None:
+            conn._response.cancel()
+        return ws
+
+    async def _text_to_speech(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.tts_requests += 1
+        output_format = request.query.get("output_format", "mp3_22050_32")
+        sample_rate = int(output_format.split("_")[1])
+        seconds = max(1, min(20, round(len(body.get("text", "")) * self.tts_ms_per_char / 1000)))
+        key = (seconds, sample_rate)
+        if key not in self._mp3_clips:
+            pcm = speech_like(seconds, sample_rate, seed=seconds)
+            self._mp3_clips[key] = await asyncio.to_thread(encode_mp3, pcm, sample_rate)
+        await asyncio.sleep(self.tts_ttfb_ms / 1000)
+        return web.Response(body=self._mp3_clips[key], content_type="audio/mpeg")
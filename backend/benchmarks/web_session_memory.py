@@ -0,0 +1,119 @@
+"""
+Benchmark: RSS and time to a first website lookup of a web call.
+
+An agent worker process runs one call, and every agent switch back to the
+web agent inside that call constructs a new Webagent. Each mode runs in a
+fresh interpreter standing in for one job process, which runs one call:
+a Webagent answering one query, then --switches more Webagents each
+answering one query.
+
+- per-agent: every Webagent opens its own WebsiteRetriever (a
+             PersistentClient and collection) when the call needs it, as
+             before
+- process:   prewarm (with PREWARM_AGENT_TYPES=web) opens the process-wide
+             WebsiteRetriever before the process takes the call, and every
+             Webagent uses it
+
+prewarm time is spent before the call arrives; ready times are what the
+caller waits for.
+
+Queries use a random vector by default so the run needs no embedding
+model; pass --embed to embed text with the default model (it must already
+be downloaded).
+
+Usage (from backend/):
+    python -m benchmarks.web_session_memory --switches 3
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+CHILD = r"""
+import json, os, random, sqlite3, sys, time
+import psutil
+
+mode, switches, embed = sys.argv[1], int(sys.argv[2]), sys.argv[3] == "1"
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+from agents.web.retrieval import COLLECTION_NAME, VECTOR_DB_PATH, WebsiteRetriever, get_retriever
+from agents.web.web_agent2 import Webagent
+
+# Read the dimension without opening the collection, so nothing is loaded yet
+with sqlite3.connect(os.path.join(VECTOR_DB_PATH, "chroma.sqlite3")) as db:
+    (dimension,) = db.execute(
+        "SELECT dimension FROM collections WHERE name = ?", (COLLECTION_NAME,)
+    ).fetchone()
+vector = [random.random() for _ in range(dimension)]
+process = psutil.Process()
+
+
+def query(retriever):
+    if embed:
+        retriever.collection.query(query_texts=["what services do you offer"], n_results=5)
+    else:
+        retriever.collection.query(query_embeddings=[vector], n_results=5)
+
+
+def open_agent():
+    started = time.perf_counter()
+    agent = Webagent(room=None)
+    retriever = WebsiteRetriever() if mode == "per-agent" else agent.retriever
+    query(retriever)
+    return agent, retriever, (time.perf_counter() - started) * 1000
+
+
+started = time.perf_counter()
+if mode == "process":
+    get_retriever().collection
+    query(get_retriever())
+prewarm_ms = (time.perf_counter() - started) * 1000
+baseline = process.memory_info().rss
+
+agents = [open_agent() for _ in range(switches + 1)]
+switch_ms = sorted(ms for _, _, ms in agents[1:])
+print(json.dumps({
+    "prewarm_ms": prewarm_ms,
+    "first_ready_ms": agents[0][2],
+    "switch_ready_ms_p50": switch_ms[len(switch_ms) // 2] if switch_ms else 0.0,
+    "call_rss_growth_mb": (process.memory_info().rss - baseline) / 1e6,
+    "retrievers": len({id(retriever) for _, retriever, _ in agents}),
+}))
+"""
+
+
+def run_mode(mode: str, switches: int, embed: bool) -> dict:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, mode, str(switches), "1" if embed else "0"],
+        cwd=backend_dir,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{mode} run failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--switches", type=int, default=3, help="agent switches back to web in the call")
+    parser.add_argument("--embed", action="store_true", help="embed query text with the default model")
+    args = parser.parse_args()
+
+    print(f"one web call per process, {args.switches} agent switches, one query per Webagent")
+    print(
+        f"{'mode':<11}{'prewarm ms':>12}{'first ready ms':>16}{'switch ready ms':>17}"
+        f"{'call RSS MB':>13}{'retrievers':>12}"
+    )
+    for mode in ("per-agent", "process"):
+        r = run_mode(mode, args.switches, args.embed)
+        print(
+            f"{mode:<11}{r['prewarm_ms']:>12.1f}{r['first_ready_ms']:>16.1f}"
+            f"{r['switch_ready_ms_p50']:>17.1f}{r['call_rss_growth_mb']:>13.1f}{r['retrievers']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+# gunicorn_conf.py - loaded by server_run.py
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    # Drop the live gauges of workers that exited (max-requests restarts etc.)
+    multiprocess.mark_process_dead(worker.pid)
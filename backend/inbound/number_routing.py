@@ -0,0 +1,153 @@
+"""
+E.164 normalization and longest-prefix routing for inbound numbers.
+
+Route keys accepted by the inbound store:
+
+- "+918044319240"                    exact number
+- "+9180443*"                        every number starting with the prefix
+- "+918044319200..+918044319299"     inclusive range of equal-length numbers
+- "*"                                default route
+
+Numbers and keys may be written as "+91 80 4431 9240", "918044319240",
+"08044319240" or "8044319240"; all normalize to "+918044319240" using
+INBOUND_DEFAULT_COUNTRY_CODE for national formats.
+
+A RoutingTable is compiled once per change and never mutated afterwards, so
+the store can swap it in with a single assignment. Prefixes are kept in one
+dict per prefix length and probed longest first: the same answer a trie
+gives, with at most ~15 hash lookups and far less memory than a
+node-per-digit trie at a million prefixes.
+"""
+
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COUNTRY_CODE = os.getenv("INBOUND_DEFAULT_COUNTRY_CODE", "91")
+# Digits in a national number without trunk prefix (India, NANP: 10)
+NATIONAL_NUMBER_LENGTH = int(os.getenv("INBOUND_NATIONAL_NUMBER_LENGTH", "10"))
+MAX_E164_DIGITS = 15
+
+DEFAULT_ROUTE = "*"
+RANGE_SEPARATOR = ".."
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_number(raw: str, partial: bool = False) -> str:
+    """
+    Return `raw` as "+<digits>". Raises ValueError if it has no usable digits.
+
+    With `partial` (prefixes), bare digits are taken to include the country
+    code, since their length says nothing about national vs. international.
+    """
+    text = raw.strip()
+    if text[:1] == "+" and text[1:].isdigit() and len(text) <= MAX_E164_DIGITS + 1:
+        return text  # already E.164, the usual case for SIP attributes
+    digits = _NON_DIGITS.sub("", text)
+    if not digits:
+        raise ValueError(f"Not a phone number: {raw!r}")
+    if text.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        digits = DEFAULT_COUNTRY_CODE + digits[1:]
+    elif not partial and len(digits) <= NATIONAL_NUMBER_LENGTH:
+        digits = DEFAULT_COUNTRY_CODE + digits
+    if not digits or len(digits) > MAX_E164_DIGITS:
+        raise ValueError(f"Not a phone number: {raw!r}")
+    return "+" + digits
+
+
+def normalize_route_key(key: str) -> str:
+    """Canonical form of a route key (see module docstring)."""
+    key = key.strip()
+    if key == DEFAULT_ROUTE:
+        return key
+    if RANGE_SEPARATOR in key:
+        low, _, high = key.partition(RANGE_SEPARATOR)
+        low, high = normalize_number(low), normalize_number(high)
+        if len(low) != len(high) or low > high:
+            raise ValueError(f"Range ends must have equal length and be ordered: {key!r}")
+        return f"{low}{RANGE_SEPARATOR}{high}"
+    if key.endswith("*"):
+        return normalize_number(key[:-1], partial=True) + "*"
+    return normalize_number(key)
+
+
+def range_to_prefixes(low: str, high: str) -> list[str]:
+    """Smallest set of prefixes covering the numbers low..high (same length)."""
+    width = len(low) - 1  # digits after "+"
+    start, end = int(low[1:]), int(high[1:])
+    prefixes = []
+    while start <= end:
+        # Widest aligned block starting at `start` that stays inside the range;
+        # keep at least one digit so a range never becomes the default route
+        k = 0
+        while k < width - 1 and start % 10 ** (k + 1) == 0 and start + 10 ** (k + 1) - 1 <= end:
+            k += 1
+        prefixes.append("+" + str(start).zfill(width)[: width - k])
+        start += 10**k
+    return prefixes
+
+
+class RoutingTable:
+    def __init__(self, exact: dict[str, str], prefixes: dict[str, str], default: str | None):
+        self.exact = exact
+        self.default = default
+        by_length: dict[int, dict[str, str]] = {}
+        for prefix, agent in prefixes.items():
+            by_length.setdefault(len(prefix), {})[prefix] = agent
+        # Longest first, for longest-prefix match. A number shorter than a
+        # prefix slices to itself and cannot match a longer key, so there is
+        # no length check in the loop.
+        self._probes = [
+            (length, by_length[length].get) for length in sorted(by_length, reverse=True)
+        ]
+        self.prefix_count = len(prefixes)
+
+    def lookup(self, number: str) -> str | None:
+        """Agent for an already-normalized number."""
+        agent = self.exact.get(number)
+        if agent is not None:
+            return agent
+        for length, get in self._probes:
+            agent = get(number[:length])
+            if agent is not None:
+                return agent
+        return self.default
+
+    def stats(self) -> dict:
+        return {
+            "exact": len(self.exact),
+            "prefixes": self.prefix_count,
+            "prefix_lengths": [length - 1 for length, _ in self._probes],
+            "default": self.default,
+        }
+
+
+def compile_routes(routes: dict[str, str]) -> RoutingTable:
+    """Build a RoutingTable from raw route keys; invalid keys are logged and skipped."""
+    exact: dict[str, str] = {}
+    prefixes: dict[str, str] = {}
+    default = None
+    for key, agent in routes.items():
+        try:
+            key = normalize_route_key(key)
+        except ValueError as e:
+            logger.warning(f"Skipping inbound route {key!r}: {e}")
+            continue
+        if key == DEFAULT_ROUTE:
+            default = agent
+        elif RANGE_SEPARATOR in key:
+            low, _, high = key.partition(RANGE_SEPARATOR)
+            for prefix in range_to_prefixes(low, high):
+                prefixes[prefix] = agent
+        elif key.endswith("*"):
+            prefixes[key[:-1]] = agent
+        else:
+            exact[key] = agent
+    return RoutingTable(exact, prefixes, default)
@@ -0,0 +1,234 @@
+"""
+Admission control for outbound calls, per SIP trunk.
+
+Each trunk gets a token bucket (calls per second with a burst allowance) and a
+cap on concurrent dials. Calls that cannot start right away wait in a bounded
+FIFO queue; callers get their queue position and an ETA back instead of an
+error. When the queue is full, submit() raises AdmissionQueueFull.
+
+Limits apply per process: with several gunicorn workers the trunk sees
+`workers * rate`, so size OUTBOUND_CALLS_PER_SECOND per worker.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+CALLS_PER_SECOND = float(os.getenv("OUTBOUND_CALLS_PER_SECOND", "2"))
+CALL_BURST = int(os.getenv("OUTBOUND_CALL_BURST", "5"))
+MAX_CONCURRENT_CALLS = int(os.getenv("OUTBOUND_MAX_CONCURRENT_CALLS", "10"))
+CALL_QUEUE_SIZE = int(os.getenv("OUTBOUND_CALL_QUEUE_SIZE", "500"))
+
+
+class AdmissionQueueFull(Exception):
+    def __init__(self, trunk_id: str, retry_after_seconds: float):
+        super().__init__(f"Outbound call queue for trunk {trunk_id} is full")
+        self.retry_after_seconds = retry_after_seconds
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def seconds_until_token(self) -> float:
+        self._refill()
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+@dataclass
+class Admission:
+    status: str  # "dialing" or "queued"
+    position: int
+    eta_seconds: float
+    task: asyncio.Task
+
+
+class TrunkAdmissionController:
+    def __init__(
+        self,
+        trunk_id: str,
+        calls_per_second: float = CALLS_PER_SECOND,
+        burst: int = CALL_BURST,
+        max_concurrent: int = MAX_CONCURRENT_CALLS,
+        max_queue: int = CALL_QUEUE_SIZE,
+    ):
+        self.trunk_id = trunk_id
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self._bucket = TokenBucket(calls_per_second, burst)
+        self._active = 0
+        self._queue: deque[asyncio.Future] = deque()
+        self._wakeup = asyncio.Event()
+        self._dispatcher: asyncio.Task | None = None
+        # Calls submitted and not finished; the request that submitted one
+        # may be gone, so the controller keeps them alive and logs failures
+        self._tasks: set[asyncio.Task] = set()
+        # Moving average of how long a dial holds its slot, for ETAs
+        self._avg_call_seconds = 2.0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def submit(self, job: Callable[[], Awaitable[Any]]) -> Admission:
+        """Start `job` now if the trunk has capacity, otherwise queue it."""
+        if not self._queue and self._try_grant():
+            task = self._track(self._run_granted(job))
+            return Admission(status="dialing", position=0, eta_seconds=0.0, task=task)
+
+        if len(self._queue) >= self.max_queue:
+            raise AdmissionQueueFull(self.trunk_id, self._eta(len(self._queue)))
+
+        ticket = self._enqueue()
+        position = len(self._queue)
+        task = self._track(self._run_when_granted(ticket, job))
+        return Admission(
+            status="queued", position=position, eta_seconds=self._eta(position), task=task
+        )
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait in line for a dial slot (for in-process callers such as campaigns)."""
+        if self._queue or not self._try_grant():
+            await self._wait_for_grant(self._enqueue())
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    def stats(self) -> dict:
+        return {
+            "trunk_id": self.trunk_id,
+            "active": self._active,
+            "queued": len(self._queue),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "avg_call_seconds": round(self._avg_call_seconds, 3),
+        }
+
+    def _track(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return task
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.error(
+                f"Outbound call failed on trunk {self.trunk_id}: {error}",
+                exc_info=(type(error), error, error.__traceback__),
+            )
+
+    def _try_grant(self) -> bool:
+        if self._active < self.max_concurrent and self._bucket.try_acquire():
+            self._active += 1
+            return True
+        return False
+
+    def _release(self, held_seconds: float) -> None:
+        self._active -= 1
+        if held_seconds > 0:
+            self._avg_call_seconds = 0.8 * self._avg_call_seconds + 0.2 * held_seconds
+        self._wakeup.set()
+
+    def _enqueue(self) -> asyncio.Future:
+        ticket = asyncio.get_running_loop().create_future()
+        self._queue.append(ticket)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+        self._wakeup.set()
+        return ticket
+
+    async def _wait_for_grant(self, ticket: asyncio.Future) -> None:
+        try:
+            await ticket
+        except asyncio.CancelledError:
+            # Granted just as the caller was cancelled: hand the slot back
+            if ticket.done() and not ticket.cancelled():
+                self._release(0.0)
+            raise
+
+    def _eta(self, position: int) -> float:
+        by_rate = position / self._bucket.rate
+        by_concurrency = math.ceil(position / self.max_concurrent) * self._avg_call_seconds
+        return round(max(by_rate, by_concurrency), 1)
+
+    async def _run_granted(self, job: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        try:
+            return await job()
+        finally:
+            self._release(time.monotonic() - started)
+
+    async def _run_when_granted(
+        self, ticket: asyncio.Future, job: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        await self._wait_for_grant(ticket)
+        return await self._run_granted(job)
+
+    async def _dispatch_loop(self) -> None:
+        while self._queue:
+            if self._active >= self.max_concurrent:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            wait = self._bucket.seconds_until_token()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            ticket = self._queue.popleft()
+            if ticket.done():
+                continue  # caller gave up while waiting
+            if self._try_grant():
+                ticket.set_result(None)
+            else:
+                self._queue.appendleft(ticket)
+
+
+_controllers: dict[str, TrunkAdmissionController] = {}
+
+
+def get_admission_controller(trunk_id: str) -> TrunkAdmissionController:
+    controller = _controllers.get(trunk_id)
+    if controller is None:
+        controller = TrunkAdmissionController(trunk_id)
+        _controllers[trunk_id] = controller
+    return controller
+
+
+def admission_stats() -> list[dict]:
+    return [controller.stats() for controller in _controllers.values()]
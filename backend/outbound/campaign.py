@@ -0,0 +1,390 @@
+"""
+Bulk outbound campaigns on top of outbound_call.make_call.
+
+A campaign is a list of numbers dialled with one agent type under a
+concurrency cap and a pacing rate (calls per minute). Busy and no-answer
+results and transient server errors are retried with exponential backoff
+up to `max_attempts`.
+
+Campaign and per-number state live in SQLite (WAL mode), so a restarted
+server resumes where it stopped. Gunicorn workers share the database; each
+running campaign is leased to one worker at a time, and a worker that dies
+loses its lease after LEASE_SECONDS so another worker picks the campaign up.
+"""
+
+import asyncio
+import csv
+import io
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable
+
+from livekit import api
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv(
+    "CAMPAIGN_DB_PATH", os.path.join(os.path.dirname(__file__), "campaigns.db")
+)
+LEASE_SECONDS = 30.0
+POLL_SECONDS = 2.0
+
+# SIP responses worth another attempt later. 603 Decline is the callee
+# rejecting the call, so it is final.
+RETRYABLE_SIP_CODES = {408, 480, 486, 487, 503, 600}
+# LiveKit errors that another attempt cannot fix: the request or our
+# credentials were refused. Anything else (unavailable, internal, ...) is
+# transient and retried.
+FINAL_ERROR_CODES = {
+    api.TwirpErrorCode.INVALID_ARGUMENT,
+    api.TwirpErrorCode.MALFORMED,
+    api.TwirpErrorCode.OUT_OF_RANGE,
+    api.TwirpErrorCode.PERMISSION_DENIED,
+    api.TwirpErrorCode.UNAUTHENTICATED,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id TEXT PRIMARY KEY,
+    agent_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    concurrency INTEGER NOT NULL,
+    calls_per_minute REAL NOT NULL,
+    max_attempts INTEGER NOT NULL,
+    retry_backoff_seconds REAL NOT NULL,
+    created_at REAL NOT NULL,
+    owner TEXT,
+    lease_expires REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS campaign_numbers (
+    campaign_id TEXT NOT NULL,
+    phone_number TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (campaign_id, phone_number)
+);
+CREATE INDEX IF NOT EXISTS idx_campaign_numbers_due
+    ON campaign_numbers (campaign_id, state, next_attempt_at);
+"""
+
+
+def parse_numbers_csv(content: str) -> list[str]:
+    """Read numbers from a CSV with a phone_number/phone column, or the first column."""
+    rows = list(csv.reader(io.StringIO(content)))
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    column = 0
+    for name in ("phone_number", "phone", "number"):
+        if name in header:
+            column = header.index(name)
+            rows = rows[1:]
+            break
+    return [row[column].strip() for row in rows if len(row) > column and row[column].strip()]
+
+
+class CampaignStore:
+    def __init__(self, path: str = DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def create_campaign(
+        self,
+        agent_type: str,
+        numbers: list[str],
+        concurrency: int,
+        calls_per_minute: float,
+        max_attempts: int,
+        retry_backoff_seconds: float,
+    ) -> str:
+        campaign_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO campaigns (id, agent_type, status, concurrency, calls_per_minute,"
+                " max_attempts, retry_backoff_seconds, created_at)"
+                " VALUES (?, ?, 'running', ?, ?, ?, ?, ?)",
+                (campaign_id, agent_type, concurrency, calls_per_minute,
+                 max_attempts, retry_backoff_seconds, now),
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO campaign_numbers"
+                " (campaign_id, phone_number, state, updated_at) VALUES (?, ?, 'pending', ?)",
+                ((campaign_id, number, now) for number in numbers),
+            )
+        return campaign_id
+
+    def get_campaign(self, campaign_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM campaigns WHERE id = ?", (campaign_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def set_status(self, campaign_id: str, status: str, from_statuses: tuple[str, ...]) -> bool:
+        placeholders = ",".join("?" * len(from_statuses))
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                f"UPDATE campaigns SET status = ? WHERE id = ? AND status IN ({placeholders})",
+                (status, campaign_id, *from_statuses),
+            )
+        return cur.rowcount > 0
+
+    def progress(self, campaign_id: str) -> dict | None:
+        campaign = self.get_campaign(campaign_id)
+        if campaign is None:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) AS n FROM campaign_numbers"
+                " WHERE campaign_id = ? GROUP BY state",
+                (campaign_id,),
+            ).fetchall()
+        counts = {row["state"]: row["n"] for row in rows}
+        return {
+            "campaign_id": campaign_id,
+            "agent_type": campaign["agent_type"],
+            "status": campaign["status"],
+            "total": sum(counts.values()),
+            "pending": counts.get("pending", 0),
+            "dialing": counts.get("dialing", 0),
+            "answered": counts.get("answered", 0),
+            "failed": counts.get("failed", 0),
+        }
+
+    def acquire_leases(self, owner: str) -> list[str]:
+        """Lease running campaigns that are free or whose lease ran out."""
+        now = time.time()
+        with self._lock, self._conn:
+            candidates = self._conn.execute(
+                "SELECT id, owner FROM campaigns WHERE status = 'running'"
+                " AND (owner IS NULL OR owner = ? OR lease_expires < ?)",
+                (owner, now),
+            ).fetchall()
+            acquired = []
+            for row in candidates:
+                # Re-check the lease in the UPDATE itself: another worker may
+                # have taken it between our SELECT and this write.
+                cur = self._conn.execute(
+                    "UPDATE campaigns SET owner = ?, lease_expires = ? WHERE id = ?"
+                    " AND (owner IS NULL OR owner = ? OR lease_expires < ?)",
+                    (owner, now + LEASE_SECONDS, row["id"], owner, now),
+                )
+                if cur.rowcount == 0:
+                    continue
+                if row["owner"] != owner:
+                    # Calls the previous owner had in flight have an unknown
+                    # outcome; put them back in the queue.
+                    self._conn.execute(
+                        "UPDATE campaign_numbers SET state = 'pending'"
+                        " WHERE campaign_id = ? AND state = 'dialing'",
+                        (row["id"],),
+                    )
+                acquired.append(row["id"])
+        return acquired
+
+    def renew_lease(self, campaign_id: str, owner: str) -> bool:
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "UPDATE campaigns SET lease_expires = ? WHERE id = ? AND owner = ?",
+                (time.time() + LEASE_SECONDS, campaign_id, owner),
+            )
+        return cur.rowcount > 0
+
+    def release_lease(self, campaign_id: str, owner: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE campaigns SET owner = NULL, lease_expires = 0 WHERE id = ? AND owner = ?",
+                (campaign_id, owner),
+            )
+
+    def claim_next(self, campaign_id: str) -> str | None:
+        """Move the next due number to 'dialing' and return it."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT phone_number FROM campaign_numbers"
+                " WHERE campaign_id = ? AND state = 'pending' AND next_attempt_at <= ?"
+                " ORDER BY next_attempt_at LIMIT 1",
+                (campaign_id, now),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE campaign_numbers SET state = 'dialing', attempts = attempts + 1,"
+                " updated_at = ? WHERE campaign_id = ? AND phone_number = ?",
+                (now, campaign_id, row["phone_number"]),
+            )
+        return row["phone_number"]
+
+    def record_result(
+        self,
+        campaign_id: str,
+        phone_number: str,
+        state: str,
+        error: str | None = None,
+        retry_at: float = 0,
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE campaign_numbers SET state = ?, last_error = ?, next_attempt_at = ?,"
+                " updated_at = ? WHERE campaign_id = ? AND phone_number = ?",
+                (state, error, retry_at, time.time(), campaign_id, phone_number),
+            )
+
+    def attempts(self, campaign_id: str, phone_number: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts FROM campaign_numbers WHERE campaign_id = ? AND phone_number = ?",
+                (campaign_id, phone_number),
+            ).fetchone()
+        return row["attempts"] if row else 0
+
+    def has_open_numbers(self, campaign_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM campaign_numbers WHERE campaign_id = ?"
+                " AND state IN ('pending', 'dialing') LIMIT 1",
+                (campaign_id,),
+            ).fetchone()
+        return row is not None
+
+
+DialFn = Callable[[str, str], Awaitable[None]]
+
+
+class CampaignManager:
+    """Runs the campaigns this worker holds a lease on."""
+
+    def __init__(self, store: CampaignStore, dial: DialFn):
+        self.store = store
+        self._dial = dial
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._runners: dict[str, asyncio.Task] = {}
+        self._loop_task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._loop_task = asyncio.create_task(self._lease_loop())
+
+    async def stop(self) -> None:
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+        runners = list(self._runners.values())
+        for task in runners:
+            task.cancel()
+        await asyncio.gather(*runners, return_exceptions=True)
+
+    async def _lease_loop(self) -> None:
+        while True:
+            try:
+                acquired = await asyncio.to_thread(self.store.acquire_leases, self._owner)
+                for campaign_id in acquired:
+                    if campaign_id not in self._runners:
+                        logger.info(f"Running campaign {campaign_id}")
+                        task = asyncio.create_task(self._run(campaign_id))
+                        self._runners[campaign_id] = task
+                        task.add_done_callback(
+                            lambda _, cid=campaign_id: self._runners.pop(cid, None)
+                        )
+            except Exception as e:
+                logger.error(f"Campaign lease loop failed: {e}", exc_info=True)
+            await asyncio.sleep(POLL_SECONDS)
+
+    async def _run(self, campaign_id: str) -> None:
+        in_flight: set[asyncio.Task] = set()
+        next_dial_at = 0.0
+        try:
+            while True:
+                campaign = await asyncio.to_thread(self.store.get_campaign, campaign_id)
+                if campaign is None or campaign["status"] != "running":
+                    break
+                if not await asyncio.to_thread(self.store.renew_lease, campaign_id, self._owner):
+                    logger.warning(f"Lost lease on campaign {campaign_id}")
+                    break
+
+                if len(in_flight) >= campaign["concurrency"]:
+                    await asyncio.wait(in_flight, timeout=POLL_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+
+                # Pacing: space dial starts evenly at calls_per_minute
+                delay = next_dial_at - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(min(delay, POLL_SECONDS))
+                    continue
+
+                phone_number = await asyncio.to_thread(self.store.claim_next, campaign_id)
+                if phone_number is None:
+                    if not in_flight and not await asyncio.to_thread(
+                        self.store.has_open_numbers, campaign_id
+                    ):
+                        await asyncio.to_thread(
+                            self.store.set_status, campaign_id, "completed", ("running",)
+                        )
+                        logger.info(f"Campaign {campaign_id} completed")
+                        break
+                    await asyncio.sleep(POLL_SECONDS)
+                    continue
+
+                next_dial_at = time.monotonic() + 60.0 / campaign["calls_per_minute"]
+                task = asyncio.create_task(self._dial_number(campaign, phone_number))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+
+            # Paused or lost the lease: let in-flight calls finish recording,
+            # keeping the lease so no other worker redials them meanwhile
+            while in_flight:
+                await asyncio.wait(in_flight, timeout=POLL_SECONDS)
+                await asyncio.to_thread(self.store.renew_lease, campaign_id, self._owner)
+        finally:
+            await asyncio.to_thread(self.store.release_lease, campaign_id, self._owner)
+
+    async def _dial_number(self, campaign: dict, phone_number: str) -> None:
+        campaign_id = campaign["id"]
+        try:
+            await self._dial(phone_number, campaign["agent_type"])
+            await asyncio.to_thread(
+                self.store.record_result, campaign_id, phone_number, "answered"
+            )
+            return
+        except api.SipCallError as e:
+            sip_code = e.sip_status_code
+            if sip_code is not None:
+                retryable = sip_code in RETRYABLE_SIP_CODES
+            else:
+                retryable = e.code not in FINAL_ERROR_CODES
+            error = str(e)
+        except api.TwirpError as e:
+            retryable = e.code not in FINAL_ERROR_CODES
+            error = str(e)
+        except ValueError as e:
+            # Rejected by validation (bad number, trunk not configured)
+            retryable = False
+            error = str(e)
+        except Exception as e:
+            retryable = True
+            error = str(e)
+
+        attempts = await asyncio.to_thread(self.store.attempts, campaign_id, phone_number)
+        if retryable and attempts < campaign["max_attempts"]:
+            backoff = campaign["retry_backoff_seconds"] * 2 ** (attempts - 1)
+            logger.info(f"Campaign {campaign_id}: {phone_number} failed ({error}), retry in {backoff:.0f}s")
+            await asyncio.to_thread(
+                self.store.record_result, campaign_id, phone_number, "pending",
+                error, time.time() + backoff,
+            )
+        else:
+            logger.info(f"Campaign {campaign_id}: {phone_number} failed ({error}), giving up")
+            await asyncio.to_thread(
+                self.store.record_result, campaign_id, phone_number, "failed", error
+            )
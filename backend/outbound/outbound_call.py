@@ -2,10 +2,16 @@ import asyncio
 import json
 import os
 import logging
+import re
 import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Awaitable
 from dotenv import load_dotenv
 from livekit import api
-import random
+
+from utils.metrics import observe_livekit_call
+from utils.room_names import RoomNameGenerator
 
 load_dotenv(override=True)
 
@@ -16,50 +22,185 @@ room_name = "outbound-call"
 outbound_trunk_id = os.getenv("SIP_OUTBOUND_TRUNK_ID_TWILIO")
 # outbound_trunk_id = os.getenv("SIP_OUTBOUND_TRUNK_ID_EXOTEL")
 
-async def make_call(phone_number: str, agent_type: str = "invoice"):
-    """Create a dispatch and add a SIP participant to call the phone number"""
-    lkapi = api.LiveKitAPI()
-    
-    # Ensure unique room name
-    unique_room_name = f"{room_name}-{phone_number[-4:]}-{random.randint(1000, 9999)}"
-    
-    metadata = json.dumps({"agent": agent_type, "phone": phone_number, "call_type": "outbound"})
-    
-    logger.info(f"Creating dispatch for agent {agent_type} in room {unique_room_name} trunk id {outbound_trunk_id}")
-    dispatch = await lkapi.agent_dispatch.create_dispatch(
-        api.CreateAgentDispatchRequest(
-            agent_name=agent_type, room=unique_room_name, metadata=metadata
-        )
-    )
-    logger.info(f"Created dispatch: {dispatch}")
+room_name_generator = RoomNameGenerator()
+
+PHONE_NUMBER_PATTERN = re.compile(r"^\+?[0-9]{6,15}$")
+# How often to look for the SIP participant while waiting for an answer
+SIP_POLL_SECONDS = 0.25
+SIP_PARTICIPANT_IDENTITY = "phone_user"
+
 
+@dataclass
+class CallHandle:
+    """Outcome of make_call, with where the time went, from the start of the call.
+
+    dispatch_ms: until the agent dispatch was created
+    dial_ms:     until the SIP participant was in the room, i.e. the phone
+                 started ringing
+    answer_ms:   until the callee picked up. Only with wait_until_answered;
+                 otherwise make_call returns while the phone is ringing and
+                 no answer time is reported
+    """
+    room_name: str
+    phone_number: str
+    agent_type: str
+    dispatch_id: str
+    participant_identity: str
+    sip_call_id: str
+    dispatch_ms: float
+    dial_ms: float
+    answer_ms: float | None
+    total_ms: float
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def validate_call_request(phone_number: str, agent_type: str) -> None:
+    """Raise ValueError for anything that would make the call fail later."""
     if not outbound_trunk_id or not outbound_trunk_id.startswith("ST_"):
-        logger.error("SIP_OUTBOUND_TRUNK_ID is not set or invalid")
-        await lkapi.aclose()
-        return
+        raise ValueError("SIP_OUTBOUND_TRUNK_ID is not set or invalid")
+    if not PHONE_NUMBER_PATTERN.match(phone_number or ""):
+        raise ValueError(f"Invalid phone number: {phone_number!r}")
+    if not agent_type:
+        raise ValueError("agent_type is required")
+
+
+async def make_call(
+    phone_number: str,
+    agent_type: str = "invoice",
+    lkapi: api.LiveKitAPI | None = None,
+    wait_until_answered: bool = False,
+) -> CallHandle:
+    """Dispatch an agent and dial the phone number into the same room.
+
+    Both requests are issued concurrently, so the agent warms up while the
+    phone rings. If either fails, the room is deleted so neither a lone agent
+    nor an agent-less call is left behind, and the error is raised.
 
-    logger.info(f"Dialing {phone_number} to room {unique_room_name}")
+    Pass the server's shared client as `lkapi` to reuse its pooled connections;
+    without one, a client is created for this call and closed afterwards.
+    With `wait_until_answered`, returns once the callee picks up and raises
+    `api.TwirpError` carrying the SIP status (busy, no answer, ...) otherwise.
+    """
+    validate_call_request(phone_number, agent_type)
 
+    owns_client = lkapi is None
+    if owns_client:
+        lkapi = api.LiveKitAPI()
     try:
-        sip_participant = await lkapi.sip.create_sip_participant(
-            api.CreateSIPParticipantRequest(
-                room_name=unique_room_name,
-                sip_trunk_id=outbound_trunk_id,
-                sip_call_to=phone_number,
-                participant_identity="phone_user",
-                participant_metadata=metadata,
-                krisp_enabled=True
-            )
-        )
-        logger.info(f"Created SIP participant: {sip_participant}")
-    except Exception as e:
-        logger.error(f"Error creating SIP participant: {e}")
-
-    await lkapi.aclose()
+        return await _dial(lkapi, phone_number, agent_type, wait_until_answered)
+    finally:
+        if owns_client:
+            await lkapi.aclose()
+
+
+async def _timed(call: str, coro: Awaitable) -> tuple[object, float]:
+    started = time.perf_counter()
+    with observe_livekit_call(call):
+        result = await coro
+    return result, (time.perf_counter() - started) * 1000
+
+
+async def _wait_for_sip_participant(lkapi: api.LiveKitAPI, room: str) -> float:
+    """Milliseconds until the SIP participant shows up in `room`."""
+    started = time.perf_counter()
+    while True:
+        try:
+            with observe_livekit_call("list_participants"):
+                res = await lkapi.room.list_participants(api.ListParticipantsRequest(room=room))
+            if any(p.identity == SIP_PARTICIPANT_IDENTITY for p in res.participants):
+                return (time.perf_counter() - started) * 1000
+        except Exception as e:
+            # The room may not exist yet; a failed poll only costs precision
+            logger.debug(f"Could not list participants of {room}: {e}")
+        await asyncio.sleep(SIP_POLL_SECONDS)
+
+
+async def _dial(
+    lkapi: api.LiveKitAPI, phone_number: str, agent_type: str, wait_until_answered: bool
+) -> CallHandle:
+    started = time.perf_counter()
+    unique_room_name = room_name_generator.generate(f"{room_name}-{phone_number[-4:]}")
+    metadata = json.dumps({"agent": agent_type, "phone": phone_number, "call_type": "outbound"})
+
+    logger.info(
+        f"Dispatching agent {agent_type} and dialing {phone_number} in room {unique_room_name} trunk id {outbound_trunk_id}"
+    )
+    # A dial that waits for an answer only returns once the callee picks up,
+    # so when ringing started is taken from the room instead
+    ringing = (
+        asyncio.create_task(_wait_for_sip_participant(lkapi, unique_room_name))
+        if wait_until_answered
+        else None
+    )
+    dispatch_res, dial_res = await asyncio.gather(
+        _timed(
+            "create_dispatch",
+            lkapi.agent_dispatch.create_dispatch(
+                api.CreateAgentDispatchRequest(
+                    agent_name=agent_type, room=unique_room_name, metadata=metadata
+                )
+            ),
+        ),
+        _timed(
+            "create_sip_participant",
+            lkapi.sip.create_sip_participant(
+                api.CreateSIPParticipantRequest(
+                    room_name=unique_room_name,
+                    sip_trunk_id=outbound_trunk_id,
+                    sip_call_to=phone_number,
+                    participant_identity=SIP_PARTICIPANT_IDENTITY,
+                    participant_metadata=metadata,
+                    krisp_enabled=True,
+                    wait_until_answered=wait_until_answered,
+                )
+            ),
+        ),
+        return_exceptions=True,
+    )
+    if ringing is not None and not ringing.done():
+        ringing.cancel()
+
+    errors = [res for res in (dispatch_res, dial_res) if isinstance(res, BaseException)]
+    if errors:
+        for error in errors:
+            logger.error(f"Error placing call to {phone_number}: {error}")
+        try:
+            with observe_livekit_call("delete_room"):
+                await lkapi.room.delete_room(api.DeleteRoomRequest(room=unique_room_name))
+        except Exception as e:
+            logger.warning(f"Could not clean up room {unique_room_name}: {e}")
+        raise errors[-1]  # the dial error when both failed
+
+    dispatch, dispatch_ms = dispatch_res
+    sip_participant, dial_ms = dial_res
+    answer_ms = None
+    if ringing is not None:
+        answer_ms = dial_ms
+        # Not seen ringing before the answer: at most the answer time
+        dial_ms = ringing.result() if ringing.done() and not ringing.cancelled() else answer_ms
+    handle = CallHandle(
+        room_name=unique_room_name,
+        phone_number=phone_number,
+        agent_type=agent_type,
+        dispatch_id=dispatch.id,
+        participant_identity=sip_participant.participant_identity,
+        sip_call_id=sip_participant.sip_call_id,
+        dispatch_ms=round(dispatch_ms, 1),
+        dial_ms=round(dial_ms, 1),
+        answer_ms=round(answer_ms, 1) if answer_ms is not None else None,
+        total_ms=round((time.perf_counter() - started) * 1000, 1),
+    )
+    logger.info(
+        f"Call placed | room={handle.room_name} | dispatch_ms={handle.dispatch_ms}"
+        f" | dial_ms={handle.dial_ms} | answer_ms={handle.answer_ms} | total_ms={handle.total_ms}"
+    )
+    return handle
 
 async def main():
     if len(sys.argv) < 2:
-        print("Usage: python outbound_call.py <phone_number> [agent_type]")
+        print("Usage: python -m outbound.outbound_call <phone_number> [agent_type]")
         # For testing defaults if run without args
         # await make_call("+918697421450", "invoice") 
         return
@@ -67,7 +208,8 @@ async def main():
     phone_number = sys.argv[1]
     agent_type = sys.argv[2] if len(sys.argv) > 2 else "invoice"
     
-    await make_call(phone_number, agent_type)
+    handle = await make_call(phone_number, agent_type)
+    print(json.dumps(handle.to_dict(), indent=2))
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,9 +1,13 @@
 import chromadb
 import aiohttp
+import os
 import uuid
 import re
 from bs4 import BeautifulSoup
 
+from agents.web.bm25 import INDEX_FILENAME, BM25Index
+from agents.web.retrieval import collection_version
+
 class ScrapeANDSave:
     def __init__(self):
         self.chroma_client = chromadb.PersistentClient(path="./vector_db")
@@ -192,6 +196,11 @@ class ScrapeANDSave:
             else:
                 summary['failed'] += 1
 
+        # Rebuild the keyword index from every chunk now in the collection
+        keyword_index = BM25Index.from_collection(self.collection, version=collection_version("./vector_db"))
+        keyword_index.save(os.path.join("./vector_db", INDEX_FILENAME))
+        print(f"Keyword index: {len(keyword_index)} chunks, {keyword_index.terms} terms")
+
         return summary
 
 if __name__ == "__main__":
@@ -1,20 +1,47 @@
 import os
-import uuid
 import logging
+import asyncio
 import json
-from typing import Optional 
+import time
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import Optional
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, Query, HTTPException, Body
+from fastapi import FastAPI, Query, HTTPException, Body, Request, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse, JSONResponse
+from fastapi.responses import PlainTextResponse, JSONResponse, Response, StreamingResponse
 from livekit import api as lk_api
-from livekit.api import LiveKitAPI, ListRoomsRequest
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # Import the outbound call function
-from outbound.outbound_call import make_call
-from inbound.config_manager import set_agent_for_number, get_agent_for_number
+from outbound.outbound_call import make_call, outbound_trunk_id, validate_call_request
+from outbound.admission import AdmissionQueueFull, admission_stats, get_admission_controller
+from outbound.campaign import CampaignManager, CampaignStore, parse_numbers_csv
+from inbound.config_manager import (
+    export_inbound_routes,
+    get_agent_for_number,
+    route_store,
+    set_agent_for_number,
+    set_agents_for_numbers,
+)
+from utils.livekit_client import (
+    check_livekit_api,
+    close_livekit_api,
+    get_livekit_api,
+    open_livekit_api,
+)
+from utils.metrics import (
+    REQUEST_ERRORS,
+    REQUEST_LATENCY,
+    REQUESTS_IN_FLIGHT,
+    TOKEN_MINT_LATENCY,
+    render_metrics,
+    route_label,
+)
+from utils.room_names import RoomNameGenerator
+from utils.token_cache import TokenCache
+from utils.warm_room_pool import WarmRoomPool, parse_pool_targets
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,7 +49,23 @@ logger = logging.getLogger(__name__)
 
 load_dotenv(override=True)
 
-app = FastAPI(title="LiveKit Token Server")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled LiveKitAPI client per worker, shared by every route
+    await open_livekit_api()
+    # Compiled before the first /api/getInboundAgent instead of during it
+    await asyncio.to_thread(route_store.load)
+    await room_pool.start()
+    await campaign_manager.start()
+    try:
+        yield
+    finally:
+        await campaign_manager.stop()
+        await room_pool.stop()
+        await close_livekit_api()
+
+
+app = FastAPI(title="LiveKit Token Server", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,52 +75,70 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    route = route_label(request.url.path)
+    in_flight = REQUESTS_IN_FLIGHT.labels(route=route)
+    in_flight.inc()
+    started = time.perf_counter()
+    status = "exception"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        in_flight.dec()
+        REQUEST_LATENCY.labels(route=route, method=request.method, status=status).observe(
+            time.perf_counter() - started
+        )
+        if status == "exception" or int(status) >= 400:
+            REQUEST_ERRORS.labels(route=route, kind=status).inc()
+
 ## The agent currently supported
 ALLOWED_AGENTS = {"web", "invoice", "restaurant", "bank", "tour", "realestate","distributor","bandhan_banking"}
 
-async def get_rooms() -> list[str]:
-    logger.info("Starting get_rooms")
-    client = LiveKitAPI()
-    try:
-        rooms = await client.room.list_rooms(ListRoomsRequest())
-        logger.info(f"Retrieved rooms: {[room.name for room in rooms.rooms]}")
-        return [room.name for room in rooms.rooms]
-    except Exception as e:
-        logger.error(f"Error in get_rooms: {e}", exc_info=True)
-        return []
-    finally:
-        await client.aclose()
-        logger.info("Closed LiveKitAPI client in get_rooms")
+# Unique by construction (timestamp + worker tag + sequence), so token
+# issuance does not need to list the rooms on the LiveKit server.
+room_name_generator = RoomNameGenerator()
 
 
-async def generate_room_name(agent: str) -> str:
+def generate_room_name(agent: str) -> str:
     """
     Generate a unique room per user, namespaced by agent.
-    Example: web-a1b2c3d4
+    Example: web-m2k9x1c4a7f0
     """
-    while True:
-        room_name = f"{agent}-{uuid.uuid4().hex[:8]}"
-        existing_rooms = await get_rooms()
-        if room_name not in existing_rooms:
-            return room_name
+    return room_name_generator.generate(agent)
 
 
-@app.get("/api/getToken", response_class=PlainTextResponse)
-async def get_token(name: str = Query("guest"), agent: str = Query("web") ,room: Optional[str] = Query(None)):
-    logger.info(f"Received getToken request: name={name}, room={room}, agent={agent}")
-    
-    # Validation for each agent
-    if agent not in ALLOWED_AGENTS:
-        return "Invalid agent"
-    if not room:
-        room = await generate_room_name(agent=agent)
+# Rooms with an agent already joined and warm, e.g. WARM_ROOM_POOL="web=2"
+room_pool = WarmRoomPool(
+    targets=parse_pool_targets(os.getenv("WARM_ROOM_POOL")),
+    get_client=get_livekit_api,
+    room_name_fn=generate_room_name,
+    max_idle_seconds=float(os.getenv("WARM_ROOM_MAX_IDLE_SECONDS", "600")),
+    join_timeout_seconds=float(os.getenv("WARM_ROOM_JOIN_TIMEOUT_SECONDS", "120")),
+)
 
-    try:
+
+TOKEN_TTL_SECONDS = int(os.getenv("TOKEN_TTL_SECONDS", str(6 * 3600)))
+MAX_BULK_TOKENS = int(os.getenv("MAX_BULK_TOKENS", "500"))
+
+# Signed tokens reused for repeat (identity, agent, room) requests
+token_cache = TokenCache(
+    max_entries=int(os.getenv("TOKEN_CACHE_SIZE", "10000")),
+    ttl_seconds=TOKEN_TTL_SECONDS,
+    safety_margin_seconds=int(os.getenv("TOKEN_CACHE_MARGIN_SECONDS", "300")),
+)
+
+
+def mint_token(name: str, agent: str, room: str) -> str:
+    with TOKEN_MINT_LATENCY.time():
         token = (
             lk_api.AccessToken(os.getenv("LIVEKIT_API_KEY"), os.getenv("LIVEKIT_API_SECRET"))
             .with_identity(name)
             .with_name(name)
             .with_metadata(json.dumps({"agent": agent}))
+            .with_ttl(timedelta(seconds=TOKEN_TTL_SECONDS))
             .with_grants(
                 lk_api.VideoGrants(
                     room_join=True,
@@ -85,14 +146,70 @@ async def get_token(name: str = Query("guest"), agent: str = Query("web") ,room:
                 )
             )
         )
-        jwt = token.to_jwt()
+        return token.to_jwt()
+
+
+def issue_token(name: str, agent: str, room: Optional[str]) -> tuple[str, str]:
+    """Return (room, jwt). Tokens for an explicit room go through the cache;
+    freshly generated rooms are never requested twice, so they skip it."""
+    if not room:
+        room = room_pool.acquire(agent) or generate_room_name(agent=agent)
+        return room, mint_token(name, agent, room)
+    return room, token_cache.get_or_mint(name, agent, room, lambda: mint_token(name, agent, room))
+
+
+@app.get("/api/getToken", response_class=PlainTextResponse)
+async def get_token(name: str = Query("guest"), agent: str = Query("web") ,room: Optional[str] = Query(None)):
+    logger.info(f"Received getToken request: name={name}, room={room}, agent={agent}")
+    
+    # Validation for each agent
+    if agent not in ALLOWED_AGENTS:
+        return "Invalid agent"
+
+    try:
+        room, jwt = issue_token(name, agent, room)
         logger.info(f"JWT issued | room={room} | agent={agent}")
         return jwt
     except Exception as e:
         logger.error(f"Error generating JWT: {e}", exc_info=True)
+        REQUEST_ERRORS.labels(route="/api/getToken", kind="token").inc()
         return "Error generating token."
 
 
+# BULK TOKENS (kiosks and load tests)
+class BulkTokenRequest(BaseModel):
+    name: str = "guest"
+    agent: str = "web"
+    room: Optional[str] = None
+    count: int = Field(1, ge=1)
+
+@app.post("/api/getToken/bulk")
+async def get_tokens_bulk(request: BulkTokenRequest):
+    logger.info(f"Received bulk getToken request: {request}")
+
+    if request.agent not in ALLOWED_AGENTS:
+        raise HTTPException(status_code=400, detail=f"Invalid agent type: {request.agent}. Allowed: {ALLOWED_AGENTS}")
+    if request.count > MAX_BULK_TOKENS:
+        raise HTTPException(status_code=400, detail=f"count must be at most {MAX_BULK_TOKENS}")
+
+    tokens = []
+    try:
+        for i in range(1, request.count + 1):
+            identity = f"{request.name}-{i}"
+            room, jwt = issue_token(identity, request.agent, request.room)
+            tokens.append({"identity": identity, "room": room, "token": jwt})
+    except Exception as e:
+        logger.error(f"Error generating JWT: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error generating token.")
+
+    logger.info(f"Bulk JWTs issued | count={len(tokens)} | agent={request.agent}")
+    return JSONResponse(content={"tokens": tokens})
+
+@app.get("/api/getToken/stats")
+async def get_token_stats():
+    return JSONResponse(content={**token_cache.stats(), "warm_rooms": room_pool.stats()})
+
+
 # Pssword check
 @app.get("/api/checkPassword", response_class=PlainTextResponse)
 async def check_password(password: str = Query("guest")):
@@ -112,14 +229,159 @@ async def trigger_outbound_call(request: OutboundCallRequest):
     
     if request.agent_type not in ALLOWED_AGENTS:
         raise HTTPException(status_code=400, detail=f"Invalid agent type: {request.agent_type}. Allowed: {ALLOWED_AGENTS}")
-        
     try:
-        await make_call(request.phone_number, request.agent_type)
-        return JSONResponse(content={"status": "success", "message": f"Verified call initiation for {request.phone_number} with agent {request.agent_type}"})
+        validate_call_request(request.phone_number, request.agent_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Per-trunk rate limit and concurrency cap; overflow waits in a bounded queue
+    controller = get_admission_controller(outbound_trunk_id or "default")
+    try:
+        admission = controller.submit(
+            lambda: make_call(request.phone_number, request.agent_type, lkapi=get_livekit_api())
+        )
+    except AdmissionQueueFull as e:
+        logger.warning(f"Outbound call rejected: {e}")
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, int(e.retry_after_seconds)))},
+        )
+
+    if admission.status == "queued":
+        logger.info(f"Outbound call queued at position {admission.position} (eta {admission.eta_seconds}s)")
+        return JSONResponse(
+            status_code=202,
+            content={
+                "status": "queued",
+                "message": f"Call to {request.phone_number} queued with agent {request.agent_type}",
+                "queue_position": admission.position,
+                "eta_seconds": admission.eta_seconds,
+            },
+        )
+
+    try:
+        # Shielded: a client hanging up does not abort a dial already under way
+        handle = await asyncio.shield(admission.task)
+        return JSONResponse(content={"status": "success", "message": f"Verified call initiation for {request.phone_number} with agent {request.agent_type}", "call": handle.to_dict()})
     except Exception as e:
         logger.error(f"Failed to initiate outbound call: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/makeCall/stats")
+async def get_make_call_stats():
+    return JSONResponse(content={"trunks": admission_stats()})
+
+# OUTBOUND CAMPAIGNS
+async def dial_campaign_number(phone_number: str, agent_type: str):
+    # Campaign calls share the trunk's rate limit and concurrency cap with /api/makeCall
+    controller = get_admission_controller(outbound_trunk_id or "default")
+    async with controller.slot():
+        await make_call(phone_number, agent_type, lkapi=get_livekit_api(), wait_until_answered=True)
+
+campaign_store = CampaignStore()
+campaign_manager = CampaignManager(campaign_store, dial=dial_campaign_number)
+
+class CampaignRequest(BaseModel):
+    agent_type: str = "invoice"
+    numbers: list[str]
+    concurrency: int = Field(5, ge=1, le=200)
+    calls_per_minute: float = Field(30, gt=0)
+    max_attempts: int = Field(3, ge=1, le=10)
+    retry_backoff_seconds: float = Field(300, ge=0)
+
+async def _create_campaign(request: CampaignRequest) -> JSONResponse:
+    if request.agent_type not in ALLOWED_AGENTS:
+        raise HTTPException(status_code=400, detail=f"Invalid agent type: {request.agent_type}. Allowed: {ALLOWED_AGENTS}")
+    if not outbound_trunk_id or not outbound_trunk_id.startswith("ST_"):
+        raise HTTPException(status_code=400, detail="SIP_OUTBOUND_TRUNK_ID is not set or invalid")
+    numbers = [number.strip() for number in request.numbers if number.strip()]
+    if not numbers:
+        raise HTTPException(status_code=400, detail="No phone numbers given")
+
+    campaign_id = await asyncio.to_thread(
+        campaign_store.create_campaign,
+        agent_type=request.agent_type,
+        numbers=numbers,
+        concurrency=request.concurrency,
+        calls_per_minute=request.calls_per_minute,
+        max_attempts=request.max_attempts,
+        retry_backoff_seconds=request.retry_backoff_seconds,
+    )
+    logger.info(f"Created campaign {campaign_id} with {len(numbers)} numbers for agent {request.agent_type}")
+    return JSONResponse(content=await asyncio.to_thread(campaign_store.progress, campaign_id))
+
+@app.post("/api/campaigns")
+async def create_campaign(request: CampaignRequest):
+    return await _create_campaign(request)
+
+@app.post("/api/campaigns/upload")
+async def upload_campaign(
+    file: UploadFile = File(...),
+    agent_type: str = Form("invoice"),
+    concurrency: int = Form(5),
+    calls_per_minute: float = Form(30),
+    max_attempts: int = Form(3),
+    retry_backoff_seconds: float = Form(300),
+):
+    content = (await file.read()).decode("utf-8-sig", errors="ignore")
+    if (file.filename or "").lower().endswith(".json"):
+        try:
+            numbers = json.loads(content)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Invalid JSON file")
+        if not isinstance(numbers, list):
+            raise HTTPException(status_code=400, detail="JSON file must contain a list of numbers")
+        numbers = [str(number) for number in numbers]
+    else:
+        numbers = parse_numbers_csv(content)
+
+    return await _create_campaign(
+        CampaignRequest(
+            agent_type=agent_type,
+            numbers=numbers,
+            concurrency=concurrency,
+            calls_per_minute=calls_per_minute,
+            max_attempts=max_attempts,
+            retry_backoff_seconds=retry_backoff_seconds,
+        )
+    )
+
+@app.post("/api/campaigns/{campaign_id}/pause")
+async def pause_campaign(campaign_id: str):
+    if not await asyncio.to_thread(campaign_store.set_status, campaign_id, "paused", ("running",)):
+        raise HTTPException(status_code=404, detail="No running campaign with that id")
+    return JSONResponse(content=await asyncio.to_thread(campaign_store.progress, campaign_id))
+
+@app.post("/api/campaigns/{campaign_id}/resume")
+async def resume_campaign(campaign_id: str):
+    if not await asyncio.to_thread(campaign_store.set_status, campaign_id, "running", ("paused",)):
+        raise HTTPException(status_code=404, detail="No paused campaign with that id")
+    return JSONResponse(content=await asyncio.to_thread(campaign_store.progress, campaign_id))
+
+@app.get("/api/campaigns/{campaign_id}")
+async def get_campaign(campaign_id: str):
+    progress = await asyncio.to_thread(campaign_store.progress, campaign_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return JSONResponse(content=progress)
+
+@app.get("/api/campaigns/{campaign_id}/progress")
+async def stream_campaign_progress(campaign_id: str, interval: float = Query(2.0, ge=0.5)):
+    if await asyncio.to_thread(campaign_store.get_campaign, campaign_id) is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+
+    # Server-sent events until the campaign completes
+    async def events():
+        while True:
+            progress = await asyncio.to_thread(campaign_store.progress, campaign_id)
+            yield f"data: {json.dumps(progress)}\n\n"
+            if progress is None or progress["status"] == "completed":
+                return
+            await asyncio.sleep(interval)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 class InboundAgentRequest(BaseModel):
     phone_number: str
     agent_type: str
@@ -131,7 +393,10 @@ async def set_inbound_agent(request: InboundAgentRequest):
     if request.agent_type not in ALLOWED_AGENTS:
         raise HTTPException(status_code=400, detail=f"Invalid agent type: {request.agent_type}. Allowed: {ALLOWED_AGENTS}")
     
-    set_agent_for_number(request.phone_number, request.agent_type)
+    try:
+        await asyncio.to_thread(set_agent_for_number, request.phone_number, request.agent_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return JSONResponse(content={"status": "success", "message": f"Linked {request.phone_number} to agent {request.agent_type}"})
 
 @app.get("/api/getInboundAgent")
@@ -139,10 +404,47 @@ async def get_inbound_agent(phone_number: str = Query(...)):
     mapped_agent = get_agent_for_number(phone_number)
     return JSONResponse(content={"phone_number": phone_number, "agent_type": mapped_agent})
 
+class BulkInboundAgentRequest(BaseModel):
+    mappings: list[InboundAgentRequest]
+
+@app.post("/api/inboundAgents/bulk")
+async def set_inbound_agents_bulk(request: BulkInboundAgentRequest):
+    logger.info(f"Received bulk inbound agent import: {len(request.mappings)} mappings")
+
+    invalid = sorted({m.agent_type for m in request.mappings if m.agent_type not in ALLOWED_AGENTS})
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid agent types: {invalid}. Allowed: {ALLOWED_AGENTS}")
+
+    mappings = {m.phone_number: m.agent_type for m in request.mappings}
+    try:
+        written = await asyncio.to_thread(set_agents_for_numbers, mappings)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse(content={"status": "success", "count": written})
+
+@app.get("/api/inboundAgents/bulk")
+async def get_inbound_agents_bulk():
+    routes = await asyncio.to_thread(export_inbound_routes)
+    return JSONResponse(content={
+        "count": len(routes),
+        "mappings": [{"phone_number": n, "agent_type": a} for n, a in sorted(routes.items())],
+    })
+
+@app.get("/metrics")
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/health", response_class=PlainTextResponse)
 async def health():
     return "ok"
 
+@app.get("/health/livekit", response_class=PlainTextResponse)
+async def health_livekit():
+    if not await check_livekit_api():
+        raise HTTPException(status_code=503, detail="LiveKit API unreachable")
+    return "ok"
+
 
 if __name__ == "__main__":
     import uvicorn
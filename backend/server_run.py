@@ -1,10 +1,22 @@
 # server_run.py
 import os
+import shutil
+import tempfile
 
 def main():
 
     port = os.getenv("PORT", "8000")
 
+    # Workers write Prometheus samples here; /metrics aggregates them.
+    # Start from an empty directory so counters from a previous run are dropped.
+    metrics_dir = os.getenv(
+        "PROMETHEUS_MULTIPROC_DIR",
+        os.path.join(tempfile.gettempdir(), "token_server_metrics"),
+    )
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
     cmd = [
         "gunicorn",
         "server:app",                     # your ASGI/FastAPI app
@@ -16,6 +28,7 @@ def main():
         "--timeout", "120",  # TTS can be slow
         "--max-requests", "1000",  # Restart workers to prevent memory leaks
         "--max-requests-jitter", "100",
+        "--config", os.path.join(os.path.dirname(os.path.abspath(__file__)), "gunicorn_conf.py"),
     ]
 
     # Replace current process with Gunicorn
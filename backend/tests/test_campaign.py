@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+from livekit import api
+
+from outbound.campaign import CampaignManager, CampaignStore
+
+
+class CampaignRetryTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = CampaignStore(os.path.join(self.tmp.name, "campaigns.db"))
+        self.campaign_id = self.store.create_campaign(
+            agent_type="invoice",
+            numbers=["+15550001"],
+            concurrency=1,
+            calls_per_minute=60,
+            max_attempts=3,
+            retry_backoff_seconds=60,
+        )
+
+    async def asyncTearDown(self):
+        self.tmp.cleanup()
+
+    async def _dial_failing_with(self, error: Exception) -> dict:
+        async def dial(phone_number: str, agent_type: str) -> None:
+            raise error
+
+        manager = CampaignManager(self.store, dial=dial)
+        phone_number = self.store.claim_next(self.campaign_id)
+        await manager._dial_number(self.store.get_campaign(self.campaign_id), phone_number)
+        return self.store.progress(self.campaign_id)
+
+    @staticmethod
+    def _sip_error(sip_code: str) -> api.SipCallError:
+        return api.SipCallError(
+            "unavailable", "call failed", status=503, metadata={"sip_status_code": sip_code}
+        )
+
+    async def test_busy_is_retried(self):
+        progress = await self._dial_failing_with(self._sip_error("486"))
+        self.assertEqual(progress["pending"], 1)
+
+    async def test_decline_is_not_retried(self):
+        progress = await self._dial_failing_with(self._sip_error("603"))
+        self.assertEqual(progress["failed"], 1)
+
+    async def test_unparsable_sip_code_falls_back_to_error_code(self):
+        progress = await self._dial_failing_with(self._sip_error("busy"))
+        self.assertEqual(progress["pending"], 1)
+
+    async def test_unavailable_server_is_retried(self):
+        progress = await self._dial_failing_with(
+            api.TwirpError("unavailable", "no SIP service", status=503)
+        )
+        self.assertEqual(progress["pending"], 1)
+
+    async def test_refused_request_is_not_retried(self):
+        progress = await self._dial_failing_with(
+            api.TwirpError("unauthenticated", "bad token", status=401)
+        )
+        self.assertEqual(progress["failed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from agents.web.context_assembly import CHUNK_OVERLAP, assemble_context, stitch_chunks
+
+
+def overlapping_chunks(text: str, size: int) -> list[str]:
+    """Chunks of `text` overlapping by CHUNK_OVERLAP, as scrape.py cuts pages."""
+    step = size - CHUNK_OVERLAP
+    return [text[start:start + size] for start in range(0, len(text) - CHUNK_OVERLAP, step)]
+
+
+class StitchedPassageTest(unittest.TestCase):
+    def setUp(self):
+        lines = [f"Line {i} about the company, its teams and its many offices" for i in range(40)]
+        lines[30] = "Our Kolkata office is at Salt Lake Sector V"
+        chunks = overlapping_chunks("\n".join(lines), size=500)
+        best = next(i for i, chunk in enumerate(chunks) if "Kolkata" in chunk)
+        self.assertGreater(best, 0)
+        # Retrieval ranked the chunk holding the answer first
+        self.ranked = [chunks[best]] + [chunk for i, chunk in enumerate(chunks) if i != best]
+
+    def test_offset_points_at_best_chunk(self):
+        passages = stitch_chunks(self.ranked)
+        self.assertEqual(len(passages), 1)
+        rank, text, start = passages[0]
+        self.assertEqual(rank, 0)
+        self.assertEqual(text[start:start + len(self.ranked[0])], self.ranked[0])
+
+    def test_cut_keeps_best_chunk(self):
+        packed = assemble_context(self.ranked, token_budget=100)
+        self.assertIn("Kolkata office", packed)
+        self.assertLessEqual(len(packed), 400)
+        # Lines stay in page order
+        self.assertLess(packed.index("Line 29"), packed.index("Kolkata"))
+
+    def test_whole_passage_when_it_fits(self):
+        packed = assemble_context(self.ranked, token_budget=10_000)
+        self.assertTrue(packed.startswith("Line 0 "))
+        self.assertTrue(packed.endswith("Line 39 about the company, its teams and its many offices"))
+
+
+if __name__ == "__main__":
+    unittest.main()
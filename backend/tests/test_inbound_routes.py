@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from inbound import config_manager
+from inbound.config_manager import InboundRouteStore
+
+
+class InboundRouteLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "routes.db")
+        InboundRouteStore(path).set_many({"+918000000001": "invoice", "*": "web"})
+        self.store = InboundRouteStore(path, check_interval_seconds=60)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lookup_after_load_does_not_compile(self):
+        self.store.load()
+        self.assertEqual(self.store.reloads, 1)
+        self.assertEqual(self.store.lookup("+918000000001"), "invoice")
+        self.assertEqual(self.store.lookup("+918000000002"), "web")
+        self.assertEqual(self.store.reloads, 1)
+
+    def test_changes_are_reloaded_in_the_background(self):
+        self.store.load()
+        self.store.check_interval_seconds = 0
+        self.store._next_check = 0.0
+        writer = InboundRouteStore(self.store.path)
+        writer.set("+918000000001", "restaurant")
+
+        # Hold the reload thread so the swap cannot happen yet
+        release = threading.Event()
+        self.store._reloader.submit(release.wait)
+        self.assertEqual(self.store.lookup("+918000000001"), "invoice")
+        release.set()
+        self.store.wait_for_reload()
+        self.assertEqual(self.store.lookup("+918000000001"), "restaurant")
+        self.assertEqual(self.store.reloads, 2)
+
+
+class LegacyImportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_file = config_manager.CONFIG_FILE
+        config_manager.CONFIG_FILE = os.path.join(self.tmp.name, "inbound_config.json")
+        with open(config_manager.CONFIG_FILE, "w") as f:
+            json.dump({"918000000001": "invoice", "+91 80000 00002": "web", "not a number": "web"}, f)
+
+    def tearDown(self):
+        config_manager.CONFIG_FILE = self.config_file
+        self.tmp.cleanup()
+
+    def test_legacy_keys_are_normalized(self):
+        store = InboundRouteStore(os.path.join(self.tmp.name, "routes.db"))
+        self.assertEqual(store.export(), {"+918000000001": "invoice", "+918000000002": "web"})
+        self.assertEqual(store.lookup("+918000000001"), "invoice")
+
+
+if __name__ == "__main__":
+    unittest.main()
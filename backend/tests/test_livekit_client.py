@@ -0,0 +1,59 @@
+import asyncio
+import os
+import unittest
+
+from aiohttp import web
+
+from utils import livekit_client
+
+
+class ReplaceClientTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        os.environ.setdefault("LIVEKIT_URL", "http://localhost:7880")
+        os.environ.setdefault("LIVEKIT_API_KEY", "key")
+        os.environ.setdefault("LIVEKIT_API_SECRET", "secret")
+        self.release = asyncio.Event()
+
+        async def slow(request):
+            await self.release.wait()
+            return web.Response(text="answered")
+
+        app = web.Application()
+        app.router.add_get("/dial", slow)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/dial"
+        self.timeout = livekit_client.REQUEST_TIMEOUT_SECONDS
+        livekit_client.REQUEST_TIMEOUT_SECONDS = 0.1
+
+    async def asyncTearDown(self):
+        await livekit_client.close_livekit_api()
+        livekit_client.REQUEST_TIMEOUT_SECONDS = self.timeout
+        await self.runner.cleanup()
+
+    async def test_old_session_serves_in_flight_requests(self):
+        livekit_client.get_livekit_api()
+        old_session = livekit_client._session
+
+        async def dial():
+            async with old_session.get(self.url, timeout=None) as response:
+                return await response.text()
+
+        in_flight = asyncio.create_task(dial())
+        await asyncio.sleep(0.05)
+        livekit_client._replace_client()
+        self.assertIsNot(livekit_client._session, old_session)
+
+        await asyncio.sleep(1.5)
+        self.assertFalse(old_session.closed)
+        self.release.set()
+        self.assertEqual(await in_flight, "answered")
+        await asyncio.sleep(1.5)
+        self.assertTrue(old_session.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+
+from outbound import outbound_call
+
+
+class _FakeLiveKit:
+    def __init__(self, ring_after: float, answer_after: float):
+        self.started = time.perf_counter()
+        self.ring_after = ring_after
+        self.answer_after = answer_after
+        self.agent_dispatch = SimpleNamespace(create_dispatch=self.create_dispatch)
+        self.sip = SimpleNamespace(create_sip_participant=self.create_sip_participant)
+        self.room = SimpleNamespace(list_participants=self.list_participants)
+
+    async def create_dispatch(self, request):
+        return SimpleNamespace(id="AD_1")
+
+    async def create_sip_participant(self, request):
+        await asyncio.sleep(self.answer_after if request.wait_until_answered else self.ring_after)
+        return SimpleNamespace(participant_identity=request.participant_identity, sip_call_id="SCL_1")
+
+    async def list_participants(self, request):
+        ringing = time.perf_counter() - self.started >= self.ring_after
+        identity = outbound_call.SIP_PARTICIPANT_IDENTITY
+        return SimpleNamespace(participants=[SimpleNamespace(identity=identity)] if ringing else [])
+
+
+class CallTimingTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.trunk_id = outbound_call.outbound_trunk_id
+        outbound_call.outbound_trunk_id = "ST_test"
+
+    def tearDown(self):
+        outbound_call.outbound_trunk_id = self.trunk_id
+
+    async def test_waiting_for_an_answer_reports_ringing_and_answer(self):
+        lkapi = _FakeLiveKit(ring_after=0.1, answer_after=0.6)
+        handle = await outbound_call.make_call("+15550001", lkapi=lkapi, wait_until_answered=True)
+        self.assertGreaterEqual(handle.answer_ms, 600)
+        self.assertGreaterEqual(handle.dial_ms, 100)
+        self.assertLess(handle.dial_ms, 100 + outbound_call.SIP_POLL_SECONDS * 1000 + 100)
+
+    async def test_no_answer_time_without_waiting(self):
+        lkapi = _FakeLiveKit(ring_after=0.05, answer_after=0.6)
+        handle = await outbound_call.make_call("+15550001", lkapi=lkapi)
+        self.assertIsNone(handle.answer_ms)
+        self.assertGreaterEqual(handle.dial_ms, 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import asyncio
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from agents.web.prefetch import RetrievalPrefetcher
+from agents.web.query_cache import QueryCache
+from agents.web.retrieval import WebsiteRetriever
+
+
+class StandInRetriever(WebsiteRetriever):
+    def __init__(self, path: str):
+        super().__init__(path=path, hybrid=False)
+        self.cache = QueryCache()
+        self.searches = 0
+
+    def embed(self, question: str) -> list[float]:
+        return [1.0, float(len(question))]
+
+    def _search(self, question: str, embedding: list[float], n_results: int) -> list[str]:
+        self.searches += 1
+        return [f"chunk about {question}"]
+
+
+class SpeculativeCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.retriever = StandInRetriever(self.tmp.name)
+        self.prefetcher = RetrievalPrefetcher(self.retriever, n_results=1, min_words=1)
+
+    def tearDown(self):
+        self.prefetcher.close()
+        self.tmp.cleanup()
+
+    def transcribe(self, text: str, item_id: str) -> None:
+        self.prefetcher._on_user_input_transcribed(
+            SimpleNamespace(transcript=text, is_final=True, item_id=item_id)
+        )
+
+    async def test_unused_speculation_is_not_cached(self):
+        self.transcribe("thanks so much bye", "item_1")
+        await self.prefetcher._recent[-1].task
+        self.assertEqual(self.retriever.searches, 1)
+        self.assertIsNone(self.retriever.cache.get_exact("thanks so much bye", 1))
+
+    async def test_served_speculation_is_cached(self):
+        self.transcribe("what services do you offer", "item_1")
+        documents = await self.prefetcher.lookup("what services do you offer")
+        self.assertEqual(documents, ["chunk about what services do you offer"])
+        await asyncio.gather(*self.prefetcher._remembering)
+        self.assertEqual(self.retriever.cache.get_exact("what services do you offer", 1), documents)
+        self.assertEqual(self.retriever.searches, 1)
+
+    async def test_speculation_reads_the_cache(self):
+        self.retriever.query("what services do you offer", 1)
+        self.transcribe("What services do you offer?", "item_1")
+        self.assertEqual(await self.prefetcher._recent[-1].task, ["chunk about what services do you offer"])
+        self.assertEqual(self.retriever.searches, 1)
+        self.assertIsNone(self.prefetcher._recent[-1].entry)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from agents.web.query_cache import QueryCache
+
+
+class SharedQueryCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "query_cache.db")
+        # One cache per worker process
+        self.first = QueryCache(path=self.path)
+        self.second = QueryCache(path=self.path)
+        self.first.load(7)
+        self.second.load(7)
+        self.first.put("what services do you offer", [1.0, 0.0], 5, ["a", "b", "c", "d", "e"])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_exact_hit_from_another_process(self):
+        self.assertEqual(self.second.get_exact("what services do you offer", 3), ["a", "b", "c"])
+        self.assertIsNone(self.second.get_exact("what services do you offer", 8))
+        self.assertEqual(self.second.shared_hits, 1)
+
+    def test_load_serves_similar_hits(self):
+        self.assertIsNone(self.second.get_similar([1.0, 0.01], 5))
+        self.second.load(7)
+        self.assertEqual(self.second.get_similar([1.0, 0.01], 5), ["a", "b", "c", "d", "e"])
+
+    def test_other_versions_are_not_served(self):
+        self.second.load(8)
+        self.assertIsNone(self.second.get_exact("what services do you offer", 5))
+        self.first.load(8)
+        self.assertIsNone(self.first.get_exact("what services do you offer", 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
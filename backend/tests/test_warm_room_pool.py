@@ -0,0 +1,58 @@
+import asyncio
+import time
+import unittest
+
+from utils.warm_room_pool import WarmRoomPool
+
+
+class _RoomService:
+    def __init__(self):
+        self.deleted: list[str] = []
+
+    async def create_room(self, request):
+        # Never finishes warming; the tests fill the pool directly
+        await asyncio.Event().wait()
+
+    async def delete_room(self, request):
+        self.deleted.append(request.room)
+
+
+class _Client:
+    def __init__(self):
+        self.room = _RoomService()
+
+
+class WarmRoomPoolAgeTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = _Client()
+        self.pool = WarmRoomPool(
+            targets={"web": 2},
+            get_client=lambda: self.client,
+            room_name_fn=lambda agent: f"{agent}-new",
+            max_idle_seconds=600,
+            join_timeout_seconds=120,
+        )
+
+    async def asyncTearDown(self):
+        await self.pool.stop()
+
+    async def test_room_older_than_join_timeout_is_never_returned(self):
+        now = time.monotonic()
+        self.pool._ready["web"] = [("web-old", now - 121), ("web-older", now - 300)]
+        self.assertIsNone(self.pool.acquire("web"))
+        await asyncio.sleep(0)
+        self.assertCountEqual(self.client.room.deleted, ["web-old", "web-older"])
+        self.assertEqual(self.pool._ready["web"], [])
+
+    async def test_room_near_join_timeout_is_not_handed_out(self):
+        now = time.monotonic()
+        self.pool._ready["web"] = [("web-old", now - 110), ("web-fresh", now - 5)]
+        self.assertEqual(self.pool.acquire("web"), "web-fresh")
+        self.assertIsNone(self.pool.acquire("web"))
+
+    async def test_age_limit_follows_join_timeout(self):
+        self.assertLess(self.pool.max_age_seconds, self.pool.join_timeout_seconds)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Background audio decoded once per worker process.
+
+BackgroundAudioPlayer decodes file sources on every play, and the thinking
+sound is played on every "thinking" state. A DecodedAudio holds the frames
+in memory and hands out a fresh iterator each time the player iterates it,
+so one instance can be shared by every session in the process.
+"""
+
+import logging
+import os
+import wave
+from collections.abc import AsyncIterator
+
+from livekit import rtc
+
+logger = logging.getLogger(__name__)
+
+FRAME_MS = 20
+
+
+class DecodedAudio(AsyncIterator):
+    def __init__(self, frames: list[rtc.AudioFrame], loop: bool = False):
+        self.frames = frames
+        self.loop = loop
+
+    def __aiter__(self):
+        # `async for` calls this on every play, so each play starts over
+        return self._iterate()
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        # Only reached by callers that skip __aiter__; plays go through it
+        raise StopAsyncIteration
+
+    async def _iterate(self):
+        while True:
+            for frame in self.frames:
+                yield frame
+            if not self.loop or not self.frames:
+                return
+
+    @property
+    def duration_seconds(self) -> float:
+        return sum(f.samples_per_channel / f.sample_rate for f in self.frames)
+
+
+def load_wav(path: str, loop: bool = False) -> DecodedAudio | None:
+    """Decode a 16-bit PCM WAV into frames, or None if the file is missing."""
+    if not os.path.exists(path):
+        logger.warning(f"Background audio file not found: {path}")
+        return None
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM, got {wav.getsampwidth() * 8}-bit")
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        samples_per_frame = sample_rate * FRAME_MS // 1000
+        frames = []
+        while True:
+            data = wav.readframes(samples_per_frame)
+            if not data:
+                break
+            frames.append(
+                rtc.AudioFrame(
+                    data=data,
+                    sample_rate=sample_rate,
+                    num_channels=channels,
+                    samples_per_channel=len(data) // (2 * channels),
+                )
+            )
+    return DecodedAudio(frames, loop=loop)
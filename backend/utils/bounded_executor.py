@@ -0,0 +1,110 @@
+"""
+A small thread pool for blocking work called from agent event loops.
+
+Work runs on at most `max_workers` threads with at most `max_queued` calls
+waiting behind them; beyond that, calls are rejected instead of piling up
+behind a slow dependency. Each call has a timeout covering both the wait
+and the run. Queue depth and wait/run times are kept for `stats()`.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+# Wait/run samples kept for percentiles
+SAMPLE_WINDOW = 1000
+
+
+class ExecutorFull(RuntimeError):
+    pass
+
+
+def _percentile(samples, pct: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))], 1)
+
+
+class BoundedExecutor:
+    def __init__(self, name: str, max_workers: int = 2, max_queued: int = 8):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.submitted = 0
+        self.completed = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self._pending = 0  # queued or running
+        self._lock = threading.Lock()
+        self._wait_ms: deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self._run_ms: deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._pending - self.max_workers)
+
+    async def run(self, fn: Callable[..., T], *args, timeout: float) -> T:
+        """
+        Run `fn(*args)` on the pool. Raises ExecutorFull when the queue is
+        full and asyncio.TimeoutError when it does not finish within `timeout`.
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queued:
+                self.rejected += 1
+                raise ExecutorFull(f"{self.name}: {self._pending} calls pending")
+            self._pending += 1
+            self.submitted += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+        submitted_at = time.perf_counter()
+
+        def _call():
+            started = time.perf_counter()
+            self._wait_ms.append((started - submitted_at) * 1000)
+            try:
+                return fn(*args)
+            finally:
+                self._run_ms.append((time.perf_counter() - started) * 1000)
+
+        future = self._pool.submit(_call)
+        future.add_done_callback(self._on_done)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            # Drops it if still queued; a running call finishes in the background
+            future.cancel()
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        self.completed += 1
+        return result
+
+    def _on_done(self, _future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "wait_ms_p50": _percentile(self._wait_ms, 50),
+            "wait_ms_p95": _percentile(self._wait_ms, 95),
+            "run_ms_p50": _percentile(self._run_ms, 50),
+            "run_ms_p95": _percentile(self._run_ms, 95),
+        }
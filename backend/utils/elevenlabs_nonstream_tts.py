@@ -137,7 +137,11 @@ class ElevenLabsNonStreamingTTS(tts.TTS):
             voice_id=voice_id,
             model=model,
             encoding=encoding,
-            base_url=base_url if is_given(base_url) else API_BASE_URL_V1,
+            base_url=(
+                base_url
+                if is_given(base_url)
+                else os.environ.get("ELEVENLABS_BASE_URL", API_BASE_URL_V1)
+            ),
             voice_settings=voice_settings,
             enable_logging=enable_logging,
             apply_text_normalization=apply_text_normalization,
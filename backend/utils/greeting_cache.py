@@ -0,0 +1,90 @@
+"""
+On-disk cache of synthesized welcome messages.
+
+Welcome messages are fixed per agent, so each (text, voice, model, sample
+rate) is synthesized once, stored as a 16-bit PCM WAV under
+GREETING_CACHE_DIR and played with `session.say(audio=...)` from then on.
+Files are shared by every worker process; decoded clips are kept in memory
+per process.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import wave
+
+from livekit import rtc
+from livekit.agents import tts
+
+from utils.audio_clips import DecodedAudio, load_wav
+
+logger = logging.getLogger(__name__)
+
+GREETING_CACHE_DIR = os.getenv(
+    "GREETING_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "greeting_cache"),
+)
+
+
+class GreetingCache:
+    def __init__(self, cache_dir: str = GREETING_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._clips: dict[str, DecodedAudio] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def path_for(self, text: str, voice_id: str, model: str, sample_rate: int) -> str:
+        digest = hashlib.sha256(
+            "\x00".join([text, voice_id, model, str(sample_rate)]).encode("utf-8")
+        ).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{digest}.wav")
+
+    async def get(self, text: str, tts_engine: tts.TTS, voice_id: str) -> DecodedAudio | None:
+        """Audio for `text`, synthesizing and storing it on a miss; None on failure."""
+        path = self.path_for(text, voice_id, tts_engine.model, tts_engine.sample_rate)
+        clip = self._clips.get(path)
+        if clip is not None:
+            self.hits += 1
+            return clip
+
+        lock = self._locks.setdefault(path, asyncio.Lock())
+        async with lock:
+            clip = self._clips.get(path)
+            if clip is None and os.path.exists(path):
+                clip = await asyncio.to_thread(load_wav, path)
+            if clip is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                try:
+                    clip = await self._render(text, tts_engine, path)
+                except Exception as e:
+                    logger.warning(f"Could not render greeting audio: {e}", exc_info=True)
+                    return None
+            self._clips[path] = clip
+        return clip
+
+    async def _render(self, text: str, tts_engine: tts.TTS, path: str) -> DecodedAudio:
+        frames = []
+        async with tts_engine.synthesize(text) as stream:
+            async for audio in stream:
+                frames.append(audio.frame)
+        if not frames:
+            raise ValueError("TTS returned no audio")
+        combined = rtc.combine_audio_frames(frames)
+        await asyncio.to_thread(self._write_wav, path, combined)
+        logger.info(f"Cached greeting audio ({combined.duration:.1f} s) at {path}")
+        return await asyncio.to_thread(load_wav, path)
+
+    def _write_wav(self, path: str, frame: rtc.AudioFrame) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write then rename, so other processes never read a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with wave.open(tmp_path, "wb") as wav:
+            wav.setnchannels(frame.num_channels)
+            wav.setsampwidth(2)
+            wav.setframerate(frame.sample_rate)
+            wav.writeframes(bytes(frame.data))
+        os.replace(tmp_path, path)
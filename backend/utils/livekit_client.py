@@ -0,0 +1,162 @@
+"""
+Process-wide LiveKitAPI client.
+
+Each gunicorn worker owns one long-lived client, opened and closed by the
+FastAPI lifespan in server.py. Room, dispatch and SIP calls reuse its aiohttp
+session instead of paying for a new session and TCP/TLS handshake per call.
+
+The connector drops idle connections after KEEPALIVE_SECONDS and opens new
+ones as needed. Only after HEALTH_CHECK_FAILURES probes in a row have failed
+is a fresh client swapped in; the old one keeps serving the requests it has
+in flight (a dial waiting for an answer can take a minute) and is closed
+once they have finished.
+"""
+
+import asyncio
+import logging
+import os
+
+import aiohttp
+from livekit import api
+from livekit.api import ListRoomsRequest
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("LIVEKIT_API_POOL_SIZE", "32"))
+KEEPALIVE_SECONDS = float(os.getenv("LIVEKIT_API_KEEPALIVE_SECONDS", "60"))
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("LIVEKIT_API_TIMEOUT_SECONDS", "10"))
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("LIVEKIT_API_HEALTH_INTERVAL_SECONDS", "30"))
+# Failed probes in a row before the client is replaced
+HEALTH_CHECK_FAILURES = int(os.getenv("LIVEKIT_API_HEALTH_FAILURES", "3"))
+
+_client: api.LiveKitAPI | None = None
+_session: aiohttp.ClientSession | None = None
+_health_task: asyncio.Task | None = None
+# Requests in flight per session, counted by aiohttp request tracing
+_in_flight: dict[aiohttp.ClientSession, int] = {}
+_retiring: set[asyncio.Task] = set()
+
+
+async def _on_request_start(session, context, params) -> None:
+    _in_flight[session] = _in_flight.get(session, 0) + 1
+
+
+async def _on_request_done(session, context, params) -> None:
+    _in_flight[session] = _in_flight.get(session, 1) - 1
+
+
+def _create_client() -> api.LiveKitAPI:
+    global _session
+    connector = aiohttp.TCPConnector(
+        limit=POOL_SIZE,
+        keepalive_timeout=KEEPALIVE_SECONDS,
+        ttl_dns_cache=300,
+    )
+    tracing = aiohttp.TraceConfig()
+    tracing.on_request_start.append(_on_request_start)
+    tracing.on_request_end.append(_on_request_done)
+    tracing.on_request_exception.append(_on_request_done)
+    _session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS),
+        trace_configs=[tracing],
+    )
+    return api.LiveKitAPI(session=_session)
+
+
+def get_livekit_api() -> api.LiveKitAPI:
+    """Return the shared client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = _create_client()
+        logger.info(f"Opened shared LiveKitAPI client (pool size {POOL_SIZE})")
+    return _client
+
+
+async def check_livekit_api() -> bool:
+    """Cheap round trip to confirm the shared client can reach the server."""
+    try:
+        await get_livekit_api().room.list_rooms(ListRoomsRequest(names=["__health__"]))
+        return True
+    except Exception as e:
+        logger.warning(f"LiveKitAPI health check failed: {e}")
+        return False
+
+
+async def _close(client: api.LiveKitAPI | None, session: aiohttp.ClientSession | None) -> None:
+    if client is not None:
+        await client.aclose()
+    if session is not None:
+        # LiveKitAPI only closes sessions it created itself
+        await session.close()
+        _in_flight.pop(session, None)
+
+
+async def _close_when_idle(client: api.LiveKitAPI, session: aiohttp.ClientSession) -> None:
+    # Callers may still hold the old client between requests, so it must
+    # also stay idle for a request timeout before it is closed
+    try:
+        while True:
+            while _in_flight.get(session, 0) > 0:
+                await asyncio.sleep(1)
+            await asyncio.sleep(REQUEST_TIMEOUT_SECONDS)
+            if _in_flight.get(session, 0) == 0:
+                break
+    finally:
+        await _close(client, session)
+        logger.info("Closed the replaced LiveKitAPI client")
+
+
+def _replace_client() -> None:
+    """Serve new requests from a fresh client; close the old one once idle."""
+    global _client, _session
+    client, session = _client, _session
+    _client, _session = None, None
+    get_livekit_api()
+    if client is not None:
+        task = asyncio.create_task(_close_when_idle(client, session))
+        _retiring.add(task)
+        task.add_done_callback(_retiring.discard)
+
+
+async def _health_check_loop() -> None:
+    failures = 0
+    while True:
+        await asyncio.sleep(HEALTH_CHECK_INTERVAL_SECONDS)
+        if await check_livekit_api():
+            failures = 0
+            continue
+        failures += 1
+        if failures >= HEALTH_CHECK_FAILURES:
+            # Pooled connections may be half-open; new requests get a new
+            # session while the old one finishes what it has in flight
+            logger.warning(f"{failures} LiveKitAPI health checks failed in a row, replacing the client")
+            _replace_client()
+            failures = 0
+
+
+async def open_livekit_api() -> None:
+    """Create the shared client and start its health checks (lifespan startup)."""
+    global _health_task
+    get_livekit_api()
+    if HEALTH_CHECK_INTERVAL_SECONDS > 0 and _health_task is None:
+        _health_task = asyncio.create_task(_health_check_loop())
+
+
+async def close_livekit_api() -> None:
+    """Stop health checks and close the shared client (lifespan shutdown)."""
+    global _health_task, _client, _session
+    if _health_task is not None:
+        _health_task.cancel()
+        try:
+            await _health_task
+        except asyncio.CancelledError:
+            pass
+        _health_task = None
+    client, session = _client, _session
+    _client, _session = None, None
+    await _close(client, session)
+    for task in list(_retiring):
+        task.cancel()
+    await asyncio.gather(*_retiring, return_exceptions=True)
+    logger.info("Closed shared LiveKitAPI client")
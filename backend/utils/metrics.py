@@ -0,0 +1,89 @@
+"""
+Prometheus metrics for the token server.
+
+server_run.py points PROMETHEUS_MULTIPROC_DIR at a fresh directory before
+starting gunicorn, so every worker writes its samples there and /metrics
+aggregates them across workers. Without that variable (e.g. `python server.py`)
+the default single-process registry is used.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Routes reported by name; anything else is folded into "other" to keep
+# label cardinality bounded.
+TRACKED_ROUTES = {
+    "/api/getToken",
+    "/api/getToken/bulk",
+    "/api/makeCall",
+    "/api/setInboundAgent",
+    "/api/getInboundAgent",
+    "/api/inboundAgents/bulk",
+}
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["route", "method", "status"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled",
+    ["route"],
+    multiprocess_mode="livesum",
+)
+REQUEST_ERRORS = Counter(
+    "http_request_errors_total",
+    "Failed requests: HTTP status >= 400, unhandled exception, or a handled token error",
+    ["route", "kind"],
+)
+LIVEKIT_API_LATENCY = Histogram(
+    "livekit_api_call_duration_seconds",
+    "LiveKit server API call latency",
+    ["call", "outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+TOKEN_MINT_LATENCY = Histogram(
+    "token_mint_duration_seconds",
+    "Time to build and sign a LiveKit access token",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+
+
+def route_label(path: str) -> str:
+    return path if path in TRACKED_ROUTES else "other"
+
+
+@contextmanager
+def observe_livekit_call(call: str):
+    """Time a LiveKit API call, labelled by whether it raised."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        LIVEKIT_API_LATENCY.labels(call=call, outcome=outcome).observe(
+            time.perf_counter() - started
+        )
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Return (body, content type) for the /metrics endpoint."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,101 @@
+"""
+Collision-free room names for the token server.
+
+Names are unique by construction, so issuing a token never has to ask the
+LiveKit server which rooms already exist:
+
+    <agent>-<ms timestamp, base36><node tag><sequence, base36>
+    e.g. web-m2k9x1c4a7f0
+
+- The millisecond timestamp keeps names time-ordered.
+- The node tag separates hosts and gunicorn workers (a hash of ROOM_NODE_TAG
+  or the hostname, plus the worker pid).
+- The sequence counter separates names issued in the same millisecond.
+
+A small TTL set of recently issued names is kept as a last line of defence
+against clock steps (e.g. NTP moving the wall clock backwards).
+"""
+
+import hashlib
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_BASE36 = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _to_base36(value: int) -> str:
+    if value == 0:
+        return "0"
+    digits = []
+    while value:
+        value, rem = divmod(value, 36)
+        digits.append(_BASE36[rem])
+    return "".join(reversed(digits))
+
+
+def _default_node_tag() -> str:
+    host = os.getenv("ROOM_NODE_TAG") or socket.gethostname()
+    seed = f"{host}:{os.getpid()}".encode("utf-8")
+    return hashlib.blake2s(seed, digest_size=3).hexdigest()
+
+
+class RoomNameGenerator:
+    """Generates time-ordered, per-worker unique room names without network calls."""
+
+    def __init__(
+        self,
+        node_tag: str | None = None,
+        recent_ttl_seconds: float = 3600.0,
+        max_recent: int = 100_000,
+    ):
+        self.node_tag = node_tag or _default_node_tag()
+        self.recent_ttl_seconds = recent_ttl_seconds
+        self.max_recent = max_recent
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+        self._recent: OrderedDict[str, float] = OrderedDict()
+
+    def generate(self, agent: str) -> str:
+        with self._lock:
+            while True:
+                now_ms = time.time_ns() // 1_000_000
+                if now_ms > self._last_ms:
+                    self._last_ms = now_ms
+                    self._sequence = 0
+                else:
+                    # Same millisecond (or the clock stepped back): keep the
+                    # last timestamp and bump the sequence instead.
+                    self._sequence += 1
+
+                room_name = (
+                    f"{agent}-{_to_base36(self._last_ms)}"
+                    f"{self.node_tag}{_to_base36(self._sequence)}"
+                )
+                if self._remember(room_name):
+                    return room_name
+                logger.warning(f"Room name {room_name} was issued recently, retrying")
+
+    def _remember(self, room_name: str) -> bool:
+        """Record an issued name; returns False if it is still in the TTL window."""
+        if self.recent_ttl_seconds <= 0 or self.max_recent <= 0:
+            return True
+
+        now = time.monotonic()
+        cutoff = now - self.recent_ttl_seconds
+        while self._recent:
+            oldest_name, issued_at = next(iter(self._recent.items()))
+            if issued_at >= cutoff and len(self._recent) < self.max_recent:
+                break
+            self._recent.pop(oldest_name)
+
+        if room_name in self._recent:
+            return False
+        self._recent[room_name] = now
+        return True
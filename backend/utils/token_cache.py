@@ -0,0 +1,68 @@
+"""
+Bounded LRU of signed LiveKit access tokens.
+
+Reconnect storms and page reloads ask for the same (identity, agent, room)
+token seconds apart. A cached JWT is reused until `safety_margin_seconds`
+before it expires, so clients never receive a token that is about to lapse.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+TokenKey = tuple[str, str, str]
+
+
+class TokenCache:
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 6 * 3600,
+        safety_margin_seconds: float = 300,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.safety_margin_seconds = safety_margin_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key -> (jwt, reusable_until)
+        self._entries: OrderedDict[TokenKey, tuple[str, float]] = OrderedDict()
+
+    def get_or_mint(
+        self, identity: str, agent: str, room: str, mint: Callable[[], str]
+    ) -> str:
+        """Return a cached token for the key, or sign a new one with `mint`."""
+        key = (identity, agent, room)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        jwt = mint()
+        reusable_until = now + self.ttl_seconds - self.safety_margin_seconds
+        with self._lock:
+            self._entries[key] = (jwt, reusable_until)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return jwt
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,196 @@
+"""
+Per-turn voice latency metrics for agent sessions.
+
+TurnMetricsCollector listens to AgentSession events and records, for every
+user turn (measured from the end of user speech):
+
+- eos_to_first_token_ms: end of user speech -> first LLM token
+- llm_ttft_ms:           LLM time to first token, as reported by the model
+- tts_ttfb_ms:           TTS time to first byte
+- eos_to_first_audio_ms: end of user speech -> agent starts speaking
+- tools:                 duration of each tool call in the turn
+
+Turns are appended as JSONL to TURN_METRICS_DIR/<room>.jsonl, followed by a
+summary line when the session closes. Aggregate across rooms with:
+
+    python -m utils.turn_metrics [TURN_METRICS_DIR]
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+
+from livekit.agents import AgentSession, metrics
+
+logger = logging.getLogger(__name__)
+
+TURN_METRICS_DIR = os.getenv(
+    "TURN_METRICS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "turn_metrics"),
+)
+
+LATENCY_FIELDS = ("eos_to_first_token_ms", "llm_ttft_ms", "tts_ttfb_ms", "eos_to_first_audio_ms")
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(turns: list[dict]) -> dict:
+    """p50/p95/p99 and count for each latency field and tool in `turns`."""
+    samples: dict[str, list[float]] = defaultdict(list)
+    for turn in turns:
+        for field in LATENCY_FIELDS:
+            if turn.get(field) is not None:
+                samples[field].append(turn[field])
+        for tool in turn.get("tools", []):
+            samples[f"tool:{tool['name']}_ms"].append(tool["ms"])
+    return {
+        name: {
+            "count": len(values),
+            "p50": round(percentile(values, 50), 1),
+            "p95": round(percentile(values, 95), 1),
+            "p99": round(percentile(values, 99), 1),
+        }
+        for name, values in sorted(samples.items())
+    }
+
+
+class TurnMetricsCollector:
+    def __init__(self, room_name: str, agent_type: str, out_dir: str = TURN_METRICS_DIR):
+        self.room_name = room_name
+        self.agent_type = agent_type
+        self.path = os.path.join(out_dir, f"{room_name}.jsonl")
+        self.turns: list[dict] = []
+        self._out_dir = out_dir
+        self._turn: dict | None = None
+        self._speech_ended_at = 0.0
+
+    def attach(self, session: AgentSession) -> None:
+        session.on("user_state_changed", self._on_user_state_changed)
+        session.on("agent_state_changed", self._on_agent_state_changed)
+        session.on("metrics_collected", self._on_metrics_collected)
+        session.on("function_tools_executed", self._on_function_tools_executed)
+
+    def close(self) -> dict:
+        """Write the last turn and a session summary; returns the summary."""
+        self._finish_turn()
+        summary = summarize(self.turns)
+        if self.turns:
+            self._write(
+                {
+                    "type": "summary",
+                    "room": self.room_name,
+                    "agent_type": self.agent_type,
+                    "turns": len(self.turns),
+                    "latency": summary,
+                }
+            )
+        return summary
+
+    def _on_user_state_changed(self, ev) -> None:
+        if ev.old_state == "speaking" and ev.new_state != "speaking":
+            self._finish_turn()
+            self._speech_ended_at = ev.created_at
+            self._turn = {
+                "type": "turn",
+                "room": self.room_name,
+                "agent_type": self.agent_type,
+                "turn": len(self.turns) + 1,
+                "speech_ended_at": round(ev.created_at, 3),
+                "eos_to_first_token_ms": None,
+                "llm_ttft_ms": None,
+                "tts_ttfb_ms": None,
+                "eos_to_first_audio_ms": None,
+                "tools": [],
+            }
+
+    def _on_agent_state_changed(self, ev) -> None:
+        turn = self._turn
+        if turn is not None and ev.new_state == "speaking" and turn["eos_to_first_audio_ms"] is None:
+            turn["eos_to_first_audio_ms"] = self._ms_since_speech_end(ev.created_at)
+
+    def _on_metrics_collected(self, ev) -> None:
+        turn = self._turn
+        if turn is None:
+            return
+        m = ev.metrics
+        if isinstance(m, (metrics.RealtimeModelMetrics, metrics.LLMMetrics)):
+            if m.ttft is None or m.ttft < 0 or turn["llm_ttft_ms"] is not None:
+                return
+            turn["llm_ttft_ms"] = round(m.ttft * 1000, 1)
+            # Metrics arrive when generation ends; work back to the first token
+            first_token_at = m.timestamp - m.duration + m.ttft
+            turn["eos_to_first_token_ms"] = self._ms_since_speech_end(first_token_at)
+        elif isinstance(m, metrics.TTSMetrics):
+            if turn["tts_ttfb_ms"] is None and m.ttfb >= 0:
+                turn["tts_ttfb_ms"] = round(m.ttfb * 1000, 1)
+
+    def _on_function_tools_executed(self, ev) -> None:
+        turn = self._turn
+        if turn is None:
+            return
+        for call in ev.function_calls:
+            turn["tools"].append(
+                {"name": call.name, "ms": round(max(0.0, ev.created_at - call.created_at) * 1000, 1)}
+            )
+
+    def _ms_since_speech_end(self, at: float) -> float | None:
+        if at < self._speech_ended_at:
+            return None
+        return round((at - self._speech_ended_at) * 1000, 1)
+
+    def _finish_turn(self) -> None:
+        turn, self._turn = self._turn, None
+        if turn is None:
+            return
+        self.turns.append(turn)
+        self._write(turn)
+
+    def _write(self, record: dict) -> None:
+        try:
+            os.makedirs(self._out_dir, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write turn metrics to {self.path}: {e}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Aggregate per-turn latency by agent type")
+    parser.add_argument("directory", nargs="?", default=TURN_METRICS_DIR)
+    parser.add_argument("--since-hours", type=float, default=None)
+    args = parser.parse_args()
+
+    cutoff = time.time() - args.since_hours * 3600 if args.since_hours else 0
+    by_agent: dict[str, list[dict]] = defaultdict(list)
+    for path in glob.glob(os.path.join(args.directory, "*.jsonl")):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("type") == "turn" and record.get("speech_ended_at", 0) >= cutoff:
+                    by_agent[record.get("agent_type", "unknown")].append(record)
+
+    if not by_agent:
+        print(f"No turns found in {args.directory}")
+        return
+    for agent_type, turns in sorted(by_agent.items()):
+        print(f"{agent_type}: {len(turns)} turns")
+        for name, stats in summarize(turns).items():
+            print(
+                f"  {name:<34} n={stats['count']:<6} p50={stats['p50']:8.1f}"
+                f"  p95={stats['p95']:8.1f}  p99={stats['p99']:8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Coalescing for ui.context packets from the web frontend.
+
+A scrolling user sends many context syncs per second. Each one is a full
+snapshot of the UI state, so only the latest matters: packets are held for
+a short trailing window (bounded by `max_delay_seconds` so a continuous
+stream still flushes) and only the last one is parsed and applied.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+DEBOUNCE_SECONDS = float(os.getenv("UI_CONTEXT_DEBOUNCE_MS", "250")) / 1000
+MAX_DELAY_SECONDS = float(os.getenv("UI_CONTEXT_MAX_DELAY_MS", "1000")) / 1000
+
+
+class UIContextCoalescer:
+    def __init__(
+        self,
+        apply: Callable[[dict], bool | None],
+        delay_seconds: float = DEBOUNCE_SECONDS,
+        max_delay_seconds: float = MAX_DELAY_SECONDS,
+    ):
+        """
+        `apply` receives the parsed payload and returns False when it left the
+        agent unchanged (same rendered context), anything else counts as applied.
+        """
+        self.apply = apply
+        self.delay_seconds = delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.received = 0
+        self.debounced = 0
+        self.unchanged = 0
+        self.applied = 0
+        self.invalid = 0
+        self._pending: str | None = None
+        self._first_pending_at = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+
+    def submit(self, payload_text: str) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        self.received += 1
+        if self._pending is None:
+            self._first_pending_at = now
+        else:
+            self.debounced += 1
+        self._pending = payload_text
+        if self._timer is not None:
+            self._timer.cancel()
+        flush_at = min(now + self.delay_seconds, self._first_pending_at + self.max_delay_seconds)
+        self._timer = loop.call_at(flush_at, self.flush)
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        payload_text, self._pending = self._pending, None
+        if payload_text is None:
+            return
+
+        try:
+            context_payload = json.loads(payload_text)
+        except json.JSONDecodeError:
+            self.invalid += 1
+            logger.warning("Invalid ui.context payload - JSON parse failed")
+            return
+        if not isinstance(context_payload, dict):
+            self.invalid += 1
+            logger.warning("Invalid ui.context payload - not an object")
+            return
+
+        viewport = context_payload.get("viewport") or {}
+        logger.info(
+            "📱 UI Context Sync: type=%s, screen=%s, active_elements=%d",
+            context_payload.get("type", "unknown"),
+            viewport.get("screen", "unknown") if isinstance(viewport, dict) else "unknown",
+            len(context_payload.get("active_elements") or []),
+        )
+        if self.apply(context_payload) is False:
+            self.unchanged += 1
+        else:
+            self.applied += 1
+
+    def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._pending = None
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "applied": self.applied,
+            "suppressed": self.debounced + self.unchanged,
+            "debounced": self.debounced,
+            "unchanged": self.unchanged,
+            "invalid": self.invalid,
+        }
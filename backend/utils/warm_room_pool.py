@@ -0,0 +1,192 @@
+"""
+Per-agent pool of pre-created rooms with an agent already joined.
+
+agent_session.py is registered for automatic dispatch, so creating a room is
+enough to start a job in it. The room metadata carries the agent type, which
+lets the job start the right agent (realtime session open, prompt loaded)
+before any user arrives. /api/getToken hands out a ready room and the pool is
+topped back up in the background.
+
+Each gunicorn worker keeps its own pool, so the number of warm rooms per
+agent type is `target * workers`.
+
+A warm agent leaves its room if nobody joins within `join_timeout_seconds`,
+so a room is only handed out while the caller still has
+`handoff_seconds` left to join; older rooms are deleted and replaced.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Callable
+
+from livekit import api
+from livekit.protocol.models import ParticipantInfo
+
+from utils.metrics import observe_livekit_call
+
+logger = logging.getLogger(__name__)
+
+
+def parse_pool_targets(spec: str | None) -> dict[str, int]:
+    """Parse "web=2,invoice=1" into {"web": 2, "invoice": 1}."""
+    targets: dict[str, int] = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        agent, _, size = item.partition("=")
+        try:
+            targets[agent.strip()] = max(0, int(size))
+        except ValueError:
+            logger.warning(f"Ignoring invalid warm pool entry: {item!r}")
+    return {agent: size for agent, size in targets.items() if size > 0}
+
+
+class WarmRoomPool:
+    def __init__(
+        self,
+        targets: dict[str, int],
+        get_client: Callable[[], api.LiveKitAPI],
+        room_name_fn: Callable[[str], str],
+        max_idle_seconds: float = 600,
+        join_timeout_seconds: float = 120,
+        ready_timeout_seconds: float = 20,
+        handoff_seconds: float = 15,
+    ):
+        self.targets = targets
+        self.max_idle_seconds = max_idle_seconds
+        self.join_timeout_seconds = join_timeout_seconds
+        # Oldest a room may be when handed out: the agent must still be there
+        self.max_age_seconds = max(0.0, min(max_idle_seconds, join_timeout_seconds - handoff_seconds))
+        self.ready_timeout_seconds = ready_timeout_seconds
+        self._get_client = get_client
+        self._room_name_fn = room_name_fn
+        # agent -> [(room_name, ready_at)], oldest first
+        self._ready: dict[str, list[tuple[str, float]]] = {agent: [] for agent in targets}
+        self._warming: dict[str, int] = {agent: 0 for agent in targets}
+        self._tasks: set[asyncio.Task] = set()
+        self._reaper: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if not self.targets:
+            return
+        logger.info(f"Starting warm room pool: {self.targets}")
+        for agent in self.targets:
+            self._schedule_refill(agent)
+        self._reaper = asyncio.create_task(self._reap_loop())
+
+    async def stop(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        # Idle warm agents keep realtime sessions open; release them
+        for agent, rooms in self._ready.items():
+            for room_name, _ in rooms:
+                await self._delete_room(room_name)
+            rooms.clear()
+
+    def acquire(self, agent: str) -> str | None:
+        """Take a ready room for `agent`, or None if the pool is empty."""
+        rooms = self._ready.get(agent)
+        if rooms is None:
+            return None
+        for room_name, _ in self._expire(agent):
+            self._spawn(self._delete_room(room_name))
+        # Newest first: furthest from its agent giving up
+        room_name = rooms.pop()[0] if rooms else None
+        self._schedule_refill(agent)
+        if room_name:
+            logger.info(f"Warm room handed out | room={room_name} | agent={agent}")
+        else:
+            logger.info(f"Warm room pool empty | agent={agent}")
+        return room_name
+
+    def stats(self) -> dict:
+        return {
+            agent: {
+                "target": target,
+                "ready": len(self._ready[agent]),
+                "warming": self._warming[agent],
+            }
+            for agent, target in self.targets.items()
+        }
+
+    def _schedule_refill(self, agent: str) -> None:
+        missing = self.targets[agent] - len(self._ready[agent]) - self._warming[agent]
+        for _ in range(max(0, missing)):
+            self._warming[agent] += 1
+            self._spawn(self._warm_room(agent))
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _expire(self, agent: str) -> list[tuple[str, float]]:
+        """Remove and return `agent`'s rooms too old to hand out."""
+        now = time.monotonic()
+        rooms = self._ready[agent]
+        stale = [r for r in rooms if now - r[1] >= self.max_age_seconds]
+        rooms[:] = [r for r in rooms if now - r[1] < self.max_age_seconds]
+        return stale
+
+    async def _warm_room(self, agent: str) -> None:
+        room_name = self._room_name_fn(agent)
+        client = self._get_client()
+        try:
+            metadata = json.dumps(
+                {"agent": agent, "warm": True, "join_timeout": self.join_timeout_seconds}
+            )
+            with observe_livekit_call("create_room"):
+                await client.room.create_room(
+                    api.CreateRoomRequest(
+                        name=room_name,
+                        metadata=metadata,
+                        empty_timeout=60,
+                    )
+                )
+            if await self._wait_for_agent(client, room_name):
+                self._ready[agent].append((room_name, time.monotonic()))
+                logger.info(f"Warm room ready | room={room_name} | agent={agent}")
+            else:
+                logger.warning(f"Agent did not join warm room {room_name} in time")
+                await self._delete_room(room_name)
+        except asyncio.CancelledError:
+            await self._delete_room(room_name)
+            raise
+        except Exception as e:
+            logger.error(f"Failed to warm room for {agent}: {e}", exc_info=True)
+        finally:
+            self._warming[agent] -= 1
+
+    async def _wait_for_agent(self, client: api.LiveKitAPI, room_name: str) -> bool:
+        deadline = time.monotonic() + self.ready_timeout_seconds
+        while time.monotonic() < deadline:
+            with observe_livekit_call("list_participants"):
+                res = await client.room.list_participants(
+                    api.ListParticipantsRequest(room=room_name)
+                )
+            if any(p.kind == ParticipantInfo.Kind.AGENT for p in res.participants):
+                return True
+            await asyncio.sleep(0.5)
+        return False
+
+    async def _delete_room(self, room_name: str) -> None:
+        try:
+            with observe_livekit_call("delete_room"):
+                await self._get_client().room.delete_room(api.DeleteRoomRequest(room=room_name))
+        except Exception as e:
+            logger.warning(f"Could not delete warm room {room_name}: {e}")
+
+    async def _reap_loop(self) -> None:
+        # Recycle rooms before their agent gives up waiting, so warm sessions
+        # stay usable, and retry rooms that failed to warm
+        while True:
+            await asyncio.sleep(max(1.0, min(30.0, self.max_age_seconds / 4)))
+            for agent in self._ready:
+                for room_name, _ in self._expire(agent):
+                    await self._delete_room(room_name)
+                self._schedule_refill(agent)
@@ -0,0 +1,177 @@
+"""
+Load reporting for the agent worker, used as AgentServer's load_fnc.
+
+The worker reports the highest of three normalized signals, so any one of
+them running hot stops LiveKit from sending it more jobs:
+
+- sessions: running jobs weighted by agent type (AGENT_LOAD_WEIGHTS, e.g.
+  "web=2,invoice=1"; web sessions do RAG) over AGENT_MAX_SESSIONS
+- cpu:      CPU used by the worker and its job processes over all cores
+- lag:      worst event-loop lag reported by the job processes over
+            AGENT_MAX_LOOP_LAG_MS
+
+Jobs run in their own processes, so each job runs a LoopLagMonitor that
+writes its lag to a small file under AGENT_LOAD_DIR for the worker to read.
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Callable
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+MAX_SESSIONS = float(os.getenv("AGENT_MAX_SESSIONS", "8"))
+MAX_LOOP_LAG_MS = float(os.getenv("AGENT_MAX_LOOP_LAG_MS", "100"))
+DEFAULT_WEIGHT = 1.0
+# Job processes inherit this from the worker, so both sides agree on the path
+LOAD_DIR = os.environ.setdefault(
+    "AGENT_LOAD_DIR", os.path.join(tempfile.gettempdir(), f"agent-load-{os.getpid()}")
+)
+# A job process that has not reported for this long is gone or idle
+STALE_REPORT_SECONDS = 5.0
+
+
+def parse_weights(spec: str | None) -> dict[str, float]:
+    """Parse "web=2,invoice=1" into {"web": 2.0, "invoice": 1.0}."""
+    weights: dict[str, float] = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        agent, _, weight = item.partition("=")
+        try:
+            weights[agent.strip()] = max(0.0, float(weight))
+        except ValueError:
+            logger.warning(f"Ignoring invalid load weight: {item!r}")
+    return weights
+
+
+class LoopLagMonitor:
+    """Measures this process's event-loop lag and reports it to the worker."""
+
+    def __init__(self, interval_seconds: float = 0.25, report_every: int = 4):
+        self.interval_seconds = interval_seconds
+        self.report_every = report_every
+        self.lag_ms = 0.0
+        self._path = os.path.join(LOAD_DIR, str(os.getpid()))
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        os.makedirs(LOAD_DIR, exist_ok=True)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        try:
+            os.remove(self._path)
+        except FileNotFoundError:
+            pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        ticks = 0
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval_seconds)
+            lag_ms = max(0.0, (loop.time() - started - self.interval_seconds) * 1000)
+            # Rise fast, decay slowly, so short stalls still show up
+            self.lag_ms = max(lag_ms, 0.8 * self.lag_ms + 0.2 * lag_ms)
+            ticks += 1
+            if ticks % self.report_every == 0:
+                try:
+                    with open(self._path, "w") as f:
+                        f.write(f"{self.lag_ms:.1f}")
+                except OSError as e:
+                    logger.debug(f"Could not report loop lag: {e}")
+
+
+class _ProcessTreeCPU:
+    def __init__(self):
+        self._root = psutil.Process()
+        self._cpu_count = psutil.cpu_count() or 1
+        self._last: dict[int, float] = {}
+        self._last_at = time.monotonic()
+
+    def sample(self) -> float:
+        """Fraction of all cores used by the worker and its children since the last call."""
+        now = time.monotonic()
+        used = 0.0
+        seen: dict[int, float] = {}
+        for proc in [self._root, *self._root.children(recursive=True)]:
+            try:
+                times = proc.cpu_times()
+            except psutil.Error:
+                continue
+            total = times.user + times.system
+            seen[proc.pid] = total
+            # New processes count from their first sample
+            used += total - self._last.get(proc.pid, total)
+        elapsed, self._last_at = now - self._last_at, now
+        self._last = seen
+        if elapsed <= 0:
+            return 0.0
+        return min(1.0, used / (elapsed * self._cpu_count))
+
+
+class WorkerLoad:
+    def __init__(
+        self,
+        job_agent_type: Callable[[object], str | None],
+        weights: dict[str, float] | None = None,
+        max_sessions: float = MAX_SESSIONS,
+        max_loop_lag_ms: float = MAX_LOOP_LAG_MS,
+    ):
+        self.job_agent_type = job_agent_type
+        self.weights = weights if weights is not None else parse_weights(os.getenv("AGENT_LOAD_WEIGHTS", "web=2"))
+        self.max_sessions = max_sessions
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self.last: dict[str, float] = {}
+        self._cpu: _ProcessTreeCPU | None = None
+        self._cpu_avg = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, server) -> float:
+        # Called every 0.5 s from an executor thread
+        with self._lock:
+            if self._cpu is None:
+                self._cpu = _ProcessTreeCPU()
+            self._cpu_avg = 0.7 * self._cpu_avg + 0.3 * self._cpu.sample()
+
+            weight = 0.0
+            for job_info in server.active_jobs:
+                agent_type = self.job_agent_type(job_info.job)
+                weight += self.weights.get(agent_type, DEFAULT_WEIGHT)
+
+            self.last = {
+                "sessions": min(1.0, weight / self.max_sessions) if self.max_sessions > 0 else 0.0,
+                "cpu": self._cpu_avg,
+                "lag": min(1.0, self._job_loop_lag_ms() / self.max_loop_lag_ms)
+                if self.max_loop_lag_ms > 0
+                else 0.0,
+            }
+            return max(self.last.values())
+
+    def _job_loop_lag_ms(self) -> float:
+        worst = 0.0
+        now = time.time()
+        try:
+            entries = list(os.scandir(LOAD_DIR))
+        except FileNotFoundError:
+            return 0.0
+        for entry in entries:
+            try:
+                if now - entry.stat().st_mtime > STALE_REPORT_SECONDS:
+                    os.remove(entry.path)
+                    continue
+                with open(entry.path) as f:
+                    worst = max(worst, float(f.read() or 0))
+            except (OSError, ValueError):
+                continue
+        return worst